@@ -21,27 +21,208 @@ from __future__ import annotations
 import json
 import io
 import contextlib
+import hashlib
+import os
 import re
-from typing import Any, Dict, List, Optional
-
-try:
-    import pycrate_asn1dir.RRCLTE as RRCLTE  # type: ignore
-    _PYCRATE_READY = True
-    _PYCRATE_IMPORT_ERROR = ""
-except Exception as exc:  # pragma: no cover - optional dependency path
-    RRCLTE = None  # type: ignore
-    _PYCRATE_READY = False
-    _PYCRATE_IMPORT_ERROR = str(exc)
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+# pycrate_asn1dir.RRCLTE takes seconds to import, so it is loaded on first use (or by
+# start_per_decoder_warmup in the background) rather than when this module is imported.
+RRCLTE = None  # type: ignore
+_PYCRATE_READY = False
+_PYCRATE_IMPORT_ERROR = ""
+# cold (not loaded yet) -> warming (import running) -> ready | error
+_PYCRATE_STATE = "cold"
+_PYCRATE_LOAD_MS: Optional[int] = None
+_PYCRATE_LOCK = threading.Lock()
+
+
+def _load_pycrate() -> bool:
+    """Import pycrate_asn1dir.RRCLTE once (thread-safe); True when the decoder is usable."""
+    global RRCLTE, _PYCRATE_READY, _PYCRATE_IMPORT_ERROR, _PYCRATE_STATE, _PYCRATE_LOAD_MS
+    if _PYCRATE_STATE in ("ready", "error"):
+        return _PYCRATE_READY
+    with _PYCRATE_LOCK:
+        if _PYCRATE_STATE in ("ready", "error"):
+            return _PYCRATE_READY
+        _PYCRATE_STATE = "warming"
+        t0 = time.perf_counter()
+        try:
+            import pycrate_asn1dir.RRCLTE as rrclte  # type: ignore
+            RRCLTE = rrclte
+            _PYCRATE_READY = True
+            _PYCRATE_STATE = "ready"
+        except Exception as exc:  # pragma: no cover - optional dependency path
+            _PYCRATE_IMPORT_ERROR = str(exc)
+            _PYCRATE_STATE = "error"
+        _PYCRATE_LOAD_MS = int((time.perf_counter() - t0) * 1000)
+    return _PYCRATE_READY
+
+
+def start_per_decoder_warmup() -> bool:
+    """Load pycrate on a daemon thread; False when it is already loaded or loading."""
+    global _PYCRATE_STATE
+    with _PYCRATE_LOCK:
+        if _PYCRATE_STATE != "cold":
+            return False
+        _PYCRATE_STATE = "warming"
+    threading.Thread(target=_load_pycrate, name="per-decoder-warmup", daemon=True).start()
+    return True
+
+
+def per_decoder_warmup_state() -> Dict[str, Any]:
+    """Decoder load state without triggering the load (for readiness checks)."""
+    return {
+        "state": _PYCRATE_STATE,
+        "ready": _PYCRATE_STATE != "warming",
+        "loadMs": _PYCRATE_LOAD_MS,
+        "error": _PYCRATE_IMPORT_ERROR or None,
+    }
 
 
 def per_decoder_status() -> Dict[str, Any]:
+    _load_pycrate()
     return {
         "available": bool(_PYCRATE_READY),
         "backend": "pycrate_asn1dir.RRCLTE",
         "error": _PYCRATE_IMPORT_ERROR or None,
+        "load_ms": _PYCRATE_LOAD_MS,
     }
 
 
+# Bump whenever a change to the decoders alters their results, so cached decodes
+# (in memory and on disk, see PerDecodeCache) are not reused across versions.
+PER_DECODER_VERSION = "1"
+
+
+class PerDecodeCache:
+    """
+    Content-addressed cache of decode results keyed by (decoder version, message
+    profile, sha1 of the payload). Results are held as compact JSON in an LRU of
+    at most `capacity` entries, so every hit returns a fresh dict; with `cache_dir`
+    misses fall through to (and new results are written to) an SQLite file there.
+    """
+
+    def __init__(self, capacity: int = 4096, cache_dir: Optional[str] = None) -> None:
+        self.capacity = max(0, int(capacity))
+        self.cache_dir = cache_dir or None
+        self._lru: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_failed = False
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(profile: str, payload: bytes) -> str:
+        return f"{PER_DECODER_VERSION}:{profile}:{hashlib.sha1(payload).hexdigest()}"
+
+    def _disk(self) -> Optional[sqlite3.Connection]:
+        if self._db is None and self.cache_dir and not self._db_failed:
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                db = sqlite3.connect(os.path.join(self.cache_dir, "per_decode_cache.sqlite"), check_same_thread=False)
+                db.execute("CREATE TABLE IF NOT EXISTS per_decode (key TEXT PRIMARY KEY, value BLOB NOT NULL)")
+                db.commit()
+                self._db = db
+            except Exception:
+                self._db_failed = True
+        return self._db
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            text = self._lru.get(key)
+            if text is not None:
+                self._lru.move_to_end(key)
+                self.hits += 1
+            else:
+                db = self._disk()
+                row = None
+                if db is not None:
+                    try:
+                        row = db.execute("SELECT value FROM per_decode WHERE key = ?", (key,)).fetchone()
+                    except Exception:
+                        row = None
+                if row is None:
+                    self.misses += 1
+                    return None
+                text = zlib.decompress(row[0]).decode("utf-8")
+                self.disk_hits += 1
+                self._remember(key, text)
+        return json.loads(text)
+
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        try:
+            text = json.dumps(result, separators=(",", ":"))
+        except (TypeError, ValueError):
+            return
+        with self._lock:
+            self._remember(key, text)
+            db = self._disk()
+            if db is not None:
+                try:
+                    db.execute(
+                        "INSERT OR REPLACE INTO per_decode (key, value) VALUES (?, ?)",
+                        (key, zlib.compress(text.encode("utf-8"), 6)),
+                    )
+                    db.commit()
+                except Exception:
+                    pass
+
+    def _remember(self, key: str, text: str) -> None:
+        if not self.capacity:
+            return
+        self._lru[key] = text
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.capacity:
+            self._lru.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "entries": len(self._lru),
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._lru.clear()
+            self.hits = self.disk_hits = self.misses = 0
+
+
+def _cache_from_env() -> PerDecodeCache:
+    try:
+        capacity = int(os.environ.get("OPTIM_LTE_RRC_CACHE_SIZE", "") or 4096)
+    except ValueError:
+        capacity = 4096
+    return PerDecodeCache(capacity=capacity, cache_dir=os.environ.get("OPTIM_LTE_RRC_CACHE_DIR") or None)
+
+
+# Process-wide cache shared by the importer and the /api/lte_rrc endpoints.
+PER_DECODE_CACHE = _cache_from_env()
+
+
+def per_decode_cache_stats() -> Dict[str, int]:
+    return PER_DECODE_CACHE.stats()
+
+
+def _cached_decode(profile: str, payload: bytes, decode_fn) -> Dict[str, Any]:
+    key = PerDecodeCache.key(profile, payload)
+    result = PER_DECODE_CACHE.get(key)
+    if result is None:
+        result = decode_fn(payload)
+        PER_DECODE_CACHE.put(key, result)
+    return result
+
+
 def _safe_int(v: Any) -> Optional[int]:
     try:
         if v is None or v == "":
@@ -56,7 +237,145 @@ def _safe_int(v: Any) -> Optional[int]:
             return None
 
 
+# Candidate scoring runs on pycrate's native values (obj.get_val()) rather than on JSON:
+# SEQUENCEs are dicts, SEQUENCE OFs lists and a CHOICE is an (alternative, value) tuple,
+# which these walkers treat like the {alternative: value} map the JSON form has.
+def _choice_pair(node: Any) -> Optional[Tuple[str, Any]]:
+    if isinstance(node, tuple) and len(node) == 2 and isinstance(node[0], str):
+        return node
+    return None
+
+
+class _RrcKeyIndex:
+    """
+    Key lookups over one decoded RRC tree (native value or JSON form), built in a single
+    preorder pass so scoring and summaries stop re-walking the tree per lookup.
+
+    Every mapping (dict, or CHOICE pair taken as {alternative: value}) is recorded in
+    preorder with the end of its subtree. Exact-key answers are precomputed with the
+    semantics of the recursive walkers: a mapping holding the key answers for its whole
+    subtree (a None value there means "not found here", and the search resumes after
+    that subtree). Key-token lookups scan the recorded mappings and are cached. The
+    _find_first_* / _first_present / _contains_any_token helpers accept an index in
+    place of a tree.
+    """
+
+    __slots__ = ("root", "_maps", "_first", "_first_map", "_names", "_text", "_token_cache",
+                 "has_unknown_extension", "has_empty_nested_extension")
+
+    def __init__(self, root: Any) -> None:
+        self.root = root
+        maps: List[List[Any]] = []
+        first: Dict[str, Any] = {}
+        first_map: Dict[str, Tuple[int, Any]] = {}
+        names: List[str] = []
+        blocked: Dict[str, int] = {}
+        unknown_ext = empty_nested = False
+        stack: List[Tuple[Any, bool]] = [(root, False)]
+        while stack:
+            node, leaving = stack.pop()
+            if leaving:
+                node[3] = len(maps)
+                for k in node[0]:
+                    blocked[k] -= 1
+                continue
+            pair = _choice_pair(node)
+            if pair is not None:
+                keys: Tuple[Any, ...] = (pair[0],)
+                values: Tuple[Any, ...] = (pair[1],)
+                as_map: Any = None
+            elif isinstance(node, dict):
+                keys = tuple(node.keys())
+                values = tuple(node.values())
+                as_map = node
+            elif isinstance(node, list):
+                stack.extend((v, False) for v in reversed(node))
+                continue
+            else:
+                if isinstance(node, str):
+                    names.append(node)
+                continue
+            lower = tuple(str(k).lower() for k in keys)
+            pos = len(maps)
+            rec = [keys, lower, values, pos + 1]
+            maps.append(rec)
+            for k, kl, v in zip(keys, lower, values):
+                names.append(kl)
+                if k not in first_map:
+                    first_map[k] = (pos, as_map if as_map is not None else {k: v})
+                if k not in first and not blocked.get(k) and v is not None:
+                    first[k] = v
+                if kl.startswith("_ext_"):
+                    unknown_ext = True
+                if kl == "noncriticalextension" and isinstance(v, dict) and len(v) == 1:
+                    (k2, v2), = v.items()
+                    if str(k2).lower() == "noncriticalextension" and v2 == {}:
+                        empty_nested = True
+            for k in keys:
+                blocked[k] = blocked.get(k, 0) + 1
+            stack.append((rec, True))
+            stack.extend((v, False) for v in reversed(values))
+        self._maps = maps
+        self._first = first
+        self._first_map = first_map
+        self._names = names
+        self._text: Optional[str] = None
+        self._token_cache: Dict[Tuple[str, str], Any] = {}
+        self.has_unknown_extension = unknown_ext
+        self.has_empty_nested_extension = empty_nested
+
+    def first(self, key: str) -> Any:
+        return self._first.get(key)
+
+    def first_map(self, keys: List[str]) -> Optional[Dict[str, Any]]:
+        hits = [self._first_map[k] for k in keys if k in self._first_map]
+        return min(hits, key=lambda h: h[0])[1] if hits else None
+
+    def first_by_token(self, tok: str) -> Any:
+        """First value whose key contains tok; a matching None value skips that mapping's subtree."""
+        ck = ("value", tok)
+        if ck not in self._token_cache:
+            out = None
+            i, maps = 0, self._maps
+            while i < len(maps):
+                _, lower, values, end = maps[i]
+                j = next((j for j, kl in enumerate(lower) if tok in kl), None)
+                if j is None:
+                    i += 1
+                elif values[j] is not None:
+                    out = values[j]
+                    break
+                else:
+                    i = end
+            self._token_cache[ck] = out
+        return self._token_cache[ck]
+
+    def first_list_by_token(self, tok: str) -> Optional[List[Any]]:
+        ck = ("list", tok)
+        if ck not in self._token_cache:
+            self._token_cache[ck] = next(
+                (v for _, lower, values, _ in self._maps for kl, v in zip(lower, values)
+                 if tok in kl and isinstance(v, list)),
+                None,
+            )
+        return self._token_cache[ck]
+
+    def text(self) -> str:
+        if self._text is None:
+            self._text = "\n".join(self._names).lower()
+        return self._text
+
+
+def _key_index(node: Any) -> _RrcKeyIndex:
+    return node if isinstance(node, _RrcKeyIndex) else _RrcKeyIndex(node)
+
+
 def _find_first_key(node: Any, key: str) -> Any:
+    if isinstance(node, _RrcKeyIndex):
+        return node.first(key)
+    pair = _choice_pair(node)
+    if pair is not None:
+        return pair[1] if pair[0] == key else _find_first_key(pair[1], key)
     if isinstance(node, dict):
         if key in node:
             return node.get(key)
@@ -73,6 +392,11 @@ def _find_first_key(node: Any, key: str) -> Any:
 
 
 def _find_first_map_with_any_key(node: Any, keys: List[str]) -> Optional[Dict[str, Any]]:
+    if isinstance(node, _RrcKeyIndex):
+        return node.first_map(keys)
+    pair = _choice_pair(node)
+    if pair is not None:
+        return {pair[0]: pair[1]} if pair[0] in keys else _find_first_map_with_any_key(pair[1], keys)
     if isinstance(node, dict):
         if any(k in node for k in keys):
             return node
@@ -97,14 +421,26 @@ def _extract_list_by_key_substring(container: Any, token: str) -> List[Any]:
     return []
 
 
-def _json_contains_any(node: Any, tokens: List[str]) -> bool:
-    try:
-        txt = json.dumps(node, ensure_ascii=True).lower()
-    except Exception:
-        return False
+def _names_text(node: Any) -> str:
+    """Lower-cased keys, CHOICE alternatives and string values of a decoded value, one per line."""
+    return _key_index(node).text()
+
+
+def _contains_any_token(node: Any, tokens: List[str]) -> bool:
+    txt = _names_text(node)
     return any(str(t or "").lower() in txt for t in (tokens or []))
 
 
+def _has_unknown_extension(node: Any) -> bool:
+    """True when the value holds undecoded extension content ('_ext_N' keys or alternatives), which has no JSON form."""
+    return _key_index(node).has_unknown_extension
+
+
+def _has_empty_nested_extension(node: Any) -> bool:
+    """True when some nonCriticalExtension holds nothing but an empty nonCriticalExtension."""
+    return _key_index(node).has_empty_nested_extension
+
+
 def _rsrp_idx_to_dbm(idx: Optional[int]) -> Optional[float]:
     if idx is None:
         return None
@@ -368,6 +704,405 @@ def _build_meas_config_resolver(meas_cfg: Any) -> Dict[str, Any]:
     }
 
 
+# UPER prefix prefilter.
+#
+# Most candidate (type, offset) pairs fail, and every failed from_uper() is expensive
+# (pycrate state, exception objects, redirected stdio). The first bits of a UPER
+# encoding are the CHOICE indexes / extension bits that select the message, so for
+# each candidate type we derive, once, which values those leading bits may take in a
+# decode that can contain one of the keys the caller's scoring needs; offsets whose
+# leading bits are anything else are skipped without calling pycrate.
+_PREFIX_SPECS: Dict[Tuple[str, Tuple[str, ...], Tuple[str, ...]], Optional[Tuple[int, Tuple[Tuple[int, int, frozenset], ...]]]] = {}
+
+
+def _asn1_subtree_has(obj: Any, match, seen: set) -> bool:
+    """True when a component, alternative or enumerated name below obj satisfies match."""
+    if id(obj) in seen:
+        return False
+    seen.add(id(obj))
+    cont = getattr(obj, "_cont", None)
+    if cont is None:
+        return False
+    if obj.TYPE in ("SEQUENCE OF", "SET OF"):
+        return _asn1_subtree_has(cont, match, seen)
+    if obj.TYPE == "ENUMERATED":
+        return any(match(str(name)) for name in cont)
+    if obj.TYPE not in ("SEQUENCE", "SET", "CHOICE"):
+        return False
+    for name, sub in cont.items():
+        if match(str(name)) or _asn1_subtree_has(sub, match, seen):
+            return True
+    return False
+
+
+def _asn1_fixed_width(obj: Any) -> Optional[int]:
+    """UPER width of a mandatory leading field that carries no information we filter on."""
+    if obj.TYPE == "NULL":
+        return 0
+    if obj.TYPE == "BOOLEAN":
+        return 1
+    if obj.TYPE == "INTEGER":
+        const = getattr(obj, "_const_val", None)
+        root = getattr(const, "root", None) if const is not None else None
+        if not root or len(root) != 1 or getattr(const, "ext", None) is not None:
+            return None
+        lb, ub = getattr(root[0], "lb", None), getattr(root[0], "ub", None)
+        if lb is None or ub is None:
+            return None
+        return (int(ub) - int(lb)).bit_length()
+    return None
+
+
+def _uper_prefix_fields(obj: Any, match) -> List[Tuple[int, Optional[frozenset]]]:
+    """
+    Leading UPER fields of obj as (bit width, allowed values or None), followed for as
+    long as the path to a matching name is unambiguous.
+    """
+    fields: List[Tuple[int, Optional[frozenset]]] = []
+    node = obj
+    for _ in range(16):
+        if node.TYPE in ("SEQUENCE", "SET"):
+            if node._ext is not None:
+                fields.append((1, None))
+            n_opt = len(node._root_opt or [])
+            if n_opt:
+                fields.append((n_opt, None))
+            nxt = None
+            for name in node._root:
+                sub = node._cont[name]
+                if match(str(name)):
+                    return fields
+                if _asn1_subtree_has(sub, match, set()):
+                    if name in (node._root_opt or []):
+                        return fields
+                    nxt = sub
+                    break
+                width = _asn1_fixed_width(sub) if name not in (node._root_opt or []) else None
+                if width is None:
+                    return fields
+                if width:
+                    fields.append((width, None))
+            if nxt is None:
+                return fields
+            node = nxt
+            continue
+        if node.TYPE == "CHOICE":
+            root = list(node._root)
+            ext_names = [name for name in node._cont if name not in root]
+            allowed = [
+                i for i, name in enumerate(root)
+                if match(str(name)) or _asn1_subtree_has(node._cont[name], match, set())
+            ]
+            if not allowed:
+                return fields
+            if node._ext is not None:
+                ext_match = any(
+                    match(str(name)) or _asn1_subtree_has(node._cont[name], match, set()) for name in ext_names
+                )
+                fields.append((1, None if ext_match else frozenset((0,))))
+                if ext_match:
+                    return fields
+            width = (len(root) - 1).bit_length()
+            if width:
+                fields.append((width, frozenset(allowed)))
+            if len(allowed) != 1 or match(str(root[allowed[0]])):
+                return fields
+            node = node._cont[root[allowed[0]]]
+            continue
+        return fields
+    return fields
+
+
+def _uper_prefix_spec(
+    name: str, obj: Any, must_keys: Tuple[str, ...], must_key_tokens: Tuple[str, ...]
+) -> Optional[Tuple[int, Tuple[Tuple[int, int, frozenset], ...]]]:
+    """Compiled prefix checks for one candidate: (bits needed, ((shift, mask, allowed), ...)), or None."""
+    key = (name, must_keys, must_key_tokens)
+    if key in _PREFIX_SPECS:
+        return _PREFIX_SPECS[key]
+    exact = frozenset(must_keys)
+    tokens = tuple(t.lower() for t in must_key_tokens)
+
+    def _match(n: str) -> bool:
+        return n in exact or any(t in n.lower() for t in tokens)
+
+    spec = None
+    try:
+        fields = _uper_prefix_fields(obj, _match)
+    except Exception:
+        fields = []
+    total = sum(width for width, _ in fields)
+    checks = []
+    pos = 0
+    for width, allowed in fields:
+        pos += width
+        if allowed is not None and len(allowed) < (1 << width):
+            checks.append((total - pos, (1 << width) - 1, allowed))
+    if checks:
+        spec = (total, tuple(checks))
+    _PREFIX_SPECS[key] = spec
+    return spec
+
+
+def _uper_prefix_ok(segment: bytes, spec: Optional[Tuple[int, Tuple[Tuple[int, int, frozenset], ...]]]) -> bool:
+    if spec is None:
+        return True
+    total, checks = spec
+    nbytes = (total + 7) // 8
+    if len(segment) < nbytes:
+        return True
+    bits = int.from_bytes(segment[:nbytes], "big") >> (nbytes * 8 - total)
+    for shift, mask, allowed in checks:
+        if ((bits >> shift) & mask) not in allowed:
+            return False
+    return True
+
+
+# Hand-written UPER reader for the common MeasurementReport layout.
+#
+# Almost every MeasurementReport in a drive test is measId + measResultPCell, an
+# optional measResultListEUTRA and, with carrier aggregation, measResultServFreqList-r10.
+# Reading those few constrained integers directly is much cheaper than a generic pycrate
+# decode. The readers return exactly the native value pycrate's get_val() would for the
+# same bits. Bits pycrate would reject for sure (buffer too short, a root integer out
+# of its constraint) raise _UperFastPathError, so the candidate fails without a pycrate
+# call (its error names the reason instead of pycrate's exception); anything else (other RATs, cgi-Info, non-critical or unknown extensions)
+# raises _UperFastPathMiss and the candidate is decoded by pycrate as before.
+class _UperFastPathMiss(Exception):
+    pass
+
+
+class _UperFastPathError(Exception):
+    pass
+
+
+class _UperBits:
+    __slots__ = ("value", "size", "pos")
+
+    def __init__(self, data: bytes) -> None:
+        self.value = int.from_bytes(data, "big")
+        self.size = len(data) * 8
+        self.pos = 0
+
+    def read(self, width: int) -> int:
+        end = self.pos + width
+        if end > self.size:
+            raise _UperFastPathError("short_buffer")
+        self.pos = end
+        return (self.value >> (self.size - end)) & ((1 << width) - 1)
+
+    def ranged(self, width: int, lo: int, hi: int) -> int:
+        value = lo + self.read(width)
+        if value > hi:
+            raise _UperFastPathError("out_of_range")
+        return value
+
+
+def _read_meas_result_eutra(bits: _UperBits) -> Dict[str, Any]:
+    if bits.read(1):  # cgi-Info
+        raise _UperFastPathMiss()
+    pci = bits.ranged(9, 0, 503)
+    ext, has_rsrp, has_rsrq = bits.read(1), bits.read(1), bits.read(1)
+    if ext:
+        raise _UperFastPathMiss()
+    meas: Dict[str, Any] = {}
+    if has_rsrp:
+        meas["rsrpResult"] = bits.ranged(7, 0, 97)
+    if has_rsrq:
+        meas["rsrqResult"] = bits.ranged(6, 0, 34)
+    return {"physCellId": pci, "measResult": meas}
+
+
+def _read_meas_result_serv_freq(bits: _UperBits) -> Dict[str, Any]:
+    ext, has_scell, has_best = bits.read(1), bits.read(1), bits.read(1)
+    if ext:
+        raise _UperFastPathMiss()
+    row: Dict[str, Any] = {"servFreqId-r10": bits.ranged(3, 0, 7)}
+    if has_scell:
+        row["measResultSCell-r10"] = {
+            "rsrpResultSCell-r10": bits.ranged(7, 0, 97),
+            "rsrqResultSCell-r10": bits.ranged(6, 0, 34),
+        }
+    if has_best:
+        row["measResultBestNeighCell-r10"] = {
+            "physCellId-r10": bits.ranged(9, 0, 503),
+            "rsrpResultNCell-r10": bits.ranged(7, 0, 97),
+            "rsrqResultNCell-r10": bits.ranged(6, 0, 34),
+        }
+    return row
+
+
+def _read_meas_results_extensions(bits: _UperBits) -> Dict[str, Any]:
+    # Only the r10 group (locationInfo-r10, measResultServFreqList-r10) with just the
+    # serving frequency list present; the group travels as an open type. Decode errors
+    # in here are left for pycrate to report.
+    try:
+        return _read_meas_results_r10_group(bits)
+    except _UperFastPathError:
+        raise _UperFastPathMiss() from None
+
+
+def _read_meas_results_r10_group(bits: _UperBits) -> Dict[str, Any]:
+    if bits.read(1):
+        raise _UperFastPathMiss()
+    groups = bits.read(6) + 1
+    if groups < 2 or groups > 10 or bits.read(groups) != 1 << (groups - 2):
+        raise _UperFastPathMiss()
+    length = bits.read(8)
+    if length & 0x80:
+        raise _UperFastPathMiss()
+    start = bits.pos
+    has_location, has_serv_freq = bits.read(1), bits.read(1)
+    if has_location or not has_serv_freq:
+        raise _UperFastPathMiss()
+    rows = [_read_meas_result_serv_freq(bits) for _ in range(bits.read(3) + 1)]
+    if (bits.pos - start + 7) // 8 != length:
+        raise _UperFastPathMiss()
+    bits.pos = start + 8 * length
+    return {"measResultServFreqList-r10": rows}
+
+
+def _read_meas_results(bits: _UperBits) -> Dict[str, Any]:
+    ext, has_neigh = bits.read(1), bits.read(1)
+    out: Dict[str, Any] = {
+        "measId": bits.ranged(5, 1, 32),
+        "measResultPCell": {"rsrpResult": bits.ranged(7, 0, 97), "rsrqResult": bits.ranged(6, 0, 34)},
+    }
+    if has_neigh:
+        if bits.read(1) or bits.read(2) != 0:  # only measResultListEUTRA
+            raise _UperFastPathMiss()
+        out["measResultNeighCells"] = (
+            "measResultListEUTRA",
+            [_read_meas_result_eutra(bits) for _ in range(bits.read(3) + 1)],
+        )
+    if ext:
+        out.update(_read_meas_results_extensions(bits))
+    return out
+
+
+def _read_measurement_report_r8_ies(bits: _UperBits) -> Dict[str, Any]:
+    if bits.read(1):  # nonCriticalExtension
+        raise _UperFastPathMiss()
+    return {"measResults": _read_meas_results(bits)}
+
+
+def _read_measurement_report(bits: _UperBits) -> Dict[str, Any]:
+    if bits.read(1) or bits.read(3) != 0:  # criticalExtensions c1 / measurementReport-r8
+        raise _UperFastPathMiss()
+    return {"criticalExtensions": ("c1", ("measurementReport-r8", _read_measurement_report_r8_ies(bits)))}
+
+
+def _read_ul_dcch_measurement_report(bits: _UperBits) -> Dict[str, Any]:
+    if bits.read(1) or bits.read(4) != 1:  # message c1 / measurementReport
+        raise _UperFastPathMiss()
+    return {"message": ("c1", ("measurementReport", _read_measurement_report(bits)))}
+
+
+def _fast_uper_decode(reader, segment: bytes) -> Any:
+    """
+    reader's native value for segment, or None when pycrate has to decode it.
+    Raises _UperFastPathError when pycrate would fail to decode segment.
+    """
+    try:
+        return reader(_UperBits(segment))
+    except _UperFastPathMiss:
+        return None
+
+
+def _native_jval(value: Any) -> Any:
+    """JSON form of a fast-path value (pycrate's _to_jval for CHOICE / SEQUENCE / SEQUENCE OF / INTEGER)."""
+    if isinstance(value, tuple):
+        return {value[0]: _native_jval(value[1])}
+    if isinstance(value, dict):
+        return {k: _native_jval(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_native_jval(v) for v in value]
+    return value
+
+
+# The candidate objects are module-level pycrate instances shared by every thread (import
+# jobs decode in-process next to the API handlers) and from_uper / set_val mutate them, so
+# each from_uper -> get_val and set_val -> _to_jval round-trip holds this lock. It also
+# keeps the stdout/stderr redirection, which swaps sys.stdout process-wide, unnested.
+_PYCRATE_DECODE_LOCK = threading.Lock()
+
+# Learned per-profile winner: profile -> (decoder_type, offset).
+_WINNER_HINTS: Dict[str, Tuple[str, int]] = {}
+# Per-profile decode effort: decodes, from_uper calls, hint hits/misses, full searches.
+_ATTEMPT_STATS: Dict[str, Dict[str, int]] = {}
+
+
+def per_decoder_attempt_stats() -> Dict[str, Dict[str, int]]:
+    return {profile: dict(row) for profile, row in _ATTEMPT_STATS.items()}
+
+
+def reset_per_decoder_hints() -> None:
+    _WINNER_HINTS.clear()
+    _ATTEMPT_STATS.clear()
+
+
+def _try_candidate(
+    segment: bytes, off: int, c: Dict[str, Any], score_fn, stats: Optional[Dict[str, int]] = None
+) -> Tuple[Optional[Dict[str, Any]], str]:
+    obj = c["obj"]
+    name = str(c["name"])
+    validator = c.get("validator")
+    fast = c.get("fast")
+    try:
+        decoded = _fast_uper_decode(fast, segment) if fast is not None else None
+    except _UperFastPathError as exc:
+        return None, f"{name}@{off}:{exc}"
+    if decoded is not None:
+        if stats is not None:
+            stats["fast_path_decodes"] = stats.get("fast_path_decodes", 0) + 1
+    else:
+        fast = None
+        try:
+            with _PYCRATE_DECODE_LOCK, contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+                obj.from_uper(segment)
+                decoded = obj.get_val()
+        except Exception as exc:
+            return None, f"{name}@{off}:{type(exc).__name__}"
+
+    index = _RrcKeyIndex(decoded)
+    if index.has_unknown_extension:
+        return None, f"{name}@{off}:unknown_extension"
+    if callable(validator) and not validator(index):
+        return None, f"{name}@{off}:decoded_but_validation_failed"
+
+    score = 1
+    if callable(score_fn):
+        try:
+            score = int(score_fn(index, name, off))
+        except Exception:
+            score = 1
+
+    row = {
+        "ok": True,
+        "decoder_type": name,
+        "decoded_value": decoded,
+        "decode_offset": int(off),
+        "score": int(score),
+    }
+    if fast is not None:
+        row["fast_path"] = True
+    return row, ""
+
+
+def _winner_json(row: Dict[str, Any], candidates: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Turn the winning row's native value into its JSON form (the only to-JSON conversion per decode)."""
+    out = {k: v for k, v in row.items() if k not in ("decoded_value", "fast_path")}
+    if row.get("fast_path"):
+        out["decoded_json"] = _native_jval(row["decoded_value"])
+        return out
+    c = next(c for c in candidates if str(c["name"]) == row["decoder_type"])
+    obj = c["obj"]
+    with _PYCRATE_DECODE_LOCK, contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        obj.set_val(row["decoded_value"])
+        out["decoded_json"] = obj._to_jval()
+    return out
+
+
 def _decode_with_candidates(
     payload: bytes,
     candidates: List[Dict[str, Any]],
@@ -376,11 +1111,63 @@ def _decode_with_candidates(
     score_fn=None,
     min_score: Optional[int] = None,
     stop_score: Optional[int] = None,
+    profile: Optional[str] = None,
+    must_keys: Tuple[str, ...] = (),
+    must_key_tokens: Tuple[str, ...] = (),
 ) -> Dict[str, Any]:
+    """
+    Try every candidate type at every offset up to max_offset and return the best scoring decode.
+
+    must_keys / must_key_tokens name the keys (exact / lower-case substrings) a decode
+    needs to pass min_score; when given, offsets whose leading UPER bits cannot select a
+    message containing one of them are skipped without calling pycrate.
+
+    With a profile, the (decoder_type, offset) that won the last full search for that
+    profile is tried first; it is accepted only when it validates and reaches stop_score
+    (and min_score), the score at which the full search stops too, otherwise the full
+    search runs. A lower-scoring hint is never accepted: a full search might find a better
+    decode, and the result (cached by payload) must not depend on earlier payloads.
+
+    A candidate may carry a "fast" reader (see _fast_uper_decode) that is tried before
+    pycrate's from_uper for its type.
+    """
     errors: List[str] = []
     best: Optional[Dict[str, Any]] = None
-
     max_off = int(max(0, max_offset))
+    stats = None
+    specs: Dict[str, Any] = {}
+    if must_keys or must_key_tokens:
+        for c in candidates:
+            specs[str(c["name"])] = _uper_prefix_spec(str(c["name"]), c["obj"], tuple(must_keys), tuple(must_key_tokens))
+    if profile:
+        stats = _ATTEMPT_STATS.setdefault(
+            profile,
+            {
+                "decodes": 0, "from_uper_calls": 0, "fast_path_decodes": 0, "prefix_skips": 0,
+                "hint_hits": 0, "hint_misses": 0, "full_searches": 0,
+            },
+        )
+        stats["decodes"] += 1
+        hint = _WINNER_HINTS.get(profile)
+        if hint is not None:
+            hint_name, hint_off = hint
+            c = next((c for c in candidates if str(c["name"]) == hint_name), None)
+            if c is not None and hint_off <= max_off and payload[hint_off:]:
+                row = None
+                if _uper_prefix_ok(payload[hint_off:], specs.get(hint_name)):
+                    stats["from_uper_calls"] += 1
+                    row, _ = _try_candidate(payload[hint_off:], hint_off, c, score_fn, stats)
+                else:
+                    stats["prefix_skips"] += 1
+                if (
+                    row is not None and stop_score is not None and row["score"] >= int(stop_score)
+                    and (min_score is None or row["score"] >= int(min_score))
+                ):
+                    stats["hint_hits"] += 1
+                    return _winner_json(row, candidates)
+            stats["hint_misses"] += 1
+        stats["full_searches"] += 1
+
     offsets: List[int] = []
     for off in (20, 19, 18, 17, 16, 0, 1, 2, 3, 4):
         if 0 <= off <= max_off and off not in offsets:
@@ -389,40 +1176,27 @@ def _decode_with_candidates(
         if off not in offsets:
             offsets.append(off)
 
+    def _learn(row: Dict[str, Any]) -> Dict[str, Any]:
+        if profile:
+            _WINNER_HINTS[profile] = (str(row["decoder_type"]), int(row["decode_offset"]))
+        return _winner_json(row, candidates)
+
     for off in offsets:
         segment = payload[off:]
         if not segment:
             continue
         for c in candidates:
-            obj = c["obj"]
-            name = str(c["name"])
-            validator = c.get("validator")
-            try:
-                with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
-                    obj.from_uper(segment)
-                    decoded = json.loads(obj.to_json())
-            except Exception as exc:
-                errors.append(f"{name}@{off}:{type(exc).__name__}")
+            if not _uper_prefix_ok(segment, specs.get(str(c["name"]))):
+                if stats is not None:
+                    stats["prefix_skips"] += 1
+                errors.append(f"{c['name']}@{off}:prefix_mismatch")
                 continue
-
-            if callable(validator) and not validator(decoded):
-                errors.append(f"{name}@{off}:decoded_but_validation_failed")
+            if stats is not None:
+                stats["from_uper_calls"] += 1
+            row, error = _try_candidate(segment, off, c, score_fn, stats)
+            if row is None:
+                errors.append(error)
                 continue
-
-            score = 1
-            if callable(score_fn):
-                try:
-                    score = int(score_fn(decoded, name, off))
-                except Exception:
-                    score = 1
-
-            row = {
-                "ok": True,
-                "decoder_type": name,
-                "decoded_json": decoded,
-                "decode_offset": int(off),
-                "score": int(score),
-            }
             if best is None:
                 best = row
                 continue
@@ -433,27 +1207,31 @@ def _decode_with_candidates(
                 best = row
             if stop_score is not None and int(best.get("score") or 0) >= int(stop_score):
                 if min_score is None or int(best.get("score") or 0) >= int(min_score):
-                    return best
+                    return _learn(best)
 
     if best is not None:
         if min_score is None or int(best.get("score") or 0) >= int(min_score):
-            return best
+            return _learn(best)
         errors.append(f"best_score_too_low:{best.get('score')}")
 
     return {"ok": False, "errors": errors}
 
 
 def decode_measurement_report_payload(payload: bytes) -> Dict[str, Any]:
-    if not _PYCRATE_READY:
+    if not _load_pycrate():
         return {"ok": False, "message": "pycrate unavailable", "status": per_decoder_status()}
     if not payload:
         return {"ok": False, "message": "empty payload"}
+    return _cached_decode("measurement_report", bytes(payload), _decode_measurement_report)
 
+
+def _decode_measurement_report(payload: bytes) -> Dict[str, Any]:
     defs = RRCLTE.EUTRA_RRC_Definitions
-    def _score_mr(decoded: Dict[str, Any], _name: str, _off: int) -> int:
-        meas = _find_first_key(decoded, "measResults")
-        if not isinstance(meas, dict):
+    def _score_mr(decoded: _RrcKeyIndex, _name: str, _off: int) -> int:
+        meas_results = _find_first_key(decoded, "measResults")
+        if not isinstance(meas_results, dict):
             return -100
+        meas = _RrcKeyIndex(meas_results)
         score = 40
         if _find_first_key(meas, "measId") is not None:
             score += 5
@@ -475,16 +1253,19 @@ def decode_measurement_report_payload(payload: bytes) -> Dict[str, Any]:
             {
                 "name": "MeasurementReport_r8_IEs",
                 "obj": defs.MeasurementReport_r8_IEs,
-                "validator": lambda d: isinstance(d, dict) and isinstance(d.get("measResults"), dict),
+                "fast": _read_measurement_report_r8_ies,
+                "validator": lambda d: isinstance(d.root, dict) and isinstance(d.root.get("measResults"), dict),
             },
             {
                 "name": "MeasurementReport",
                 "obj": defs.MeasurementReport,
+                "fast": _read_measurement_report,
                 "validator": lambda d: _find_first_key(d, "measResults") is not None,
             },
             {
                 "name": "UL_DCCH_Message",
                 "obj": defs.UL_DCCH_Message,
+                "fast": _read_ul_dcch_measurement_report,
                 "validator": lambda d: _find_first_map_with_any_key(d, ["measurementReport"]) is not None
                 and _find_first_key(d, "measResults") is not None,
             },
@@ -493,6 +1274,8 @@ def decode_measurement_report_payload(payload: bytes) -> Dict[str, Any]:
         score_fn=_score_mr,
         min_score=40,
         stop_score=120,
+        profile="measurement_report",
+        must_keys=("measResults",),
     )
     if not result.get("ok"):
         return result
@@ -632,14 +1415,27 @@ def decode_measurement_report_payload(payload: bytes) -> Dict[str, Any]:
 
 
 def decode_rrc_reconfiguration_payload(payload: bytes) -> Dict[str, Any]:
-    if not _PYCRATE_READY:
+    if not _load_pycrate():
         return {"ok": False, "message": "pycrate unavailable", "status": per_decoder_status()}
     if not payload:
         return {"ok": False, "message": "empty payload"}
+    return _cached_decode("rrc_reconfiguration", bytes(payload), _decode_rrc_reconfiguration)
+
 
+_RECFG_SCORED_KEYS = (
+    "rrcConnectionReconfiguration",
+    "measConfig",
+    "mobilityControlInfo",
+    "radioResourceConfigDedicated",
+    "securityConfigHO",
+)
+
+
+def _decode_rrc_reconfiguration(payload: bytes) -> Dict[str, Any]:
     defs = RRCLTE.EUTRA_RRC_Definitions
-    def _score_recfg(decoded: Dict[str, Any], _name: str, _off: int) -> int:
+    def _score_recfg(decoded: _RrcKeyIndex, _name: str, _off: int) -> int:
         score = 0
+        # Only these keys score positively; keep _RECFG_SCORED_KEYS in sync.
         if _find_first_key(decoded, "rrcConnectionReconfiguration") is not None:
             score += 40
         if _find_first_key(decoded, "measConfig") is not None:
@@ -650,9 +1446,9 @@ def decode_rrc_reconfiguration_payload(payload: bytes) -> Dict[str, Any]:
             score += 35
         if _find_first_key(decoded, "securityConfigHO") is not None:
             score += 25
-        if _json_contains_any(decoded, ["spare7", "spare6", "spare5"]):
+        if _contains_any_token(decoded, ["spare7", "spare6", "spare5"]):
             score -= 40
-        if _json_contains_any(decoded, ['"noncriticalextension":{"noncriticalextension":{}}']):
+        if _has_empty_nested_extension(decoded):
             score -= 30
         return score
 
@@ -662,36 +1458,39 @@ def decode_rrc_reconfiguration_payload(payload: bytes) -> Dict[str, Any]:
             {
                 "name": "DL_DCCH_Message",
                 "obj": defs.DL_DCCH_Message,
-                "validator": lambda d: isinstance(d, dict),
+                "validator": lambda d: isinstance(d.root, dict),
             },
             {
                 "name": "RRCConnectionReconfiguration",
                 "obj": defs.RRCConnectionReconfiguration,
-                "validator": lambda d: isinstance(d, dict),
+                "validator": lambda d: isinstance(d.root, dict),
             },
             {
                 "name": "RRCConnectionReconfiguration_r8_IEs",
                 "obj": defs.RRCConnectionReconfiguration_r8_IEs,
-                "validator": lambda d: isinstance(d, dict),
+                "validator": lambda d: isinstance(d.root, dict),
             },
         ],
         max_offset=min(24, max(0, len(payload) - 1)),
         score_fn=_score_recfg,
         min_score=20,
         stop_score=120,
+        profile="rrc_reconfiguration",
+        must_keys=_RECFG_SCORED_KEYS,
     )
     if not result.get("ok"):
         return result
 
     decoded_json = result["decoded_json"]
-    meas_cfg = _find_first_key(decoded_json, "measConfig")
+    index = _RrcKeyIndex(decoded_json)
+    meas_cfg = _find_first_key(index, "measConfig")
     if not isinstance(meas_cfg, dict):
         meas_cfg = {}
     meas_resolver = _build_meas_config_resolver(meas_cfg)
     summary = {
         "has_measConfig": bool(meas_cfg),
-        "has_mobilityControlInfo": bool(_find_first_key(decoded_json, "mobilityControlInfo")),
-        "has_radioResourceConfigDedicated": bool(_find_first_key(decoded_json, "radioResourceConfigDedicated")),
+        "has_mobilityControlInfo": bool(_find_first_key(index, "mobilityControlInfo")),
+        "has_radioResourceConfigDedicated": bool(_find_first_key(index, "radioResourceConfigDedicated")),
         "measIdToAddModCount": len(meas_cfg.get("measIdToAddModList") or []) if isinstance(meas_cfg, dict) else 0,
         "measObjectToAddModCount": len(meas_cfg.get("measObjectToAddModList") or []) if isinstance(meas_cfg, dict) else 0,
         "reportConfigToAddModCount": len(meas_cfg.get("reportConfigToAddModList") or []) if isinstance(meas_cfg, dict) else 0,
@@ -921,6 +1720,8 @@ def _find_first_list_by_key_token(node: Any, token: str) -> Optional[List[Any]]:
     tok = str(token or "").lower()
     if not tok:
         return None
+    if isinstance(node, _RrcKeyIndex):
+        return node.first_list_by_token(tok)
     if isinstance(node, dict):
         for k, v in node.items():
             if tok in str(k or "").lower() and isinstance(v, list):
@@ -954,6 +1755,8 @@ def _find_first_value_by_key_token(node: Any, token: str) -> Any:
     tok = str(token or "").strip().lower()
     if not tok:
         return None
+    if isinstance(node, _RrcKeyIndex):
+        return node.first_by_token(tok)
     if isinstance(node, dict):
         for k, v in node.items():
             if tok in str(k or "").lower():
@@ -1034,12 +1837,13 @@ def _parse_tac_value(value: Any) -> Optional[int]:
     return None
 
 
-def _extract_tracking_area_code(decoded_json: Dict[str, Any]) -> Optional[int]:
-    if not isinstance(decoded_json, dict):
+def _extract_tracking_area_code(decoded_json: Any) -> Optional[int]:
+    index = _key_index(decoded_json)
+    if not isinstance(index.root, dict):
         return None
 
     raw = _first_present(
-        decoded_json,
+        index,
         [
             "trackingAreaCode",
             "trackingAreaCode-r8",
@@ -1049,14 +1853,14 @@ def _extract_tracking_area_code(decoded_json: Dict[str, Any]) -> Optional[int]:
         ],
     )
     if raw is None:
-        raw = _find_first_value_by_key_token(decoded_json, "trackingareacode")
+        raw = _find_first_value_by_key_token(index, "trackingareacode")
 
     tac = _parse_tac_value(raw)
     if tac is not None:
         return tac
 
     # Some decoders flatten this as "tac".
-    return _parse_tac_value(_find_first_value_by_key_token(decoded_json, "tac"))
+    return _parse_tac_value(_find_first_value_by_key_token(index, "tac"))
 
 
 def _collect_keyed_scalar_values(
@@ -1133,14 +1937,15 @@ def _collect_keyed_numeric_values(
     return out
 
 
-def _extract_rlf_ue_report_summary(decoded_json: Dict[str, Any]) -> Dict[str, Any]:
-    if not isinstance(decoded_json, dict):
+def _extract_rlf_ue_report_summary(decoded_json: Any) -> Dict[str, Any]:
+    index = _key_index(decoded_json)
+    if not isinstance(index.root, dict):
         return {}
 
-    rlf_report = _first_present(decoded_json, ["rlf_Report_r9", "rlf_Report_v9e0", "rlf_Report"])
+    rlf_report = _first_present(index, ["rlf_Report_r9", "rlf_Report_v9e0", "rlf_Report"])
     if rlf_report is None:
-        rlf_report = _find_first_value_by_key_token(decoded_json, "rlf_report")
-    scope = rlf_report if rlf_report is not None else decoded_json
+        rlf_report = _find_first_value_by_key_token(index, "rlf_report")
+    scope = rlf_report if rlf_report is not None else index.root
 
     cause_rows = _collect_keyed_scalar_values(
         scope,
@@ -1237,7 +2042,7 @@ def _extract_rlf_ue_report_summary(decoded_json: Dict[str, Any]) -> Dict[str, An
     }
 
 
-def _extract_band_combinations_from_ue_cap(decoded_json: Dict[str, Any]) -> List[str]:
+def _extract_band_combinations_from_ue_cap(decoded_json: Any) -> List[str]:
     combos_raw = _find_first_list_by_key_token(decoded_json, "supportedBandCombination")
     if not isinstance(combos_raw, list):
         return []
@@ -1275,10 +2080,11 @@ def _extract_band_combinations_from_ue_cap(decoded_json: Dict[str, Any]) -> List
     return combo_strings
 
 
-def _extract_ue_capability_summary(decoded_json: Dict[str, Any]) -> Dict[str, Any]:
+def _extract_ue_capability_summary(decoded_json: Any) -> Dict[str, Any]:
+    index = _key_index(decoded_json)
     ue_cat = _safe_int(
         _first_present(
-            decoded_json,
+            index,
             [
                 "ue-Category",
                 "ue_Category",
@@ -1292,7 +2098,7 @@ def _extract_ue_capability_summary(decoded_json: Dict[str, Any]) -> Dict[str, An
 
     max_layers = _safe_int(
         _first_present(
-            decoded_json,
+            index,
             [
                 "maxNumberMIMO-LayersPDSCH-r10",
                 "maxNumberMIMO_LayersPDSCH_r10",
@@ -1305,7 +2111,7 @@ def _extract_ue_capability_summary(decoded_json: Dict[str, Any]) -> Dict[str, An
     )
     four_ant = _safe_bool(
         _first_present(
-            decoded_json,
+            index,
             [
                 "fourAntennaPortActivated-r10",
                 "fourAntennaPortActivated",
@@ -1318,7 +2124,7 @@ def _extract_ue_capability_summary(decoded_json: Dict[str, Any]) -> Dict[str, An
 
     max_num_carriers = _safe_int(
         _first_present(
-            decoded_json,
+            index,
             [
                 "maxNumCarriers-r10",
                 "maxNumCarriers",
@@ -1331,7 +2137,7 @@ def _extract_ue_capability_summary(decoded_json: Dict[str, Any]) -> Dict[str, An
             ],
         )
     )
-    band_combos = _extract_band_combinations_from_ue_cap(decoded_json)
+    band_combos = _extract_band_combinations_from_ue_cap(index)
     band_comb_count = len(band_combos)
     ca_supported = bool((max_num_carriers is not None and max_num_carriers >= 2) or band_comb_count > 0)
 
@@ -1375,20 +2181,21 @@ def _extract_ue_capability_summary(decoded_json: Dict[str, Any]) -> Dict[str, An
 
 def _summary_for_profile(profile: Dict[str, Any], decoded_json: Dict[str, Any]) -> Dict[str, Any]:
     profile_id = str(profile.get("id") or "")
+    index = _RrcKeyIndex(decoded_json)
     summary: Dict[str, Any] = {
         "messageId": profile_id,
-        "hasCriticalExtensions": bool(_find_first_key(decoded_json, "criticalExtensions")),
+        "hasCriticalExtensions": bool(_find_first_key(index, "criticalExtensions")),
         "rrcTransactionIdentifier": _safe_int(
-            _first_present(decoded_json, ["rrc-TransactionIdentifier", "rrc_TransactionIdentifier"])
+            _first_present(index, ["rrc-TransactionIdentifier", "rrc_TransactionIdentifier"])
         ),
     }
 
     if profile_id == "sib1":
-        tac = _extract_tracking_area_code(decoded_json)
+        tac = _extract_tracking_area_code(index)
         summary["trackingAreaCode"] = tac
         summary["trackingAreaCodeHex"] = (f"{int(tac):04X}" if isinstance(tac, int) else None)
     elif profile_id == "sib3":
-        sib3 = _find_first_key(decoded_json, "sib3")
+        sib3 = _find_first_key(index, "sib3")
         if isinstance(sib3, dict):
             intra = sib3.get("intraFreqCellReselectionInfo") or {}
             common = sib3.get("cellReselectionInfoCommon") or {}
@@ -1408,7 +2215,7 @@ def _summary_for_profile(profile: Dict[str, Any], decoded_json: Dict[str, Any])
             summary["sNonIntraSearchP"] = _safe_int(_first_present(sib3, ["s-NonIntraSearchP-r9"]))
             summary["sNonIntraSearchQ"] = _safe_int(_first_present(sib3, ["s-NonIntraSearchQ-r9"]))
     elif profile_id == "sib5":
-        sib5 = _find_first_key(decoded_json, "sib5")
+        sib5 = _find_first_key(index, "sib5")
         carrier_rows = []
         if isinstance(sib5, dict):
             carriers = sib5.get("interFreqCarrierFreqList") or []
@@ -1429,41 +2236,41 @@ def _summary_for_profile(profile: Dict[str, Any], decoded_json: Dict[str, Any])
         summary["carrierCount"] = len(carrier_rows)
         summary["carriers"] = carrier_rows
     elif profile_id == "rrc_release":
-        summary["releaseCause"] = _first_present(decoded_json, ["releaseCause"])
-        summary["hasIdleModeMobilityControlInfo"] = bool(_find_first_key(decoded_json, "idleModeMobilityControlInfo"))
-        summary["hasRedirectedCarrierInfo"] = bool(_find_first_key(decoded_json, "redirectedCarrierInfo"))
+        summary["releaseCause"] = _first_present(index, ["releaseCause"])
+        summary["hasIdleModeMobilityControlInfo"] = bool(_find_first_key(index, "idleModeMobilityControlInfo"))
+        summary["hasRedirectedCarrierInfo"] = bool(_find_first_key(index, "redirectedCarrierInfo"))
     elif profile_id == "rrc_connection_request":
-        summary["establishmentCause"] = _first_present(decoded_json, ["establishmentCause", "establishmentCause-r15"])
+        summary["establishmentCause"] = _first_present(index, ["establishmentCause", "establishmentCause-r15"])
     elif profile_id == "rrc_setup_complete":
-        summary["selectedPLMNIdentity"] = _safe_int(_first_present(decoded_json, ["selectedPLMN-Identity", "selectedPLMN_Identity"]))
-        summary["hasDedicatedInfoNAS"] = _first_present(decoded_json, ["dedicatedInfoNAS"]) is not None
+        summary["selectedPLMNIdentity"] = _safe_int(_first_present(index, ["selectedPLMN-Identity", "selectedPLMN_Identity"]))
+        summary["hasDedicatedInfoNAS"] = _first_present(index, ["dedicatedInfoNAS"]) is not None
     elif profile_id == "security_mode_command":
-        summary["hasSecurityConfigSMC"] = bool(_find_first_key(decoded_json, "securityConfigSMC"))
+        summary["hasSecurityConfigSMC"] = bool(_find_first_key(index, "securityConfigSMC"))
     elif profile_id == "ue_capability_information":
-        rat_list = _first_present(decoded_json, ["ue-CapabilityRAT-ContainerList", "ue_CapabilityRAT_ContainerList"])
+        rat_list = _first_present(index, ["ue-CapabilityRAT-ContainerList", "ue_CapabilityRAT_ContainerList"])
         summary["ueCapabilityRatContainerCount"] = len(rat_list) if isinstance(rat_list, list) else 0
-        summary.update(_extract_ue_capability_summary(decoded_json))
+        summary.update(_extract_ue_capability_summary(index))
     elif profile_id == "ue_information_request":
-        summary["rlfReportReq"] = bool(_find_first_key(decoded_json, "rlf_ReportReq_r9"))
-        summary["rachReportReq"] = bool(_find_first_key(decoded_json, "rach_ReportReq_r9"))
+        summary["rlfReportReq"] = bool(_find_first_key(index, "rlf_ReportReq_r9"))
+        summary["rachReportReq"] = bool(_find_first_key(index, "rach_ReportReq_r9"))
     elif profile_id == "ue_information_response":
         summary["hasRlfReport"] = bool(
-            _first_present(decoded_json, ["rlf_Report_r9", "rlf_Report_v9e0"])
+            _first_present(index, ["rlf_Report_r9", "rlf_Report_v9e0"])
         )
-        summary["hasRachReport"] = bool(_find_first_key(decoded_json, "rach_Report_r9"))
-        summary["hasConnEstFailReport"] = bool(_find_first_key(decoded_json, "connEstFailReport_r11"))
-        summary.update(_extract_rlf_ue_report_summary(decoded_json))
+        summary["hasRachReport"] = bool(_find_first_key(index, "rach_Report_r9"))
+        summary["hasConnEstFailReport"] = bool(_find_first_key(index, "connEstFailReport_r11"))
+        summary.update(_extract_rlf_ue_report_summary(index))
     elif profile_id == "rrc_reestablishment_request":
-        summary["reestablishmentCause"] = _first_present(decoded_json, ["reestablishmentCause"])
+        summary["reestablishmentCause"] = _first_present(index, ["reestablishmentCause"])
     elif profile_id == "rrc_recfg_complete":
         summary["hasRlfInfoAvailable"] = bool(
-            _first_present(decoded_json, ["rlf_InfoAvailable_r10", "rlf_InfoAvailable_r9"])
+            _first_present(index, ["rlf_InfoAvailable_r10", "rlf_InfoAvailable_r9"])
         )
     return summary
 
 
 def decode_rrc_event_payload(payload: bytes, event_name: str) -> Dict[str, Any]:
-    if not _PYCRATE_READY:
+    if not _load_pycrate():
         return {"ok": False, "message": "pycrate unavailable", "status": per_decoder_status()}
     if not payload:
         return {"ok": False, "message": "empty payload"}
@@ -1472,6 +2279,17 @@ def decode_rrc_event_payload(payload: bytes, event_name: str) -> Dict[str, Any]:
     if not profile:
         return {"ok": False, "message": "unsupported event_name", "event_name": event_name}
 
+    # The decode only depends on the profile, so results are shared by every event name
+    # mapping to it; the caller's event_name is put back into the (fresh) result dict.
+    result = _cached_decode(
+        f"event:{profile.get('id')}", bytes(payload), lambda p: _decode_rrc_event(p, event_name, profile)
+    )
+    if "event_name" in result:
+        result["event_name"] = event_name
+    return result
+
+
+def _decode_rrc_event(payload: bytes, event_name: str, profile: Dict[str, Any]) -> Dict[str, Any]:
     defs = RRCLTE.EUTRA_RRC_Definitions
     candidates: List[Dict[str, Any]] = []
     for cname in profile.get("candidate_names") or []:
@@ -1481,7 +2299,7 @@ def decode_rrc_event_payload(payload: bytes, event_name: str) -> Dict[str, Any]:
         candidates.append({
             "name": str(cname),
             "obj": obj,
-            "validator": lambda d: isinstance(d, dict),
+            "validator": lambda d: isinstance(d.root, dict),
         })
 
     if not candidates:
@@ -1494,11 +2312,8 @@ def decode_rrc_event_payload(payload: bytes, event_name: str) -> Dict[str, Any]:
 
     must_tokens = [str(t).lower() for t in (profile.get("must_tokens") or []) if str(t)]
 
-    def _score(decoded: Dict[str, Any], _name: str, _off: int) -> int:
-        try:
-            txt = json.dumps(decoded, ensure_ascii=True).lower()
-        except Exception:
-            txt = ""
+    def _score(decoded: _RrcKeyIndex, _name: str, _off: int) -> int:
+        txt = decoded.text()
         score = 0
         for tok in must_tokens:
             if tok in txt:
@@ -1509,7 +2324,7 @@ def decode_rrc_event_payload(payload: bytes, event_name: str) -> Dict[str, Any]:
             score += 10
         if _first_present(decoded, ["rrc-TransactionIdentifier", "rrc_TransactionIdentifier"]) is not None:
             score += 10
-        if _json_contains_any(decoded, ["spare7", "spare6", "spare5"]):
+        if _contains_any_token(decoded, ["spare7", "spare6", "spare5"]):
             score -= 20
         return score
 
@@ -1520,6 +2335,8 @@ def decode_rrc_event_payload(payload: bytes, event_name: str) -> Dict[str, Any]:
         score_fn=_score,
         min_score=25,
         stop_score=120,
+        profile=f"event:{profile.get('id')}",
+        must_key_tokens=tuple(must_tokens),
     )
     if not result.get("ok"):
         return result
@@ -5,7 +5,7 @@ import copy
 import datetime as dt
 import json
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 
 def _parse_iso_ms(value: Any) -> Optional[int]:
@@ -168,13 +168,23 @@ def _extract_json_obj(event: Dict[str, Any], param_id: str) -> Optional[Dict[str
         return None
 
 
-def _extract_decoded_root(event: Dict[str, Any], for_measurement_report: bool) -> Optional[Dict[str, Any]]:
+def _extract_decoded_root(
+    event: Dict[str, Any],
+    for_measurement_report: bool,
+    decoded_lookup: Optional[Callable[[Dict[str, Any]], Any]] = None,
+) -> Optional[Dict[str, Any]]:
     # Most direct forms first.
     for key in ("decoded", "decoded_json", "decoded_inferred"):
         root = event.get(key)
         if isinstance(root, dict):
             return root
 
+    # Decoded tree held outside the event (the importer's per-run RRC message table).
+    if decoded_lookup is not None:
+        root = decoded_lookup(event)
+        if isinstance(root, dict):
+            return root
+
     # Importer annotations fallback.
     param_key = "measurement_report_full_json" if for_measurement_report else "rrc_recfg_full_json"
     return _extract_json_obj(event, param_key)
@@ -274,19 +284,29 @@ class ConfigSnapshot:
 @dataclass
 class MeasurementReport:
     time_ms: int
-    time_iso: str
     meas_id: Optional[int]
     pcell_rsrp_idx: Optional[int]
     pcell_rsrq_idx: Optional[int]
     neighbors: List[Dict[str, Any]]
 
+    @property
+    def time_iso(self) -> str:
+        return _to_iso(self.time_ms) or ""
+
 
 class ServingNeighborsIndex:
     """
     Build incremental LTE serving+neighbors caches from decoded LTE RRC events.
+
+    decoded_lookup(event) may return the decoded tree of events that only reference it.
     """
 
-    def __init__(self, events: List[Dict[str, Any]]):
+    def __init__(
+        self,
+        events: List[Dict[str, Any]],
+        decoded_lookup: Optional[Callable[[Dict[str, Any]], Any]] = None,
+    ):
+        self._decoded_lookup = decoded_lookup
         self._warnings: List[str] = []
         self._config_snapshots: List[ConfigSnapshot] = []
         self._config_times: List[int] = []
@@ -308,7 +328,9 @@ class ServingNeighborsIndex:
         for ev in events:
             if not isinstance(ev, dict):
                 continue
-            t_ms = _parse_iso_ms(ev.get("time") or ev.get("timestamp") or ev.get("ts"))
+            t_ms = ev.get("t_ms")
+            if not isinstance(t_ms, int) or isinstance(t_ms, bool):
+                t_ms = _parse_iso_ms(ev.get("time") or ev.get("timestamp") or ev.get("ts"))
             if t_ms is None:
                 self._warn("Event skipped: invalid timestamp")
                 continue
@@ -327,7 +349,6 @@ class ServingNeighborsIndex:
             if hint.get("pci") is not None or hint.get("earfcn") is not None:
                 row = {
                     "time_ms": t_ms,
-                    "time": _to_iso(t_ms),
                     "rat": "LTE",
                     "pci": hint.get("pci"),
                     "earfcn": hint.get("earfcn"),
@@ -337,7 +358,7 @@ class ServingNeighborsIndex:
                 self._serving_times.append(t_ms)
 
             if _is_recfg_event(ev_name):
-                decoded = _extract_decoded_root(ev, for_measurement_report=False)
+                decoded = _extract_decoded_root(ev, for_measurement_report=False, decoded_lookup=self._decoded_lookup)
                 meas_cfg = self._extract_meas_config(decoded)
                 if meas_cfg is None:
                     meas_cfg = _extract_json_obj(ev, "rrc_recfg_meas_config_json")
@@ -356,7 +377,7 @@ class ServingNeighborsIndex:
                 self._config_times.append(t_ms)
 
             if _is_measurement_report_event(ev_name):
-                decoded = _extract_decoded_root(ev, for_measurement_report=True)
+                decoded = _extract_decoded_root(ev, for_measurement_report=True, decoded_lookup=self._decoded_lookup)
                 mr = self._parse_measurement_report(decoded, t_ms)
                 if mr is not None:
                     self._measurement_reports.append(mr)
@@ -674,7 +695,6 @@ class ServingNeighborsIndex:
 
         return MeasurementReport(
             time_ms=time_ms,
-            time_iso=_to_iso(time_ms) or "",
             meas_id=meas_id,
             pcell_rsrp_idx=p_rsrp,
             pcell_rsrq_idx=p_rsrq,
@@ -947,7 +967,7 @@ class ServingNeighborsIndex:
             serving["earfcn"] = sample.get("earfcn")
             serving["pci"] = sample.get("pci")
             serving["source"] = sample.get("source")
-            serving["time"] = sample.get("time")
+            serving["time"] = _to_iso(sample.get("time_ms"))
 
         # If no exact MR, still allow nearest MR for serving quality only.
         mr_for_serving: Optional[MeasurementReport] = exact_reports[0] if exact_reports else None
@@ -1065,5 +1085,8 @@ class ServingNeighborsIndex:
         }
 
 
-def build_serving_neighbors_index(events: List[Dict[str, Any]]) -> ServingNeighborsIndex:
-    return ServingNeighborsIndex(events)
+def build_serving_neighbors_index(
+    events: List[Dict[str, Any]],
+    decoded_lookup: Optional[Callable[[Dict[str, Any]], Any]] = None,
+) -> ServingNeighborsIndex:
+    return ServingNeighborsIndex(events, decoded_lookup)
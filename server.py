@@ -12,9 +12,12 @@ Routes consumed by the frontend:
 - GET  /api/runs/<id>/catalog     signal catalog (names)
 - GET  /api/runs/<id>/sidebar     sidebar groups
 - GET  /api/runs/<id>/signals     signal catalog (same as catalog.signals)
-- GET  /api/runs/<id>/timeseries?signal=<name>&max_points=<int>
+- GET  /api/runs/<id>/timeseries?signal=<name>&max_points=<int>[&from=<ISO|ms>&to=<ISO|ms>&width=<px>]
+- GET  /api/runs/<id>/kpi?name=<name>&max_points=<int>[&idx=<n>&from=&to=&width=]   (same, legacy row shape)
+- POST /api/runs/<id>/timeseries/batch   {"signals": [<name> | {"signal", "idx", "from", "to", "max_points", "width"}], ...defaults}
 - GET  /api/runs/<id>/track
 - GET  /api/runs/<id>/events
+- GET  /api/runs/<id>/events/<n>/decode   event n, PER-decoded on first access when deferred
 - GET  /api/runs/<id>/neighbors_at_time?time=<ISO>&tolMs=200&bucketMs=80
 - GET  /api/runs/<id>/l1l2/capabilities
 - GET  /api/runs/<id>/l1l2/at_time?time=<ISO>&windowMs=2000
@@ -36,6 +39,8 @@ from urllib.parse import urlparse, parse_qs
 
 from trp_importer import (
     import_trp_file,
+    fetch_import_job,
+    start_import_job,
     list_runs,
     fetch_run_detail,
     fetch_kpi_series,
@@ -46,17 +51,24 @@ from trp_importer import (
     fetch_run_sidebar,
     fetch_run_signals,
     fetch_timeseries_by_signal,
+    fetch_timeseries_batch,
     fetch_run_track,
     fetch_run_events,
+    fetch_event_decode,
 )
 from lte_rrc_per_decoder import (
     decode_measurement_report_payload,
     decode_rrc_event_payload,
     decode_rrc_reconfiguration_payload,
+    per_decode_cache_stats,
+    per_decoder_warmup_state,
+    start_per_decoder_warmup,
 )
 
 UPLOAD_DIR = os.environ.get("OPTIM_UPLOAD_DIR", "/tmp/optim_uploads")
-DB_PATH = None  # kept for backward compatibility; in-memory store ignores it
+# Imported runs are persisted here (SQLite, or the Turso replica when TURSO_DATABASE_URL is set)
+# and rehydrated on first access after a restart; OPTIM_TRP_PERSIST=0 keeps them in memory only.
+DB_PATH = os.environ.get("TRP_DB_PATH") or os.path.join(UPLOAD_DIR, "trp_runs.db")
 NMFS_CONFIG_PATH = os.environ.get("OPTIM_NMFS_CONFIG_PATH", os.path.join(UPLOAD_DIR, "nmfs_converter_config.json"))
 HO_ANALYSIS_STORE = {}
 HO_ANALYSIS_SEQ = 0
@@ -135,6 +147,147 @@ def _parse_multipart_file(body: bytes, content_type: str) -> tuple[str, bytes]:
     raise ValueError("No file part found")
 
 
+def _multipart_boundary(content_type: str) -> bytes:
+    for part in content_type.split(";"):
+        part = part.strip()
+        if part.startswith("boundary="):
+            value = part.split("=", 1)[1].strip()
+            if value.startswith('"') and value.endswith('"'):
+                value = value[1:-1]
+            if value:
+                return value.encode("utf-8")
+    raise ValueError("Missing multipart boundary")
+
+
+def _multipart_part_filename(head_txt: str) -> tuple[str, str]:
+    name = ""
+    fnm = None
+    for line in head_txt.split("\r\n"):
+        if not line.lower().startswith("content-disposition:"):
+            continue
+        for item in line.split(";")[1:]:
+            key, _, value = item.strip().partition("=")
+            value = value.strip()
+            if value.startswith('"') and '"' in value[1:]:
+                value = value.split('"', 2)[1]
+            if key.lower() == "name":
+                name = value
+            elif key.lower() == "filename":
+                fnm = value
+    return name, fnm
+
+
+def _stream_multipart_upload(handler: SimpleHTTPRequestHandler, content_type: str, out_dir: str, chunk_size: int = 1 << 20) -> dict:
+    """
+    Stream a multipart/form-data upload straight to disk, hashing the file part on the way.
+    Returns {"filename", "path", "sha256", "size", "fields"}; small non-file fields are collected in "fields".
+    The file is written to a private temp file and then renamed to <out_dir>/<sha256>.trp, so
+    concurrent uploads with the same filename never share a path; "filename" keeps the client's name.
+    """
+    delim = b"\r\n--" + _multipart_boundary(content_type)
+    try:
+        remaining = int(handler.headers.get("Content-Length") or 0)
+    except Exception:
+        remaining = 0
+
+    def _more() -> bytes:
+        nonlocal remaining
+        if remaining <= 0:
+            return b""
+        chunk = handler.rfile.read(min(chunk_size, remaining))
+        remaining -= len(chunk)
+        if not chunk:
+            remaining = 0
+        return chunk
+
+    # A leading CRLF lets the first boundary line match the same delimiter as the others.
+    buf = b"\r\n"
+    result = {"filename": None, "path": None, "sha256": None, "size": 0, "fields": {}}
+    part_path = None
+    state = "preamble"
+    out_fh = None
+    hasher = None
+    field_name = ""
+    field_buf = bytearray()
+    try:
+        while True:
+            if state in ("preamble", "body"):
+                pos = buf.find(delim)
+                if pos < 0:
+                    keep = len(delim) - 1
+                    if state == "body" and len(buf) > keep:
+                        data, buf = buf[:-keep], buf[-keep:]
+                        if out_fh is not None:
+                            out_fh.write(data)
+                            hasher.update(data)
+                            result["size"] += len(data)
+                        elif len(field_buf) < 65536:
+                            field_buf += data
+                    chunk = _more()
+                    if not chunk:
+                        raise ValueError("Truncated multipart body")
+                    buf += chunk
+                    continue
+                data, buf = buf[:pos], buf[pos + len(delim):]
+                if state == "body":
+                    if out_fh is not None:
+                        out_fh.write(data)
+                        hasher.update(data)
+                        result["size"] += len(data)
+                        out_fh.close()
+                        out_fh = None
+                        result["sha256"] = hasher.hexdigest()
+                    else:
+                        field_buf += data
+                        result["fields"][field_name] = bytes(field_buf[:65536]).decode("utf-8", errors="replace")
+                state = "after_delim"
+            elif state == "after_delim":
+                while len(buf) < 2:
+                    chunk = _more()
+                    if not chunk:
+                        break
+                    buf += chunk
+                if buf[:2] == b"--" or len(buf) < 2:
+                    break
+                buf = buf[2:]
+                state = "headers"
+            elif state == "headers":
+                pos = buf.find(b"\r\n\r\n")
+                if pos < 0:
+                    chunk = _more()
+                    if not chunk:
+                        raise ValueError("Truncated multipart headers")
+                    buf += chunk
+                    continue
+                head_txt = buf[:pos].decode("utf-8", errors="replace")
+                buf = buf[pos + 4:]
+                field_name, fnm = _multipart_part_filename(head_txt)
+                field_buf = bytearray()
+                if fnm is not None and part_path is None:
+                    result["filename"] = os.path.basename(fnm or "upload.trp") or "upload.trp"
+                    fd, part_path = tempfile.mkstemp(prefix="upload_", suffix=".part", dir=out_dir)
+                    out_fh = os.fdopen(fd, "wb")
+                    hasher = hashlib.sha256()
+                state = "body"
+    finally:
+        if out_fh is not None:
+            out_fh.close()
+            os.remove(part_path)
+            part_path = None
+        # Drain whatever is left so the connection stays usable.
+        while remaining > 0 and _more():
+            pass
+
+    if part_path is None or result["sha256"] is None:
+        if part_path is not None:
+            os.remove(part_path)
+        raise ValueError("No file part found")
+    # Identical content lands on the same name; the bytes are the same whichever upload wins.
+    result["path"] = os.path.join(out_dir, result["sha256"] + ".trp")
+    os.replace(part_path, result["path"])
+    return result
+
+
 def _parse_json_body(handler: SimpleHTTPRequestHandler) -> dict:
     raw = _read_body(handler)
     if not raw:
@@ -176,6 +329,14 @@ def _to_int(value):
     return int(round(number)) if number is not None else None
 
 
+def _series_range_args(qs: dict) -> tuple:
+    """from/to (ISO or epoch ms, passed through) and the chart width in pixels of a series query."""
+    t_from = (qs.get("from") or [None])[0] or None
+    t_to = (qs.get("to") or [None])[0] or None
+    width = _to_int((qs.get("width") or [None])[0])
+    return t_from, t_to, width if width is not None and width > 0 else None
+
+
 def _sanitize_lte_earfcn(value):
     number = _to_int(value)
     return number if number is not None and number >= 0 else None
@@ -692,11 +853,23 @@ class Handler(SimpleHTTPRequestHandler):
 
         try:
             # API routes
+            if path == "/api/ready":
+                # 503 while the RRC PER decoder (pycrate) is still loading in the background.
+                warmup = per_decoder_warmup_state()
+                _json(self, {"status": "success", "ready": warmup["ready"], "perDecoder": warmup},
+                      200 if warmup["ready"] else 503)
+                return
+
             if path == "/api/nmfs/config":
                 cfg = _get_nmfs_effective_config()
                 _json(self, {"status": "success", "config": cfg, "configPath": NMFS_CONFIG_PATH})
                 return
 
+            if path.startswith("/api/trp/jobs/"):
+                job = fetch_import_job(path[len("/api/trp/jobs/"):].strip("/"))
+                _json(self, job, 404 if job.get("status") == "error" and job.get("message") == "Job not found" else 200)
+                return
+
             if path.startswith("/api/ho-analysis/") or path.startswith("/api/interfreq-ho-analysis/"):
                 parts = path.strip("/").split("/")
                 if len(parts) < 3:
@@ -775,6 +948,15 @@ class Handler(SimpleHTTPRequestHandler):
                 if len(parts) == 4 and parts[3] == "events":
                     _json(self, fetch_run_events(DB_PATH, run_id))
                     return
+                if len(parts) == 6 and parts[3] == "events" and parts[5] == "decode":
+                    try:
+                        event_index = int(parts[4])
+                    except ValueError:
+                        _json(self, {"status": "error", "message": "Bad event index"}, 400)
+                        return
+                    out = fetch_event_decode(DB_PATH, run_id, event_index)
+                    _json(self, out, 200 if out.get("status") == "success" else 404)
+                    return
                 if len(parts) == 4 and parts[3] == "kpi":
                     qs = parse_qs(parsed.query or "")
                     name = (qs.get("name") or [""])[0]
@@ -788,7 +970,11 @@ class Handler(SimpleHTTPRequestHandler):
                         idx_i = int(idx_raw) if idx_raw not in (None, "") else None
                     except Exception:
                         idx_i = None
-                    _json(self, fetch_kpi_series(DB_PATH, run_id, name, max_points=max_points_i, idx=idx_i))
+                    t_from, t_to, width_i = _series_range_args(qs)
+                    out = fetch_kpi_series(
+                        DB_PATH, run_id, name, max_points=max_points_i, idx=idx_i, t_from=t_from, t_to=t_to, width=width_i,
+                    )
+                    _json(self, out, 400 if out.get("message") == "Bad time range" else 200)
                     return
                 if len(parts) == 4 and parts[3] == "neighbors_at_time":
                     qs = parse_qs(parsed.query or "")
@@ -831,7 +1017,11 @@ class Handler(SimpleHTTPRequestHandler):
                         idx_i = int(idx_raw) if idx_raw not in (None, "") else None
                     except Exception:
                         idx_i = None
-                    _json(self, fetch_timeseries_by_signal(DB_PATH, run_id, signal, max_points=max_points_i, idx=idx_i))
+                    t_from, t_to, width_i = _series_range_args(qs)
+                    out = fetch_timeseries_by_signal(
+                        DB_PATH, run_id, signal, max_points=max_points_i, idx=idx_i, t_from=t_from, t_to=t_to, width=width_i,
+                    )
+                    _json(self, out, 400 if out.get("message") == "Bad time range" else 200)
                     return
 
                 # Default: run detail
@@ -966,7 +1156,7 @@ class Handler(SimpleHTTPRequestHandler):
                         "payloadHex": payload_hex,
                         "decoded": decoded,
                     })
-                _json(self, {"status": "success", "items": decoded_items})
+                _json(self, {"status": "success", "items": decoded_items, "cache": per_decode_cache_stats()})
                 return
 
             if path == "/api/lte_rrc/precompute":
@@ -1010,6 +1200,7 @@ class Handler(SimpleHTTPRequestHandler):
                     "exactA3Reports": 0,
                     "errors": [],
                 }
+                cache0 = per_decode_cache_stats()
                 decoded_rows = []
                 for index, item in enumerate(items):
                     if not isinstance(item, dict):
@@ -1142,6 +1333,9 @@ class Handler(SimpleHTTPRequestHandler):
                     row["properties"]["measurement_report_a3_eval_summary"] = resolved["evaluationSummary"]
                     row["properties"]["measurement_report_a3_eval_json"] = json.dumps(resolved)
                     diagnostics["exactA3Reports"] += 1
+                cache1 = per_decode_cache_stats()
+                diagnostics["perCacheHits"] = (cache1["hits"] - cache0["hits"]) + (cache1["disk_hits"] - cache0["disk_hits"])
+                diagnostics["perCacheMisses"] = cache1["misses"] - cache0["misses"]
                 result_payload = {
                     "diagnostics": diagnostics,
                     "items": [
@@ -1180,19 +1374,55 @@ class Handler(SimpleHTTPRequestHandler):
                 })
                 return
 
+            parts = path.strip("/").split("/")
+            if len(parts) == 5 and parts[:2] == ["api", "runs"] and parts[3:] == ["timeseries", "batch"]:
+                try:
+                    run_id = int(parts[2])
+                except ValueError:
+                    _json(self, {"status": "error", "message": "Bad run id"}, 400)
+                    return
+                payload = _parse_json_body(self)
+                max_points = _to_int(payload.get("max_points"))
+                out = fetch_timeseries_batch(
+                    DB_PATH,
+                    run_id,
+                    payload.get("signals"),
+                    max_points=50000 if max_points is None else max_points,
+                    t_from=payload.get("from"),
+                    t_to=payload.get("to"),
+                    width=_to_int(payload.get("width")),
+                )
+                if out.get("status") == "success":
+                    _json(self, out)
+                else:
+                    _json(self, out, 404 if out.get("message") == "Run not found" else 400)
+                return
+
             if path == "/api/trp/import":
                 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
                 ctype = self.headers.get("Content-Type", "")
-                body = _read_body(self)
-
-                filename, data = _parse_multipart_file(body, ctype)
-
-                save_path = os.path.join(UPLOAD_DIR, os.path.basename(filename))
-                with open(save_path, "wb") as f:
-                    f.write(data)
+                # The file is hashed while it streams to disk; an identical upload decoded by the
+                # same decoder version returns the existing run unless force=1.
+                upload = _stream_multipart_upload(self, ctype, UPLOAD_DIR)
+                qs = parse_qs(parsed.query or "")
+                force_raw = (qs.get("force") or [upload["fields"].get("force") or ""])[0]
+                force = str(force_raw).strip().lower() in ("1", "true", "yes")
+                async_raw = (qs.get("async") or [upload["fields"].get("async") or ""])[0]
+
+                if str(async_raw).strip().lower() in ("1", "true", "yes"):
+                    # Decode on a background worker; poll GET /api/trp/jobs/<jobId> for progress.
+                    job = start_import_job(
+                        upload["path"], DB_PATH, UPLOAD_DIR, content_sha256=upload["sha256"], force=force,
+                        filename=upload["filename"],
+                    )
+                    _json(self, job, 202)
+                    return
 
-                result = import_trp_file(save_path, DB_PATH, UPLOAD_DIR)
+                result = import_trp_file(
+                    upload["path"], DB_PATH, UPLOAD_DIR, content_sha256=upload["sha256"], force=force,
+                    filename=upload["filename"],
+                )
                 # Backward-compatible keys for legacy tests/clients.
                 compat = {
                     "runId": result.get("runId"),
@@ -1217,6 +1447,9 @@ class Handler(SimpleHTTPRequestHandler):
 def main():
     port = int(os.environ.get("PORT", "8000"))
     httpd = HTTPServer(("0.0.0.0", port), Handler)
+    # The socket is listening now; load pycrate in the background so the first decode doesn't pay for it.
+    if os.environ.get("OPTIM_LTE_RRC_WARMUP", "1").strip().lower() not in ("0", "false", "no", "off"):
+        start_per_decoder_warmup()
     print(f"Starting server on port {port}...")
     print("Use Ctrl+C to stop.")
     try:
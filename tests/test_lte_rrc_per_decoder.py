@@ -1,23 +1,39 @@
+import copy
 import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
 import unittest
+import zipfile
+import zlib
+from unittest import mock
 
 import pycrate_asn1dir.RRCLTE as RRCLTE
 
+import lte_rrc_per_decoder
 from lte_rrc_per_decoder import (
+    PerDecodeCache,
     decode_measurement_report_payload,
     per_decoder_status,
     _extract_ue_capability_summary,
     _extract_tracking_area_code,
     _extract_rlf_ue_report_summary,
 )
+import trp_importer
+from lte_serving_neighbors import build_serving_neighbors_index
 from trp_importer import LTE_MR_METRIC_NAME, _decode_lte_rrc_payloads_in_place
+from trp_rrc_messages import RrcMessageTable
+from trp_run_store import load_run, save_run
+from trp_sample_store import SampleStore
 
 
-def _build_measurement_report_payload() -> bytes:
+def _build_measurement_report_payload(meas_id: int = 12) -> bytes:
     msg = RRCLTE.EUTRA_RRC_Definitions.MeasurementReport_r8_IEs
     value = {
         "measResults": {
-            "measId": 12,
+            "measId": meas_id,
             "measResultPCell": {
                 "rsrpResult": 50,
                 "rsrqResult": 20,
@@ -152,6 +168,533 @@ class LteRrcPerDecoderTests(unittest.TestCase):
         self.assertTrue(events[0].get("per_decoded"))
         self.assertEqual((events[0].get("measurement_report_summary") or {}).get("measId"), 12)
 
+    def test_deferred_mode_decodes_extra_messages_on_first_access(self):
+        if not per_decoder_status().get("available"):
+            self.skipTest("pycrate decoder unavailable")
+        release = RRCLTE.EUTRA_RRC_Definitions.DL_DCCH_Message
+        release.set_val({"message": ("c1", ("rrcConnectionRelease", {
+            "rrc-TransactionIdentifier": 1,
+            "criticalExtensions": ("c1", ("rrcConnectionRelease-r8", {"releaseCause": "other"})),
+        }))})
+        release_name = "Message.Layer3.Errc.DcchDl.RrcConnectionRelease"
+        rows = [
+            ("2025-12-04T11:22:37.679000Z", LTE_MR_METRIC_NAME, _build_measurement_report_payload()),
+            ("2025-12-04T11:22:38.100000Z", release_name, release.to_uper()),
+        ]
+        kpis = [{"time": t, "name": name, "value_num": None, "value_str": p.decode("latin1")} for t, name, p in rows]
+        events = [{"time": t, "event_name": name, "params": []} for t, name, _ in rows]
+
+        eager_kpis, eager_events = copy.deepcopy(kpis), copy.deepcopy(events)
+        _decode_lte_rrc_payloads_in_place(eager_kpis, eager_events)
+        self.assertTrue(eager_events[1].get("per_decoded"))
+
+        stats = _decode_lte_rrc_payloads_in_place(kpis, events, deferred=True)
+        self.assertEqual((stats["mode"], stats["rrc_extra_seen"], stats["rrc_extra_deferred"]), ("deferred", 1, 1))
+        self.assertEqual(stats["rrc_extra_decoded"], 0)
+        self.assertEqual(events[0], eager_events[0])
+        self.assertTrue(events[1].get("per_deferred"))
+        self.assertEqual(events[1].get("per_payload_hex"), rows[1][2].hex())
+        self.assertTrue(kpis[1].get("per_deferred"))
+
+        with mock.patch.dict(trp_importer._RUNS, {9001: {"run": {"id": 9001}, "events": events}}):
+            first = trp_importer.fetch_event_decode(None, 9001, 1)
+            self.assertEqual((first["status"], first["decodedNow"], first["perDecoded"]), ("success", True, True))
+            self.assertEqual(events[1], eager_events[1])
+            again = trp_importer.fetch_event_decode(None, 9001, 1)
+            self.assertFalse(again["decodedNow"])
+            self.assertEqual(again["event"], first["event"])
+            self.assertEqual(trp_importer.fetch_event_decode(None, 9001, 2)["status"], "error")
+
+    def test_deferred_events_reference_their_sample_and_keep_decodes_across_reloads(self):
+        if not per_decoder_status().get("available"):
+            self.skipTest("pycrate decoder unavailable")
+        release = RRCLTE.EUTRA_RRC_Definitions.DL_DCCH_Message
+        release.set_val({"message": ("c1", ("rrcConnectionRelease", {
+            "rrc-TransactionIdentifier": 2,
+            "criticalExtensions": ("c1", ("rrcConnectionRelease-r8", {"releaseCause": "other"})),
+        }))})
+        release_name = "Message.Layer3.Errc.DcchDl.RrcConnectionRelease"
+        t_ms = 1764847358100
+        store = SampleStore()
+        store.append(release_name, t_ms, value_str=release.to_uper().decode("latin1"))
+        events = [{"t_ms": t_ms, "event_name": release_name, "params": []}]
+        table = RrcMessageTable()
+        rows = trp_importer._materialize_per_rows(store)
+        _decode_lte_rrc_payloads_in_place(rows, events, deferred=True, messages=table)
+        self.assertEqual(events[0].get("per_sample_ref"), 0)
+        self.assertNotIn("per_payload_hex", events[0])
+
+        with tempfile.TemporaryDirectory() as td:
+            db_path = os.path.join(td, "runs.db")
+            entry = {"run": {"id": 9002, "metadata": {}}, "samples": store, "events": events, "rrc_messages": table}
+            save_run(db_path, 9002, entry)
+            with mock.patch.dict(trp_importer._RUNS, {9002: entry}):
+                first = trp_importer.fetch_event_decode(db_path, 9002, 0)
+            self.assertEqual((first["decodedNow"], first["perDecoded"]), (True, True))
+            self.assertNotIn("per_sample_ref", events[0])
+
+            # Another process rehydrates the run with the decode applied instead of decoding again.
+            with mock.patch.dict(trp_importer._RUNS, {}, clear=True), \
+                    mock.patch.dict(os.environ, {"OPTIM_TRP_SEGMENT_DIR": td}), \
+                    mock.patch.object(trp_importer, "_decode_per_payload", side_effect=AssertionError):
+                again = trp_importer.fetch_event_decode(db_path, 9002, 0)
+                trp_importer._RUNS[9002]["samples"].close()
+        self.assertFalse(again["decodedNow"])
+        self.assertEqual(again["event"], first["event"])
+
+    def test_message_table_holds_decodes_once_and_renders_them_for_the_api(self):
+        if not per_decoder_status().get("available"):
+            self.skipTest("pycrate decoder unavailable")
+        release = RRCLTE.EUTRA_RRC_Definitions.DL_DCCH_Message
+        release.set_val({"message": ("c1", ("rrcConnectionRelease", {
+            "rrc-TransactionIdentifier": 1,
+            "criticalExtensions": ("c1", ("rrcConnectionRelease-r8", {"releaseCause": "other"})),
+        }))})
+        release_name = "Message.Layer3.Errc.DcchDl.RrcConnectionRelease"
+        rows = [
+            ("2025-12-04T11:22:37.679000Z", LTE_MR_METRIC_NAME, _build_measurement_report_payload()),
+            ("2025-12-04T11:22:37.900000Z", LTE_MR_METRIC_NAME, _build_measurement_report_payload()),
+            ("2025-12-04T11:22:38.100000Z", release_name, release.to_uper()),
+            ("2025-12-04T11:22:38.300000Z", LTE_MR_METRIC_NAME, b"\xff"),
+        ]
+        kpis = [{"time": t, "name": name, "value_num": None, "value_str": p.decode("latin1")} for t, name, p in rows]
+        events = [{"time": t, "event_name": name, "params": []} for t, name, _ in rows]
+        inline_kpis, inline_events = copy.deepcopy(kpis), copy.deepcopy(events)
+        _decode_lte_rrc_payloads_in_place(inline_kpis, inline_events)
+
+        for compress in (False, True):
+            table_kpis, table_events = copy.deepcopy(kpis), copy.deepcopy(events)
+            table = RrcMessageTable(compress=compress)
+            stats = _decode_lte_rrc_payloads_in_place(table_kpis, table_events, messages=table)
+            self.assertEqual((stats["measurement_reports_decoded"], stats["rrc_extra_decoded"]), (2, 1))
+            self.assertEqual(table.memory_report()["messages"], 2)  # identical MRs share a record
+            self.assertEqual(table_events[0]["rrc_msg_id"], table_events[1]["rrc_msg_id"])
+            for item in table_kpis[:3] + table_events[:3]:
+                self.assertNotIn("decoded_json", item)
+                self.assertFalse([p for p in item.get("params") or [] if p["param_id"].endswith("_json")])
+            self.assertEqual(table_events[3], inline_events[3])  # failures stay inline
+
+            rendered = [trp_importer._event_for_api(ev, table) for ev in table_events]
+            for ev in rendered:
+                ev.pop("rrc_msg_id", None)
+                ev.pop("params_map", None)
+            expected = [{k: v for k, v in ev.items() if k != "params_map"} for ev in inline_events]
+            self.assertEqual(rendered, expected)
+            self.assertNotIn("decoded_json", table_events[0])
+
+            lookup = trp_importer._rrc_decoded_lookup(table)
+            idx = build_serving_neighbors_index(table_events, lookup)
+            self.assertEqual(len(idx._measurement_reports), 2)
+            self.assertEqual(len(build_serving_neighbors_index(inline_events)._measurement_reports), 2)
+
+        with tempfile.TemporaryDirectory() as td:
+            db_path = os.path.join(td, "runs.db")
+            entry = {"run": {"id": 7, "metadata": {}}, "samples": SampleStore(), "events": table_events, "rrc_messages": table}
+            save_run(db_path, 7, entry)
+            loaded = load_run(db_path, 7, compress_messages=True)
+        self.assertEqual(len(loaded["rrc_messages"]), 2)
+        self.assertEqual(
+            [trp_importer._event_for_api(ev, loaded["rrc_messages"]) for ev in loaded["events"]],
+            [trp_importer._event_for_api(ev, table) for ev in table_events],
+        )
+
+    def test_decode_cache_returns_fresh_copies_and_counts(self):
+        if not per_decoder_status().get("available"):
+            self.skipTest("pycrate decoder unavailable")
+        payload = _build_measurement_report_payload()
+        with mock.patch.object(lte_rrc_per_decoder, "PER_DECODE_CACHE", PerDecodeCache(capacity=8)) as cache:
+            first = decode_measurement_report_payload(payload)
+            first["summary"]["measId"] = -1
+            with mock.patch.object(lte_rrc_per_decoder, "_decode_measurement_report", side_effect=AssertionError):
+                second = decode_measurement_report_payload(payload)
+            self.assertEqual(second["summary"]["measId"], 12)
+            self.assertEqual(cache.stats(), {"hits": 1, "disk_hits": 0, "misses": 1, "entries": 1})
+
+            with mock.patch.object(lte_rrc_per_decoder, "PER_DECODER_VERSION", "next"):
+                decode_measurement_report_payload(payload)
+            self.assertEqual(cache.stats()["misses"], 2)
+
+    def test_decode_cache_persists_to_disk(self):
+        if not per_decoder_status().get("available"):
+            self.skipTest("pycrate decoder unavailable")
+        payload = _build_measurement_report_payload()
+        with tempfile.TemporaryDirectory() as td:
+            with mock.patch.object(lte_rrc_per_decoder, "PER_DECODE_CACHE", PerDecodeCache(cache_dir=td)):
+                expected = decode_measurement_report_payload(payload)
+            # A new process starts with an empty LRU but finds the result on disk.
+            with mock.patch.object(lte_rrc_per_decoder, "PER_DECODE_CACHE", PerDecodeCache(cache_dir=td)) as cache, \
+                    mock.patch.object(lte_rrc_per_decoder, "_decode_measurement_report", side_effect=AssertionError):
+                self.assertEqual(decode_measurement_report_payload(payload), expected)
+                self.assertEqual(cache.stats()["disk_hits"], 1)
+
+    def test_importer_reports_decode_cache_counters(self):
+        if not per_decoder_status().get("available"):
+            self.skipTest("pycrate decoder unavailable")
+        value_str = _build_measurement_report_payload().decode("latin1")
+        kpis = [
+            {"time": f"2025-12-04T11:22:3{i}.000Z", "name": LTE_MR_METRIC_NAME, "value_num": None, "value_str": value_str}
+            for i in range(3)
+        ]
+        with mock.patch.object(lte_rrc_per_decoder, "PER_DECODE_CACHE", PerDecodeCache()):
+            stats = _decode_lte_rrc_payloads_in_place(kpis, [])
+        self.assertEqual(stats.get("measurement_reports_decoded"), 3)
+        self.assertEqual(stats.get("cache_misses"), 1)
+        self.assertEqual(stats.get("cache_hits"), 2)
+        self.assertEqual(stats["decode_attempts"]["measurement_report"]["decodes"], 1)
+        self.assertTrue(all(k.get("per_decoded") for k in kpis))
+
+    def test_learned_winner_is_tried_first(self):
+        if not per_decoder_status().get("available"):
+            self.skipTest("pycrate decoder unavailable")
+        payload = _build_measurement_report_payload()
+        with mock.patch.object(lte_rrc_per_decoder, "PER_DECODE_CACHE", PerDecodeCache(capacity=0)), \
+                mock.patch.dict(lte_rrc_per_decoder._WINNER_HINTS, {}, clear=True), \
+                mock.patch.dict(lte_rrc_per_decoder._ATTEMPT_STATS, {}, clear=True):
+            first = decode_measurement_report_payload(payload)
+            full_calls = lte_rrc_per_decoder.per_decoder_attempt_stats()["measurement_report"]["from_uper_calls"]
+            self.assertGreater(full_calls, 1)
+            second = decode_measurement_report_payload(payload)
+            self.assertEqual(second, first)
+            stats = lte_rrc_per_decoder.per_decoder_attempt_stats()["measurement_report"]
+            self.assertEqual(stats["from_uper_calls"], full_calls + 1)
+            self.assertEqual((stats["hint_hits"], stats["full_searches"]), (1, 1))
+
+            # A payload the hint cannot decode falls back to the full search and re-learns.
+            shifted = decode_measurement_report_payload(b"\xff\xff" + payload)
+            self.assertTrue(shifted["ok"])
+            self.assertEqual(shifted["decode_offset"], first["decode_offset"] + 2)
+            self.assertEqual(shifted["summary"], first["summary"])
+            stats = lte_rrc_per_decoder.per_decoder_attempt_stats()["measurement_report"]
+            self.assertEqual((stats["hint_misses"], stats["full_searches"]), (1, 2))
+            self.assertEqual(lte_rrc_per_decoder._WINNER_HINTS["measurement_report"][1], first["decode_offset"] + 2)
+
+    def test_low_scoring_hint_does_not_shadow_a_better_decode(self):
+        class _Type:
+            def __init__(self, accepts):
+                self.accepts = accepts
+
+            def from_uper(self, segment):
+                if not self.accepts(segment):
+                    raise ValueError("no match")
+                self._val = {"first": segment[0]}
+
+            def get_val(self):
+                return self._val
+
+            def set_val(self, value):
+                self._val = value
+
+            def _to_jval(self):
+                return dict(self._val)
+
+        candidates = [
+            {"name": "Generic", "obj": _Type(lambda segment: True)},
+            {"name": "Specific", "obj": _Type(lambda segment: segment[0] == 2)},
+        ]
+
+        def _decode(payload):
+            return lte_rrc_per_decoder._decode_with_candidates(
+                payload, candidates,
+                score_fn=lambda _index, name, _off: 130 if name == "Specific" else 60,
+                min_score=25, stop_score=120, profile="hint_test",
+            )
+
+        with mock.patch.dict(lte_rrc_per_decoder._WINNER_HINTS, {}, clear=True), \
+                mock.patch.dict(lte_rrc_per_decoder._ATTEMPT_STATS, {}, clear=True):
+            self.assertEqual(_decode(b"\x01")["decoder_type"], "Generic")
+            # The learned Generic hint still decodes this payload, but only at 60.
+            self.assertEqual(_decode(b"\x02")["decoder_type"], "Specific")
+            self.assertEqual(_decode(b"\x02")["decoder_type"], "Specific")
+            stats = lte_rrc_per_decoder.per_decoder_attempt_stats()["hint_test"]
+            self.assertEqual((stats["hint_hits"], stats["full_searches"]), (1, 2))
+
+    def test_uper_prefix_prefilter_skips_impossible_offsets(self):
+        if not per_decoder_status().get("available"):
+            self.skipTest("pycrate decoder unavailable")
+        defs = RRCLTE.EUTRA_RRC_Definitions
+        spec = lte_rrc_per_decoder._uper_prefix_spec("UL_DCCH_Message", defs.UL_DCCH_Message, ("measResults",), ())
+        # message=c1 (1 bit), c1=measurementReport (index 1 of 16), criticalExtensions=c1, c1=measurementReport-r8.
+        self.assertTrue(lte_rrc_per_decoder._uper_prefix_ok(bytes([0b00001000, 0b00000000]), spec))
+        self.assertFalse(lte_rrc_per_decoder._uper_prefix_ok(bytes([0b00010000, 0b00000000]), spec))
+        self.assertFalse(lte_rrc_per_decoder._uper_prefix_ok(bytes([0b10001000, 0b00000000]), spec))
+
+        payload = _build_measurement_report_payload()
+        # The prefilter assumes decodes without a must_key fail validation, as they do here.
+        has_meas = lambda d: lte_rrc_per_decoder._find_first_key(d, "measResults") is not None  # noqa: E731
+        candidates = [
+            {"name": "MeasurementReport", "obj": defs.MeasurementReport, "validator": has_meas},
+            {"name": "UL_DCCH_Message", "obj": defs.UL_DCCH_Message, "validator": has_meas},
+        ]
+        for data in (payload, b"\x5a\xc3\x11" + payload, bytes(range(7, 40))):
+            plain = lte_rrc_per_decoder._decode_with_candidates(data, candidates, max_offset=8)
+            filtered = lte_rrc_per_decoder._decode_with_candidates(
+                data, candidates, max_offset=8, must_keys=("measResults",)
+            )
+            plain.pop("errors", None)
+            filtered.pop("errors", None)
+            self.assertEqual(filtered, plain)
+
+        with mock.patch.dict(lte_rrc_per_decoder._ATTEMPT_STATS, {}, clear=True):
+            lte_rrc_per_decoder._decode_with_candidates(
+                bytes(range(7, 40)), candidates, max_offset=8, must_keys=("measResults",), profile="t"
+            )
+            stats = lte_rrc_per_decoder.per_decoder_attempt_stats()["t"]
+        self.assertGreater(stats["prefix_skips"], 0)
+        self.assertEqual(stats["prefix_skips"] + stats["from_uper_calls"], 2 * 9)
+
+
+    def test_parallel_per_decode_matches_serial(self):
+        if not per_decoder_status().get("available"):
+            self.skipTest("pycrate decoder unavailable")
+        kpis = []
+        for i in range(40):
+            payload = _build_measurement_report_payload(meas_id=1 + i % 20)
+            if i % 3 == 0:
+                payload = b"\x00\x01" + payload
+            kpis.append({
+                "time": f"2025-12-04T11:22:{i:02d}.000Z",
+                "name": LTE_MR_METRIC_NAME,
+                "value_num": None,
+                "value_str": payload.decode("latin1"),
+            })
+        events = [
+            {"time": k["time"], "event_name": LTE_MR_METRIC_NAME, "metric_id": 5333, "params": []}
+            for k in kpis[::5]
+        ]
+
+        def _run(workers):
+            k, e = copy.deepcopy(kpis), copy.deepcopy(events)
+            with mock.patch.dict(os.environ, {"OPTIM_TRP_PER_WORKERS": str(workers)}), \
+                    mock.patch("trp_importer._PER_POOL_MIN_PAYLOADS", 8), \
+                    mock.patch.object(lte_rrc_per_decoder, "PER_DECODE_CACHE", PerDecodeCache()):
+                stats = _decode_lte_rrc_payloads_in_place(k, e)
+            return k, e, stats
+
+        serial_kpis, serial_events, serial_stats = _run(1)
+        pool_kpis, pool_events, pool_stats = _run(2)
+        self.assertEqual(serial_stats["workers"], 1)
+        self.assertEqual(pool_stats["workers"], 2)
+        self.assertEqual(pool_kpis, serial_kpis)
+        self.assertEqual(pool_events, serial_events)
+        self.assertEqual(pool_stats["measurement_reports_decoded"], 40)
+        self.assertEqual(pool_stats["cache_hits"] + pool_stats["cache_misses"], 40)
+        self.assertEqual(pool_stats["decode_attempts"]["measurement_report"]["decodes"], pool_stats["cache_misses"])
+
+    def test_import_job_decodes_alongside_api_requests(self):
+        if not per_decoder_status().get("available"):
+            self.skipTest("pycrate decoder unavailable")
+        release_name = "Message.Layer3.Errc.DcchDl.RrcConnectionRelease"
+        release = RRCLTE.EUTRA_RRC_Definitions.DL_DCCH_Message
+        payloads = []
+        for tid in range(4):
+            for cause in ("other", "loadBalancingTAUrequired"):
+                release.set_val({"message": ("c1", ("rrcConnectionRelease", {
+                    "rrc-TransactionIdentifier": tid,
+                    "criticalExtensions": ("c1", ("rrcConnectionRelease-r8", {"releaseCause": cause})),
+                }))})
+                payloads.append(release.to_uper())
+
+        def _decode(payload):
+            return lte_rrc_per_decoder.decode_rrc_event_payload(payload, release_name).get("decoded_json")
+
+        job_decodes = []
+        real_decode_per_payload = trp_importer._decode_per_payload
+
+        def _job_decode(name, payload):
+            dec = real_decode_per_payload(name, payload)
+            job_decodes.append((payload, dec.get("decoded_json")))
+            return dec
+
+        def _job_rows(_store):
+            return [
+                {"t_ms": 1764847358000 + i, "name": release_name, "value_num": None,
+                 "value_str": payloads[i % len(payloads)].decode("latin1")}
+                for i in range(400)
+            ]
+
+        # No cache: every decode on either thread goes through pycrate's shared objects.
+        with mock.patch.object(lte_rrc_per_decoder, "PER_DECODE_CACHE", PerDecodeCache(capacity=0)):
+            expected = {p: _decode(p) for p in payloads}
+            api_decodes = []
+            with tempfile.TemporaryDirectory() as td, \
+                    mock.patch.dict(trp_importer._RUNS, {}), \
+                    mock.patch.dict(trp_importer._RUNS_BY_DIGEST, {}, clear=True), \
+                    mock.patch.dict(os.environ, {"OPTIM_TRP_PER_WORKERS": "1", "OPTIM_TRP_DECODE_WORKERS": "1"}), \
+                    mock.patch.object(trp_importer, "_materialize_per_rows", _job_rows), \
+                    mock.patch.object(trp_importer, "_decode_per_payload", _job_decode):
+                trp_path = os.path.join(td, "data.trp")
+                with zipfile.ZipFile(trp_path, "w") as zf:
+                    for member in ("declarations", "lookuptables", "data"):
+                        zf.writestr(f"trp/providers/sp1/cdf/{member}.cdf", b"\x00" * 8 + zlib.compress(b""))
+                job = trp_importer.start_import_job(trp_path)
+                while job["state"] not in ("done", "error"):
+                    for p in payloads:
+                        api_decodes.append((p, _decode(p)))
+                    job = trp_importer.fetch_import_job(job["jobId"])
+        self.assertEqual(job["state"], "done")
+        self.assertEqual(len(job_decodes), 400)
+        self.assertTrue(api_decodes)
+        for payload, decoded_json in job_decodes + api_decodes:
+            self.assertEqual(decoded_json, expected[payload])
+
+
+    def test_candidates_are_scored_on_native_values(self):
+        if not per_decoder_status().get("available"):
+            self.skipTest("pycrate decoder unavailable")
+        # A CHOICE is an (alternative, value) tuple natively and {alternative: value} in JSON.
+        native = {"measResults": {"measResultNeighCells": ("measResultListEUTRA", [{"physCellId": 1}])}}
+        self.assertEqual(lte_rrc_per_decoder._find_first_key(native, "measResultListEUTRA"), [{"physCellId": 1}])
+        self.assertTrue(lte_rrc_per_decoder._contains_any_token(native, ["resultlisteutra"]))
+        self.assertTrue(lte_rrc_per_decoder._has_unknown_extension({"a": ("_ext_6", b"\x00")}))
+        self.assertTrue(lte_rrc_per_decoder._has_empty_nested_extension(
+            {"x": ("c1", {"nonCriticalExtension": {"nonCriticalExtension": {}}})}
+        ))
+
+        payload = _build_measurement_report_payload()
+        out = decode_measurement_report_payload(b"\x01\x02" + payload)
+        obj = getattr(RRCLTE.EUTRA_RRC_Definitions, out["decoder_type"])
+        obj.from_uper((b"\x01\x02" + payload)[out["decode_offset"]:])
+        self.assertEqual(out["decoded_json"], json.loads(obj.to_json()))
+        self.assertNotIn("decoded_value", out)
+
+
+    def test_key_index_matches_recursive_lookups(self):
+        rng = random.Random(16)
+        names = ["measId", "measResults", "cause", "rlf_Report_r9", "trackingAreaCode", "tac", "bandEUTRA", "x"]
+
+        def _tree(depth):
+            roll = rng.random()
+            if depth == 0 or roll < 0.2:
+                return rng.choice([None, 0, 7, "rlfCause", "spare5", {}])
+            if roll < 0.45:
+                return [_tree(depth - 1) for _ in range(rng.randint(0, 3))]
+            if roll < 0.6:
+                return (rng.choice(names), _tree(depth - 1))
+            return {rng.choice(names): _tree(depth - 1) for _ in range(rng.randint(1, 4))}
+
+        for _ in range(300):
+            tree = _tree(5)
+            index = lte_rrc_per_decoder._RrcKeyIndex(tree)
+            for key in names:
+                self.assertIs(lte_rrc_per_decoder._find_first_key(index, key),
+                              lte_rrc_per_decoder._find_first_key(tree, key))
+                self.assertEqual(lte_rrc_per_decoder._find_first_map_with_any_key(index, [key, "tac"]),
+                                 lte_rrc_per_decoder._find_first_map_with_any_key(tree, [key, "tac"]))
+            if "(" not in repr(tree):  # token lookups only ever see JSON trees (no CHOICE tuples)
+                for tok in ("rlf_report", "cause", "tac", "band"):
+                    self.assertIs(lte_rrc_per_decoder._find_first_value_by_key_token(index, tok),
+                                  lte_rrc_per_decoder._find_first_value_by_key_token(tree, tok))
+                    self.assertIs(lte_rrc_per_decoder._find_first_list_by_key_token(index, tok),
+                                  lte_rrc_per_decoder._find_first_list_by_key_token(tree, tok))
+
+
+    def test_pycrate_is_loaded_lazily_and_warmed_in_background(self):
+        script = "\n".join([
+            "import sys, time",
+            "import lte_rrc_per_decoder as d",
+            "assert 'pycrate_asn1dir.RRCLTE' not in sys.modules",
+            "assert d.per_decoder_warmup_state()['state'] == 'cold'",
+            "assert d.start_per_decoder_warmup()",
+            "assert not d.start_per_decoder_warmup()",
+            "while d.per_decoder_warmup_state()['state'] == 'warming':",
+            "    time.sleep(0.01)",
+            "state = d.per_decoder_warmup_state()",
+            "assert state['state'] == 'ready' and state['ready'] and state['loadMs'] is not None, state",
+            "assert d.decode_measurement_report_payload(bytes.fromhex(sys.argv[1]))['ok']",
+        ])
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        out = subprocess.run(
+            [sys.executable, "-c", script, _build_measurement_report_payload().hex()],
+            cwd=root, capture_output=True, text=True, timeout=120,
+        )
+        self.assertEqual(out.returncode, 0, out.stderr)
+
+
+    def test_measurement_report_fast_path_matches_pycrate(self):
+        if not per_decoder_status().get("available"):
+            self.skipTest("pycrate decoder unavailable")
+        defs = RRCLTE.EUTRA_RRC_Definitions
+        rng = random.Random(18)
+
+        def _rsrp():
+            return rng.randint(0, 97)
+
+        def _rsrq():
+            return rng.randint(0, 34)
+
+        def _meas_results():
+            meas = {"measId": rng.randint(1, 32), "measResultPCell": {"rsrpResult": _rsrp(), "rsrqResult": _rsrq()}}
+            roll = rng.random()
+            if roll < 0.6:
+                cells = []
+                for _ in range(rng.randint(1, 8)):
+                    result = {}
+                    if rng.random() < 0.9:
+                        result["rsrpResult"] = _rsrp()
+                    if rng.random() < 0.8:
+                        result["rsrqResult"] = _rsrq()
+                    if rng.random() < 0.05:  # extension in measResult: pycrate only
+                        result["rs-sinr-Result-r13"] = rng.randint(0, 127)
+                    cells.append({"physCellId": rng.randint(0, 503), "measResult": result})
+                meas["measResultNeighCells"] = ("measResultListEUTRA", cells)
+            elif roll < 0.7:  # other RAT: pycrate only
+                meas["measResultNeighCells"] = (
+                    "measResultListUTRA",
+                    [{"physCellId": ("fdd", rng.randint(0, 511)), "measResult": {"utra-RSCP": rng.randint(-5, 91)}}],
+                )
+            if rng.random() < 0.35:
+                rows = []
+                for _ in range(rng.randint(1, 5)):
+                    row = {"servFreqId-r10": rng.randint(0, 7)}
+                    if rng.random() < 0.7:
+                        row["measResultSCell-r10"] = {"rsrpResultSCell-r10": _rsrp(), "rsrqResultSCell-r10": _rsrq()}
+                    if rng.random() < 0.6:
+                        row["measResultBestNeighCell-r10"] = {
+                            "physCellId-r10": rng.randint(0, 503),
+                            "rsrpResultNCell-r10": _rsrp(),
+                            "rsrqResultNCell-r10": _rsrq(),
+                        }
+                    rows.append(row)
+                meas["measResultServFreqList-r10"] = rows
+                if rng.random() < 0.1:  # a later extension group: pycrate only
+                    meas["measId-v1250"] = rng.randint(33, 64)
+            return meas
+
+        corpus = []
+        for _ in range(150):
+            ies = {"measResults": _meas_results()}
+            if rng.random() < 0.05:
+                ies["nonCriticalExtension"] = {}
+            report = {"criticalExtensions": ("c1", ("measurementReport-r8", ies))}
+            obj, value = rng.choice([
+                (defs.MeasurementReport_r8_IEs, ies),
+                (defs.MeasurementReport, report),
+                (defs.UL_DCCH_Message, {"message": ("c1", ("measurementReport", report))}),
+            ])
+            obj.set_val(value)
+            prefix = bytes(rng.getrandbits(8) for _ in range(rng.choice([0, 0, 0, 1, 3])))
+            corpus.append(prefix + obj.to_uper())
+        corpus += [bytes(rng.getrandbits(8) for _ in range(rng.randint(2, 40))) for _ in range(40)]
+
+        def _decode_all():
+            out = []
+            with mock.patch.dict(lte_rrc_per_decoder._WINNER_HINTS, {}, clear=True):
+                for payload in corpus:
+                    row = lte_rrc_per_decoder._decode_measurement_report(payload)
+                    row.pop("errors", None)  # fast rejections name their own reason
+                    out.append(json.dumps(row))
+            return out
+
+        with mock.patch.object(lte_rrc_per_decoder, "_fast_uper_decode", lambda reader, segment: None):
+            reference = _decode_all()
+        with mock.patch.dict(lte_rrc_per_decoder._ATTEMPT_STATS, {}, clear=True):
+            fast = _decode_all()
+            stats = lte_rrc_per_decoder.per_decoder_attempt_stats()["measurement_report"]
+        self.assertEqual(fast, reference)
+        self.assertGreater(stats["fast_path_decodes"], 100)
+        self.assertGreater(sum('"ok": true' in row for row in fast), 140)
+
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,4 +1,5 @@
 import unittest
+from datetime import datetime
 
 from lte_serving_neighbors import build_serving_neighbors_index
 
@@ -198,6 +199,10 @@ def _mr_with_utra_list_at_root(time_iso: str):
     }
 
 
+def _iso_ms(time_iso: str) -> int:
+    return int(datetime.fromisoformat(time_iso.replace("Z", "+00:00")).timestamp() * 1000)
+
+
 class ServingNeighborsIndexTests(unittest.TestCase):
     def test_configured_neighbor_exists_when_mr_has_no_neighbor_list(self):
         events = [
@@ -257,6 +262,19 @@ class ServingNeighborsIndexTests(unittest.TestCase):
         self.assertEqual(n["rsrp_dbm"], -79.0)
         self.assertEqual(n["rsrq_db"], -9.0)
 
+    def test_events_with_integer_epoch_ms_only(self):
+        events = []
+        for ev in (_recfg_event("2025-12-04T11:30:32.810Z"), _mr_with_neighbors("2025-12-04T11:30:34.000Z")):
+            ev = dict(ev)
+            ev["t_ms"] = _iso_ms(ev.pop("time"))
+            events.append(ev)
+        idx = build_serving_neighbors_index(events)
+        self.assertEqual(idx.warnings, [])
+        out = idx.getServingNeighborsAt("2025-12-04T11:30:33.200Z", windowMs=2000)
+        n = out["neighbors_measured_nearest"][0]
+        self.assertEqual(n["measured_time"], "2025-12-04T11:30:34Z")
+        self.assertEqual(n["delta_ms"], 800)
+
     def test_merge_prefers_measured_over_configured_same_key(self):
         events = [
             _recfg_event("2025-12-04T11:30:32.810Z"),
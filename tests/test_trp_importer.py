@@ -1,3 +1,4 @@
+import hashlib
 import io
 import json
 import os
@@ -5,13 +6,17 @@ import shutil
 import socketserver
 import tempfile
 import threading
+import time
 import unittest
 import urllib.request
 import urllib.error
 import zipfile
 import zlib
+from unittest import mock
 
 import server
+import trp_importer
+from trp_sample_store import SampleStore
 from trp_importer import (
     safe_extract_zip,
     decompress_cdf_payload,
@@ -21,6 +26,14 @@ from trp_importer import (
     build_kpi_type_summary,
     _extract_sidebar_info,
     build_l1l2_scheduler_index,
+    import_trp_file,
+    fetch_timeseries_by_signal,
+    fetch_timeseries_batch,
+    fetch_kpi_series,
+    fetch_samples_in_window,
+    fetch_run_events,
+    fetch_run_catalog,
+    list_runs,
 )
 
 
@@ -39,7 +52,416 @@ def build_minimal_trp(path):
         )
 
 
+def _encode_varint(n: int) -> bytes:
+    out = bytearray()
+    while True:
+        b = n & 0x7F
+        n >>= 7
+        if n:
+            out.append(b | 0x80)
+        else:
+            out.append(b)
+            break
+    return bytes(out)
+
+
+def _field_varint(field_no, val):
+    return _encode_varint((field_no << 3) | 0) + _encode_varint(val)
+
+
+def _field_len(field_no, data: bytes):
+    return _encode_varint((field_no << 3) | 2) + _encode_varint(len(data)) + data
+
+
+def _field_float32(field_no, val):
+    import struct
+    return _encode_varint((field_no << 3) | 5) + struct.pack('<f', val)
+
+
+RSRP_METRIC = 'Radio.Lte.ServingCell[8].Rsrp'
+STATE_METRIC = 'Pocket.Call.State'
+
+
+def build_data_records(n=20, base_sec=1733530000):
+    # Each record: f1 timestamp {sec, nanos} + one metric sample per metric.
+    out = bytearray()
+    for i in range(n):
+        ts = _field_len(1, _field_varint(1, base_sec + i // 4) + _field_varint(2, (i % 4) * 250_000_000))
+        rsrp = _field_len(2, _field_varint(1, 1001) + _field_float32(3, -90.0 - i))
+        state = _field_len(2, _field_varint(1, 1002) + _field_len(4, b'CONNECTED' if i % 2 else b'IDLE'))
+        rec = ts + rsrp + state
+        out += _encode_varint(len(rec)) + rec
+    return bytes(out)
+
+
+def build_data_trp(path, n=20, providers=('sp1',)):
+    decl = (
+        _field_len(1, _field_len(1, RSRP_METRIC.encode()) + _field_varint(2, 1001)) +
+        _field_len(1, _field_len(1, STATE_METRIC.encode()) + _field_varint(2, 1002))
+    )
+    with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr('trp/providers/sp1/cdf/declarations.cdf', make_cdf_payload(decl))
+        zf.writestr('trp/providers/sp1/cdf/lookuptables.cdf', make_cdf_payload(b''))
+        for k, prov in enumerate(providers):
+            zf.writestr(f'trp/providers/{prov}/cdf/data.cdf', make_cdf_payload(build_data_records(n, 1733530000 + k)))
+
+
 class TrpImporterTests(unittest.TestCase):
+    def test_import_stores_samples_in_columnar_store(self):
+        with tempfile.TemporaryDirectory() as td:
+            trp_path = os.path.join(td, 'data.trp')
+            build_data_trp(trp_path, n=20)
+            out = import_trp_file(trp_path)
+            run_id = out['runId']
+            self.assertEqual(out['kpi_count'], 40)
+
+            entry = trp_importer._RUNS[run_id]
+            self.assertNotIn('kpi_samples', entry)
+            col = entry['samples'].get(RSRP_METRIC)
+            self.assertEqual(len(col), 20)
+            self.assertEqual(col.times[1] - col.times[0], 250)
+
+            meta = entry['run']['metadata']['sample_store']
+            self.assertEqual(meta['samples'], 40)
+            self.assertGreater(meta['bytes_per_sample'], 0)
+
+            series = fetch_timeseries_by_signal(None, run_id, RSRP_METRIC)['series']
+            self.assertEqual(len(series), 20)
+            self.assertEqual(series[0]['t'], '2024-12-07T00:06:40.000Z')
+            self.assertAlmostEqual(series[3]['value'], -93.0)
+
+            rows = fetch_samples_in_window(None, run_id, STATE_METRIC, '2024-12-07T00:06:40.500Z', 260)
+            self.assertEqual([r['value_str'] for r in rows], ['CONNECTED', 'IDLE', 'CONNECTED'])
+            self.assertEqual([r['t_ms'] for r in rows], [1733530000250, 1733530000500, 1733530000750])
+
+            signals = {s['signal_name']: s for s in entry['catalog']['signals']}
+            self.assertEqual(signals[RSRP_METRIC]['sample_count'], 20)
+
+            # Events keep integer epoch ms internally; ISO time is rendered at the API edge.
+            self.assertNotIn('time', entry['events'][0])
+            self.assertEqual(entry['events'][1]['t_ms'], 1733530000250)
+            api_events = fetch_run_events(None, run_id)['events']
+            self.assertEqual(api_events[1]['time'], '2024-12-07T00:06:40.250Z')
+
+    def test_timeseries_range_and_width_keep_extremes(self):
+        store = SampleStore()
+        base = 1733530000000
+        for i in range(10000):
+            value = -140.0 if i == 6543 else (-40.0 if i == 7001 else -90.0 - (i % 7))
+            store.append(RSRP_METRIC, base + i * 10, value)
+        # Raw-sample path only; the pyramid path is covered below.
+        entry = {'run': {'id': 77}, 'samples': SampleStore.merge([store]), 'events': [], 'series_pyramids': {RSRP_METRIC: None}}
+        with mock.patch.dict(trp_importer._RUNS, {77: entry}):
+            full = fetch_timeseries_by_signal(None, 77, RSRP_METRIC)
+            self.assertEqual(len(full['series']), 10000)
+            self.assertNotIn('reduction', full)
+
+            out = fetch_timeseries_by_signal(None, 77, RSRP_METRIC, width=100)
+            self.assertLessEqual(len(out['series']), 400)
+            self.assertEqual(out['reduction'], {'method': 'm4', 'buckets': 100, 'source_points': 10000})
+            values = [r['value'] for r in out['series']]
+            self.assertEqual((min(values), max(values)), (-140.0, -40.0))
+            self.assertEqual(out['series'][0]['t'], full['series'][0]['t'])
+            self.assertEqual(out['series'][-1]['t'], full['series'][-1]['t'])
+            self.assertEqual([r['t'] for r in out['series']], sorted(r['t'] for r in out['series']))
+
+            # Zooming in reduces only the requested range.
+            zoom = fetch_timeseries_by_signal(
+                None, 77, RSRP_METRIC, t_from='2024-12-07T00:07:45.000Z', t_to=str(base + 70000), width=50,
+            )
+            self.assertEqual(zoom['reduction']['source_points'], 501)
+            self.assertEqual(zoom['series'][0]['t'], '2024-12-07T00:07:45.000Z')
+            self.assertEqual(zoom['series'][-1]['t'], '2024-12-07T00:07:50.000Z')
+            zoom_values = [r['value'] for r in zoom['series']]
+            self.assertIn(-140.0, zoom_values)
+            self.assertNotIn(-40.0, zoom_values)  # one sample past `to`
+            self.assertEqual(zoom['range'], {'from': '2024-12-07T00:07:45.000Z', 'to': '2024-12-07T00:07:50.000Z'})
+
+            kpi = fetch_kpi_series(None, 77, RSRP_METRIC, max_points=1000)
+            self.assertLessEqual(len(kpi['series']), 1000)
+            self.assertEqual(kpi['reduction']['buckets'], 250)
+            self.assertIn(-140.0, [r['value_num'] for r in kpi['series']])
+            self.assertEqual(fetch_timeseries_by_signal(None, 77, RSRP_METRIC, t_from='yesterday')['status'], 'error')
+
+    def test_overview_is_drawn_from_the_series_pyramid(self):
+        store = SampleStore()
+        base = 1733530000000
+        for i in range(12000):  # 20 minutes at 10 Hz
+            value = -140.0 if i == 4321 else (-40.0 if i == 9876 else -90.0 - (i % 7))
+            store.append(RSRP_METRIC, base + i * 100, value)
+        entry = {'run': {'id': 78}, 'samples': SampleStore.merge([store]), 'events': []}
+        with mock.patch.dict(trp_importer._RUNS, {78: entry}):
+            out = fetch_timeseries_by_signal(None, 78, RSRP_METRIC, width=100)
+            self.assertEqual(out['reduction'], {'method': 'pyramid', 'level_ms': 10000, 'buckets': 100, 'source_points': 12000})
+            self.assertLessEqual(len(out['series']), 400)
+            values = [r['value'] for r in out['series']]
+            self.assertEqual((min(values), max(values)), (-140.0, -40.0))
+            self.assertEqual([r['t'] for r in out['series']], sorted(r['t'] for r in out['series']))
+
+            # A 5 minute zoom needs the finer 1 s buckets; points outside the range are dropped.
+            lo, hi = base + 300000, base + 600000
+            zoom = fetch_timeseries_by_signal(None, 78, RSRP_METRIC, t_from=str(lo), t_to=str(hi), width=100)
+            self.assertEqual(zoom['reduction']['level_ms'], 1000)
+            self.assertIn(-140.0, [r['value'] for r in zoom['series']])
+            self.assertTrue(all(
+                trp_importer._to_epoch_ms(r['t']) >= lo and trp_importer._to_epoch_ms(r['t']) <= hi for r in zoom['series']
+            ))
+
+            # Narrower than any level: fall back to M4 over the raw samples.
+            narrow = fetch_timeseries_by_signal(None, 78, RSRP_METRIC, t_from=str(lo), t_to=str(lo + 40000), width=50)
+            self.assertEqual(narrow['reduction']['method'], 'm4')
+        pyramid = entry['series_pyramids'][RSRP_METRIC]
+        self.assertEqual([level.bucket_ms for level in pyramid.levels], [1000, 10000, 60000, 600000])
+        self.assertEqual(sum(pyramid.levels[-1].counts), 12000)
+        expected = [-140.0 if i == 4321 else (-40.0 if i == 9876 else -90.0 - (i % 7)) for i in range(12000)]
+        for level in pyramid.levels:
+            self.assertAlmostEqual(sum(level.sums), sum(expected), places=6)
+        first = pyramid.levels[1]
+        self.assertAlmostEqual(first.avg(0), sum(expected[:100]) / 100)
+
+    def test_timeseries_batch_matches_single_signal_reads(self):
+        nb_metric = 'Radio.Lte.Neighbor[64].Rsrp'
+        store = SampleStore()
+        base = 1733530000000
+        for i in range(3000):
+            store.append(RSRP_METRIC, base + i * 10, -90.0 - (i % 7))
+            store.append(nb_metric, base + i * 10, -100.0 - (i % 3), idx=i % 3)
+        store.append(STATE_METRIC, base, None, 'IDLE', dtype='str')
+        entry = {'run': {'id': 79}, 'samples': SampleStore.merge([store]), 'events': []}
+        signals = [
+            RSRP_METRIC,
+            {'signal': nb_metric, 'idx': 1, 'to': str(base + 999)},
+            {'signal': nb_metric, 'idx': 2, 'to': str(base + 999), 'max_points': 10},
+            {'signal': STATE_METRIC},
+            {'signal': RSRP_METRIC, 'from': 'yesterday'},
+        ]
+        with mock.patch.dict(trp_importer._RUNS, {79: entry}):
+            with mock.patch('trp_importer._select_series', wraps=trp_importer._select_series) as select:
+                out = fetch_timeseries_batch(None, 79, signals, width=100)
+            # The two neighbor slots share one read of their column.
+            self.assertEqual(select.call_count, 3)
+            rsrp, nb1, nb2, state, bad = out['series']
+            single = fetch_timeseries_by_signal(None, 79, RSRP_METRIC, width=100)
+            self.assertEqual(rsrp['reduction'], single['reduction'])
+            self.assertEqual(rsrp['value'], [r['value'] for r in single['series']])
+            self.assertEqual(rsrp['t'][0], base)
+            self.assertEqual(rsrp['sample_idx'], [None] * len(rsrp['t']))
+
+            self.assertEqual(len(nb1['t']), 33)
+            self.assertEqual(set(nb1['value']), {-101.0})
+            self.assertNotIn('sample_idx', nb1)
+            self.assertEqual(nb1['range'], {'from': None, 'to': '2024-12-07T00:06:40.999Z'})
+            self.assertEqual(nb2['reduction'], {'method': 'm4', 'buckets': 2, 'source_points': 33})
+            self.assertEqual((state['value'], state['value_str']), ([None], ['IDLE']))
+            self.assertEqual(bad, {'signal': RSRP_METRIC, 'idx': None, 'status': 'error', 'message': 'Bad time range'})
+
+            httpd = socketserver.TCPServer(('127.0.0.1', 0), server.CustomHandler)
+            port = httpd.server_address[1]
+            threading.Thread(target=httpd.serve_forever, daemon=True).start()
+
+            def post(body, run_id='79'):
+                req = urllib.request.Request(
+                    f'http://127.0.0.1:{port}/api/runs/{run_id}/timeseries/batch',
+                    data=json.dumps(body).encode('utf-8'),
+                    headers={'Content-Type': 'application/json'},
+                    method='POST',
+                )
+                with urllib.request.urlopen(req, timeout=30) as resp:
+                    return json.loads(resp.read().decode('utf-8'))
+
+            try:
+                over_http = post({'signals': signals, 'width': 100})
+                self.assertEqual(over_http, json.loads(json.dumps(out)))
+                with self.assertRaises(urllib.error.HTTPError) as err:
+                    post({'signals': []})
+                self.assertEqual(err.exception.code, 400)
+                with self.assertRaises(urllib.error.HTTPError) as err:
+                    post({'signals': signals}, run_id='abc')
+                self.assertEqual(err.exception.code, 400)
+                with mock.patch.object(server, 'DB_PATH', None), self.assertRaises(urllib.error.HTTPError) as err:
+                    post({'signals': signals}, run_id='424242')
+                self.assertEqual(err.exception.code, 404)
+            finally:
+                httpd.shutdown()
+                httpd.server_close()
+
+    def test_neighbors_at_time_reads_the_precomputed_timeline(self):
+        store = SampleStore()
+        base = 1733530000000
+        for f, pcis in enumerate(([101, 102], [102, 103, 101], [104])):
+            t = base + f * 1000
+            for i, pci in enumerate(pcis):
+                store.append(trp_importer.LTE_NEIGHBOR_PCI_METRIC, t, float(pci), idx=i)
+                store.append(trp_importer.LTE_NEIGHBOR_RSRP_METRIC, t + 5, -90.0 - pci % 100 - f, idx=i)
+                store.append(trp_importer.LTE_NEIGHBOR_RSRQ_METRIC, t + 5, -11.0, idx=i)
+                store.append(trp_importer.LTE_NEIGHBOR_CINR_METRICS[0], t + 60, 3.0, idx=i)
+                store.append(trp_importer.LTE_NEIGHBOR_EARFCN_METRICS[0], t, 2600.0, idx=i)
+            store.append('Radio.Lte.ServingCell[8].Downlink.Earfcn', t, 1300.0)
+        entry = {'run': {'id': 80}, 'samples': SampleStore.merge([store]), 'events': []}
+        with mock.patch.dict(trp_importer._RUNS, {80: entry}):
+            out = trp_importer.build_neighbors_at_time(None, 80, trp_importer._epoch_ms_to_iso(base + 1000), tol_ms=50)
+            self.assertEqual([(n['pci'], n['rsrp'], n['earfcn'], n['pair_index']) for n in out['neighbors']], [
+                (101, -92.0, 1300, 2), (102, -93.0, 1300, 0), (103, -94.0, 1300, 1),
+            ])
+            # CINR samples 60 ms after the PCI bucket pair even when they fall past the query window.
+            self.assertEqual({n['cinr'] for n in out['neighbors']}, {3.0})
+            self.assertEqual(out['debug']['pciBuckets'], 1)
+            self.assertEqual(out['debug']['pairedRows'], 3)
+            self.assertEqual(out['debug']['cinrSamples'], 0)
+
+            # A wide window keeps the best row per PCI across frames; the timeline is built once.
+            with mock.patch('trp_importer.build_neighbor_timeline', side_effect=AssertionError('rebuilt')):
+                wide = trp_importer.build_neighbors_at_time(None, 80, trp_importer._epoch_ms_to_iso(base + 1000), tol_ms=1500)
+            self.assertEqual([(n['pci'], n['rsrp']) for n in wide['neighbors']], [
+                (101, -91.0), (102, -92.0), (103, -94.0), (104, -96.0),
+            ])
+            self.assertEqual(wide['debug']['pciBuckets'], 3)
+            empty = trp_importer.build_neighbors_at_time(None, 80, trp_importer._epoch_ms_to_iso(base + 10000))
+            self.assertEqual(empty['neighbors'], [])
+        self.assertEqual(list(entry['neighbor_timelines']), [80])
+
+        # bucketMs snaps to a fixed width; besides the default only the two most recent widths are kept.
+        with mock.patch.dict(trp_importer._RUNS, {80: entry}):
+            for bucket_ms, snapped in ((37, 40), (5000, 640), (150, 160), (41, 40)):
+                out = trp_importer.build_neighbors_at_time(None, 80, trp_importer._epoch_ms_to_iso(base), bucket_ms=bucket_ms)
+                self.assertEqual(out['bucketMs'], snapped)
+        self.assertEqual(list(entry['neighbor_timelines']), [80, 160, 40])
+
+    def test_parallel_provider_decode_matches_serial(self):
+        def snapshot(run_id):
+            entry = trp_importer._RUNS[run_id]
+            store = entry['samples']
+            cols = {
+                name: (list(col.times), [col.value_num(i) for i in range(len(col))],
+                       [store.value_str(col, i) for i in range(len(col))])
+                for name, col in store.items()
+            }
+            return cols, entry['run']['metadata']['cdf_decode']
+
+        with tempfile.TemporaryDirectory() as td:
+            trp_path = os.path.join(td, 'multi.trp')
+            build_data_trp(trp_path, n=12, providers=('sp1', 'sp2', 'sp3'))
+            with mock.patch.dict(os.environ, {'OPTIM_TRP_DECODE_WORKERS': '1'}):
+                serial, serial_stats = snapshot(import_trp_file(trp_path)['runId'])
+            with mock.patch.dict(os.environ, {'OPTIM_TRP_DECODE_WORKERS': '3'}):
+                parallel, parallel_stats = snapshot(import_trp_file(trp_path)['runId'])
+
+        self.assertEqual(serial_stats['workers'], 1)
+        self.assertEqual(parallel_stats['providers'], 3)
+        self.assertEqual(parallel_stats['workers'], 3)
+        self.assertEqual(parallel, serial)
+        times = serial[RSRP_METRIC][0]
+        self.assertEqual(len(times), 36)
+        self.assertEqual(times, sorted(times))
+
+    def test_single_member_is_decoded_in_record_range_chunks(self):
+        with tempfile.TemporaryDirectory() as td:
+            trp_path = os.path.join(td, 'single.trp')
+            build_data_trp(trp_path, n=40)
+            with mock.patch.dict(os.environ, {'OPTIM_TRP_DECODE_WORKERS': '1'}):
+                serial = trp_importer._RUNS[import_trp_file(trp_path)['runId']]
+            with mock.patch.dict(os.environ, {'OPTIM_TRP_DECODE_WORKERS': '2'}), \
+                    mock.patch('trp_importer._CDF_CHUNK_MIN_RECORDS', 8):
+                chunked = trp_importer._RUNS[import_trp_file(trp_path)['runId']]
+
+        self.assertEqual(chunked['run']['metadata']['cdf_decode']['chunks'], 5)
+        self.assertEqual(chunked['run']['metadata']['decoded_frames'], 40)
+        for name, col in serial['samples'].items():
+            other = chunked['samples'].get(name)
+            self.assertEqual(list(other.times), list(col.times))
+            self.assertEqual(list(other.str_codes or []), list(col.str_codes or []))
+        self.assertEqual(chunked['events'], serial['events'])
+
+    def test_provider_decode_honours_kpi_cap_across_members(self):
+        for workers in ('1', '2'):
+            with tempfile.TemporaryDirectory() as td:
+                trp_path = os.path.join(td, 'multi.trp')
+                build_data_trp(trp_path, n=12, providers=('sp1', 'sp2', 'sp3'))
+                env = {'OPTIM_TRP_DECODE_WORKERS': workers, 'OPTIM_TRP_MAX_KPI_ROWS': '30'}
+                with mock.patch.dict(os.environ, env), \
+                        mock.patch('trp_importer._CDF_CHUNK_MIN_RECORDS', 4):
+                    out = import_trp_file(trp_path)
+            self.assertEqual(out['kpi_count'], 30)
+            entry = trp_importer._RUNS[out['runId']]
+            self.assertEqual(len(entry['samples'].get(RSRP_METRIC)), 15)
+            self.assertEqual(entry['run']['metadata']['decoded_frames'], 15)
+
+    def test_long_runs_spill_to_segments_without_truncation(self):
+        with tempfile.TemporaryDirectory() as td:
+            trp_path = os.path.join(td, 'long.trp')
+            build_data_trp(trp_path, n=60, providers=('sp1', 'sp2'))
+            env = {'OPTIM_TRP_DECODE_WORKERS': '1', 'OPTIM_TRP_SEGMENT_DIR': os.path.join(td, 'segments')}
+            with mock.patch.dict(os.environ, env), \
+                    mock.patch('trp_sample_store.SEGMENT_ROWS', 16), \
+                    mock.patch('trp_raw_decoder.MAX_KPI_ROWS', 30), \
+                    mock.patch('trp_raw_decoder.MAX_EVENT_ROWS', 10):
+                out = import_trp_file(trp_path)
+            run_id = out['runId']
+            self.assertEqual(out['kpi_count'], 240)
+            self.assertEqual(out['event_count'], 120)
+            entry = trp_importer._RUNS[run_id]
+            report = entry['run']['metadata']['sample_store']
+            self.assertGreater(report['segments'], 0)
+            self.assertGreater(report['disk_bytes'], 0)
+
+            col = entry['samples'].get(RSRP_METRIC)
+            self.assertEqual(len(col), 120)
+            self.assertGreater(col.segment_count, 0)
+            times = list(col.times)
+            self.assertEqual(times, sorted(times))
+
+            series = fetch_timeseries_by_signal(None, run_id, RSRP_METRIC)['series']
+            self.assertEqual(len(series), 120)
+            rows = fetch_samples_in_window(None, run_id, STATE_METRIC, '2024-12-07T00:06:50.500Z', 100)
+            self.assertEqual([r['t_ms'] for r in rows], [1733530010500, 1733530010500])
+            self.assertEqual([r['value_str'] for r in rows], ['IDLE', 'IDLE'])
+
+    def test_stored_runs_are_rehydrated_lazily_after_restart(self):
+        with tempfile.TemporaryDirectory() as td:
+            db_path = os.path.join(td, 'store', 'runs.db')
+            trp_path = os.path.join(td, 'data.trp')
+            build_data_trp(trp_path, n=40, providers=('sp1', 'sp2'))
+            env = {'OPTIM_TRP_DECODE_WORKERS': '1', 'OPTIM_TRP_SEGMENT_DIR': os.path.join(td, 'segments')}
+            with mock.patch.dict(os.environ, env), mock.patch('trp_sample_store.SEGMENT_ROWS', 16):
+                out = import_trp_file(trp_path, db_path)
+                run_id = out['runId']
+                before = {
+                    'series': fetch_timeseries_by_signal(db_path, run_id, RSRP_METRIC),
+                    'window': fetch_samples_in_window(db_path, run_id, STATE_METRIC, '2024-12-07T00:06:45.500Z', 300),
+                    'events': fetch_run_events(db_path, run_id),
+                    'catalog': fetch_run_catalog(db_path, run_id),
+                }
+
+                # Simulate a server restart: nothing in memory, ids start over.
+                with mock.patch.dict(trp_importer._RUNS, {}, clear=True), mock.patch('trp_importer._NEXT_ID', 1):
+                    runs = list_runs(db_path)
+                    self.assertEqual([r['id'] for r in runs], [run_id])
+                    self.assertEqual(trp_importer._RUNS, {})
+
+                    self.assertEqual(fetch_timeseries_by_signal(db_path, run_id, RSRP_METRIC), before['series'])
+                    self.assertIn(run_id, trp_importer._RUNS)
+                    after_window = fetch_samples_in_window(db_path, run_id, STATE_METRIC, '2024-12-07T00:06:45.500Z', 300)
+                    self.assertEqual(after_window, before['window'])
+                    self.assertEqual(fetch_run_events(db_path, run_id), before['events'])
+                    self.assertEqual(fetch_run_catalog(db_path, run_id), before['catalog'])
+                    col = trp_importer._RUNS[run_id]['samples'].get(RSRP_METRIC)
+                    self.assertGreater(col.segment_count, 0)
+                    run_dir = os.path.join(trp_importer._segment_dir(), 'run_%d' % run_id)
+                    seg_files = sorted(os.listdir(run_dir))
+                    self.assertTrue(seg_files)
+
+                    # Loading the run again reuses its folder instead of adding another copy.
+                    with mock.patch.dict(trp_importer._RUNS, {}, clear=True):
+                        self.assertEqual(fetch_timeseries_by_signal(db_path, run_id, RSRP_METRIC), before['series'])
+                        self.assertEqual(sorted(os.listdir(run_dir)), seg_files)
+                        self.assertEqual([n for n in os.listdir(trp_importer._segment_dir()) if n.startswith('run_')],
+                                         ['run_%d' % run_id])
+
+                    second = import_trp_file(trp_path, db_path)
+                    self.assertEqual(second['runId'], run_id + 1)
+                    self.assertEqual([r['id'] for r in list_runs(db_path)], [run_id, run_id + 1])
+            self.assertEqual(fetch_run_catalog(None, 10 ** 6)['status'], 'error')
+
     def test_l1l2_scheduler_index_flags_non_per_tti_when_sampling_is_slow(self):
         kpis = [
             {"time": "2025-12-04T11:00:00.000Z", "name": "Radio.Lte.ServingCell[8].Pdsch.NumberOfResourceBlocks", "value_num": 8},
@@ -58,6 +480,32 @@ class TrpImporterTests(unittest.TestCase):
         self.assertTrue(any("~1 ms cadence" in str(x) for x in limitations))
         self.assertTrue(any("Layer1/Layer2 raw message payload" in str(x) for x in limitations))
 
+    def test_l1l2_scheduler_index_keeps_stats_and_reads_samples_from_the_store(self):
+        rb_metric = 'Radio.Lte.ServingCell[8].Pdsch.NumberOfResourceBlocks'
+        base = 1733530000000
+        store = SampleStore(segment_rows=1000)
+        for i in range(5000):  # 1 ms cadence, spilled to segments
+            store.append(rb_metric, base + i, float(i % 50) if i != 2500 else float('nan'))
+        store = SampleStore.merge([store])
+        idx = build_l1l2_scheduler_index(store, [])
+        rb = idx['fields']['allocated_rb_dl']
+        self.assertNotIn('samples', rb)
+        self.assertEqual(rb['metricNames'], [rb_metric])
+        self.assertEqual(rb['stats']['sampleCount'], 4999)
+        self.assertEqual(rb['stats']['intervalMs'], {'min': 1.0, 'p50': 1.0, 'p90': 1.0, 'max': 2.0})
+        self.assertTrue(rb['stats']['perTtiExact'])
+
+        entry = {'run': {'id': 79}, 'samples': store, 'events': [], 'l1l2_scheduler_index': idx}
+        with mock.patch.dict(trp_importer._RUNS, {79: entry}):
+            center = trp_importer._epoch_ms_to_iso(base + 2500)
+            out = trp_importer.fetch_l1l2_scheduler_at_time(None, 79, center, window_ms=10)
+            row = next(f for f in out['fields'] if f['field'] == 'allocated_rb_dl')
+            # The sample at the center is NaN: the earlier of the two 1 ms neighbours wins.
+            self.assertEqual((row['value'], row['delta_ms'], row['metric']), (float(2499 % 50), 1, rb_metric))
+            self.assertEqual(row['sampleCount'], 4999)
+            far = trp_importer.fetch_l1l2_scheduler_at_time(None, 79, trp_importer._epoch_ms_to_iso(base + 60000), window_ms=10)
+            self.assertIsNone(next(f for f in far['fields'] if f['field'] == 'allocated_rb_dl')['value'])
+
     def test_l1l2_scheduler_index_detects_payload_event_presence(self):
         events = [
             {"event_name": "Message.Layer2.LteMac.UlGrant"},
@@ -273,6 +721,169 @@ class TrpImporterTests(unittest.TestCase):
                 httpd.shutdown()
                 httpd.server_close()
 
+    def test_reupload_of_identical_trp_returns_cached_run(self):
+        with tempfile.TemporaryDirectory() as td:
+            upload_dir = os.path.join(td, 'uploads')
+            trp_path = os.path.join(td, 'data.trp')
+            build_data_trp(trp_path, n=8)
+            with open(trp_path, 'rb') as f:
+                file_bytes = f.read()
+            boundary = 'xYzBoundary'
+            payload = (
+                f'--{boundary}\r\nContent-Disposition: form-data; name="note"\r\n\r\nretry\r\n'
+                f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="data.trp"\r\n'
+                'Content-Type: application/octet-stream\r\n\r\n'
+            ).encode() + file_bytes + f'\r\n--{boundary}--\r\n'.encode()
+
+            httpd = socketserver.TCPServer(('127.0.0.1', 0), server.CustomHandler)
+            port = httpd.server_address[1]
+            t = threading.Thread(target=httpd.serve_forever, daemon=True)
+            t.start()
+
+            def upload(query=''):
+                req = urllib.request.Request(
+                    f'http://127.0.0.1:{port}/api/trp/import{query}',
+                    data=payload,
+                    headers={'Content-Type': f'multipart/form-data; boundary={boundary}'},
+                    method='POST',
+                )
+                with urllib.request.urlopen(req, timeout=30) as resp:
+                    return json.loads(resp.read().decode('utf-8'))
+
+            try:
+                with mock.patch.object(server, 'DB_PATH', os.path.join(td, 'runs.db')), \
+                        mock.patch.object(server, 'UPLOAD_DIR', upload_dir), \
+                        mock.patch.dict(trp_importer._RUNS_BY_DIGEST, {}, clear=True), \
+                        mock.patch.dict(os.environ, {'OPTIM_TRP_DECODE_WORKERS': '1'}):
+                    first = upload()
+                    # Uploads are stored under their digest, so same-named uploads never share a file.
+                    digest = hashlib.sha256(file_bytes).hexdigest()
+                    self.assertEqual(os.listdir(upload_dir), [digest + '.trp'])
+                    with open(os.path.join(upload_dir, digest + '.trp'), 'rb') as f:
+                        self.assertEqual(f.read(), file_bytes)
+                    with mock.patch('trp_importer._decode_cdf_providers', side_effect=AssertionError('decoded again')):
+                        second = upload()
+                    forced = upload('?force=1')
+            finally:
+                httpd.shutdown()
+                httpd.server_close()
+
+            self.assertFalse(first['cached'])
+            self.assertTrue(second['cached'])
+            self.assertEqual(second['runId'], first['runId'])
+            self.assertEqual(second['metricsCount'], first['metricsCount'])
+            self.assertFalse(forced['cached'])
+            self.assertNotEqual(forced['runId'], first['runId'])
+            self.assertEqual(trp_importer._RUNS[first['runId']]['run']['filename'], 'data.trp')
+            meta = trp_importer._RUNS[first['runId']]['run']['metadata']
+            self.assertEqual(meta['decoder_version'], trp_importer.DECODER_VERSION)
+            self.assertEqual(len(meta['source_sha256']), 64)
+
+    def test_import_reports_phase_progress(self):
+        with tempfile.TemporaryDirectory() as td:
+            trp_path = os.path.join(td, 'data.trp')
+            build_data_trp(trp_path, n=24, providers=('sp1', 'sp2'))
+            for workers in ('1', '2'):
+                calls = []
+
+                def progress(phase, done=None, total=None, unit=None):
+                    calls.append((phase, done, total, unit))
+
+                with mock.patch.dict(os.environ, {'OPTIM_TRP_DECODE_WORKERS': workers}), \
+                        mock.patch('trp_raw_decoder.PROGRESS_RECORDS', 5), \
+                        mock.patch('trp_importer._CDF_CHUNK_MIN_RECORDS', 6):
+                    import_trp_file(trp_path, progress=progress)
+                phases = []
+                for phase, _, _, _ in calls:
+                    if not phases or phases[-1] != phase:
+                        phases.append(phase)
+                self.assertEqual(phases, ['extract', 'cdf_decode', 'per_decode', 'index_build', 'track'])
+                decode = [(done, total) for phase, done, total, unit in calls if phase == 'cdf_decode' and done is not None]
+                self.assertEqual(decode[-1][0], 48)
+                self.assertEqual([d for d, _ in decode], sorted(d for d, _ in decode))
+                if workers == '2':
+                    self.assertTrue(all(total == 48 for _, total in decode))
+                else:
+                    # In-process decode reports inside each member too.
+                    self.assertIn(5, [d for d, _ in decode])
+
+    def test_async_upload_returns_job_and_reports_progress(self):
+        with tempfile.TemporaryDirectory() as td:
+            upload_dir = os.path.join(td, 'uploads')
+            trp_path = os.path.join(td, 'data.trp')
+            build_data_trp(trp_path, n=8)
+            with open(trp_path, 'rb') as f:
+                file_bytes = f.read()
+            boundary = 'jobBoundary'
+            payload = (
+                f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="data.trp"\r\n\r\n'
+            ).encode() + file_bytes + f'\r\n--{boundary}--\r\n'.encode()
+
+            httpd = socketserver.TCPServer(('127.0.0.1', 0), server.CustomHandler)
+            port = httpd.server_address[1]
+            t = threading.Thread(target=httpd.serve_forever, daemon=True)
+            t.start()
+            try:
+                with mock.patch.object(server, 'DB_PATH', None), \
+                        mock.patch.object(server, 'UPLOAD_DIR', upload_dir), \
+                        mock.patch.dict(trp_importer._RUNS_BY_DIGEST, {}, clear=True), \
+                        mock.patch.dict(os.environ, {'OPTIM_TRP_DECODE_WORKERS': '1'}):
+                    req = urllib.request.Request(
+                        f'http://127.0.0.1:{port}/api/trp/import?async=1',
+                        data=payload,
+                        headers={'Content-Type': f'multipart/form-data; boundary={boundary}'},
+                        method='POST',
+                    )
+                    with urllib.request.urlopen(req, timeout=30) as resp:
+                        self.assertEqual(resp.status, 202)
+                        job = json.loads(resp.read().decode('utf-8'))
+                    self.assertIn(job['state'], ('queued', 'running', 'done'))
+                    deadline = time.time() + 30
+                    while job['state'] not in ('done', 'error') and time.time() < deadline:
+                        time.sleep(0.05)
+                        with urllib.request.urlopen(f'http://127.0.0.1:{port}/api/trp/jobs/{job["jobId"]}', timeout=30) as resp:
+                            job = json.loads(resp.read().decode('utf-8'))
+                    with self.assertRaises(urllib.error.HTTPError) as missing:
+                        urllib.request.urlopen(f'http://127.0.0.1:{port}/api/trp/jobs/nope', timeout=30)
+                    self.assertEqual(missing.exception.code, 404)
+            finally:
+                httpd.shutdown()
+                httpd.server_close()
+
+            self.assertEqual(job['status'], 'success')
+            self.assertEqual(job['state'], 'done')
+            self.assertEqual(job['result']['kpi_count'], 16)
+            self.assertEqual(job['filename'], 'data.trp')
+            self.assertIn(job['runId'], trp_importer._RUNS)
+            self.assertEqual(
+                [p['phase'] for p in job['phases']],
+                ['extract', 'cdf_decode', 'per_decode', 'index_build', 'track'],
+            )
+
+    def test_streamed_multipart_upload_handles_boundaries_split_across_reads(self):
+        boundary = 'b0undary'
+        content = bytes(range(256)) * 40 + b'\r\n--b0undar'
+        body = (
+            f'preamble\r\n--{boundary}\r\nContent-Disposition: form-data; name="force"\r\n\r\n1\r\n'
+            f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="x.trp"\r\n\r\n'
+        ).encode() + content + f'\r\n--{boundary}--\r\n'.encode()
+
+        class _Handler:
+            def __init__(self):
+                self.rfile = io.BytesIO(body)
+                self.headers = {'Content-Length': str(len(body))}
+
+        with tempfile.TemporaryDirectory() as td:
+            for chunk_size in (1, 7, 64, 1 << 20):
+                up = server._stream_multipart_upload(_Handler(), f'multipart/form-data; boundary={boundary}', td, chunk_size)
+                with open(up['path'], 'rb') as f:
+                    self.assertEqual(f.read(), content)
+                self.assertEqual(up['filename'], 'x.trp')
+                self.assertEqual(up['size'], len(content))
+                self.assertEqual(up['sha256'], hashlib.sha256(content).hexdigest())
+                self.assertEqual(up['fields'], {'force': '1'})
+            self.assertEqual(os.listdir(td), [hashlib.sha256(content).hexdigest() + '.trp'])
+
 
 if __name__ == '__main__':
     unittest.main()
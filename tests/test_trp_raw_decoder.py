@@ -1,10 +1,27 @@
 import os
+import struct
 import tempfile
 import unittest
 import zipfile
 import zlib
 
-from trp_raw_decoder import decode_maybe_compressed, read_varint, decode_zigzag, decode_raw_trp_variant
+import io
+
+from trp_raw_decoder import (
+    decode_maybe_compressed,
+    read_varint,
+    decode_zigzag,
+    decode_raw_trp_variant,
+    decode_cdf_data_variant,
+    decode_cdf_data_from_zip,
+    iter_cdf_stream_chunks,
+    iter_len_prefixed_records,
+    iter_len_prefixed_records_stream,
+    index_len_prefixed_records,
+    iter_len_prefixed_records_range,
+    iter_fields,
+    iter_field_spans,
+)
 from trp_importer import safe_extract_zip
 
 
@@ -50,7 +67,82 @@ def _build_synthetic_raw_trp(path):
         zf.writestr('trp/positions/wptrack.xml', track_xml)
 
 
+def _build_cdf_trp(path, n=50):
+    decl = _field_len(1, _field_len(1, b"Radio.Lte.ServingCell[8].Rsrp") + _field_varint(2, 1001))
+    data = bytearray()
+    for i in range(n):
+        rec = _field_len(1, _field_varint(1, 1733530000 + i)) + _field_len(2, _field_varint(1, 1001) + _field_varint(3, 90 + i))
+        data += _encode_varint(len(rec)) + rec
+    with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr('trp/providers/sp1/cdf/declarations.cdf', b'\x00' * 8 + zlib.compress(decl))
+        zf.writestr('trp/providers/sp1/cdf/data.cdf', b'\x00' * 8 + zlib.compress(bytes(data)))
+    return {1001: {'name': 'Radio.Lte.ServingCell[8].Rsrp', 'dtype': 'unknown', 'lookup': None}}
+
+
 class TrpRawDecoderTests(unittest.TestCase):
+    def test_stream_records_match_in_memory_records_across_chunk_boundaries(self):
+        payload = bytearray()
+        for i in range(40):
+            rec = bytes([i % 251]) * (i * 7 + 1)
+            payload += _encode_varint(len(rec)) + rec
+        blob = b'\x00' * 8 + zlib.compress(bytes(payload))
+        chunks = iter_cdf_stream_chunks(io.BytesIO(blob), chunk_size=5)
+        streamed = list(iter_len_prefixed_records_stream(chunks))
+        self.assertEqual(streamed, list(iter_len_prefixed_records(bytes(payload))))
+        self.assertEqual(len(streamed), 40)
+
+    def test_field_spans_match_iter_fields(self):
+        inner = b'\x08\xe9\x07' + b'\x1a\x03abc'
+        msg = (
+            b'\x08\x96\x01'                      # field 1 varint 150
+            + b'\x11' + struct.pack('<d', 2.5)    # field 2 fixed64
+            + b'\x1a' + bytes([len(inner)]) + inner
+            + b'\x25' + struct.pack('<f', -1.0)   # field 4 fixed32
+            + b'\x2a\x05ab'                       # truncated length-delimited field
+        )
+        legacy = list(iter_fields(msg))
+        mv = memoryview(msg)
+        spans = [
+            (f, w, a if w == 0 else bytes(mv[a:b]))
+            for f, w, a, b in iter_field_spans(mv)
+        ]
+        self.assertEqual(spans, legacy)
+        self.assertEqual(len(spans), 4)
+        # Nested spans are scanned in place and stay bounded by the parent field.
+        _, _, a, b = list(iter_field_spans(mv))[2]
+        self.assertEqual(
+            [(f, w) for f, w, _, _ in iter_field_spans(mv, a, b)],
+            [(f, w) for f, w, _ in iter_fields(inner)],
+        )
+
+    def test_record_index_ranges_cover_every_record(self):
+        payload = bytearray()
+        for i in range(25):
+            rec = bytes([i + 1]) * (i * 13 + 1)
+            payload += _encode_varint(len(rec)) + rec
+        payload += b'\x05ab'  # truncated trailing record is not indexed
+        buf = bytes(payload)
+        offsets = index_len_prefixed_records(buf)
+        self.assertEqual(len(offsets), 26)
+        self.assertEqual(offsets[0], 0)
+        records = []
+        for start, end in ((offsets[0], offsets[10]), (offsets[10], offsets[25])):
+            records.extend(iter_len_prefixed_records_range(buf, start, end))
+        self.assertEqual(records, list(iter_len_prefixed_records(buf)))
+
+    def test_decode_cdf_data_from_zip_matches_extracted_decode(self):
+        with tempfile.TemporaryDirectory() as td:
+            trp_path = os.path.join(td, 'cdf.trp')
+            metric_map = _build_cdf_trp(trp_path)
+            out_dir = os.path.join(td, 'out')
+            safe_extract_zip(trp_path, out_dir)
+            expected = decode_cdf_data_variant(out_dir, metric_map, {})
+            with zipfile.ZipFile(trp_path) as zf:
+                streamed = decode_cdf_data_from_zip(zf, metric_map, {})
+            self.assertEqual(streamed['kpiSamples'], expected['kpiSamples'])
+            self.assertEqual(streamed['frames'], 50)
+            self.assertEqual(len(streamed['kpiSamples']), 50)
+
     def test_decode_maybe_compressed(self):
         plain = (b'abc' * 20)
         z = zlib.compress(plain)
@@ -0,0 +1,191 @@
+import math
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from trp_sample_store import SampleStore, process_spill_dir
+
+
+class SampleStoreTests(unittest.TestCase):
+    def test_append_keeps_typed_columns_per_metric(self):
+        store = SampleStore()
+        store.append('Radio.Lte.ServingCell[8].Rsrp', 1000, -95.0)
+        store.append('Radio.Lte.ServingCell[8].Rsrp', 2000, None)
+        store.append('Pocket.Call.State', 1500, None, 'CONNECTED', dtype='str')
+
+        self.assertEqual(len(store), 3)
+        rsrp = store.get('Radio.Lte.ServingCell[8].Rsrp')
+        self.assertEqual(list(rsrp.times), [1000, 2000])
+        self.assertEqual(rsrp.value_num(0), -95.0)
+        self.assertIsNone(rsrp.value_num(1))
+        self.assertTrue(math.isnan(rsrp.values[1]))
+        # Text and slot-index columns are only allocated when used.
+        self.assertIsNone(rsrp.str_codes)
+        self.assertIsNone(rsrp.idx)
+
+        state = store.get('Pocket.Call.State')
+        self.assertEqual(store.value_str(state, 0), 'CONNECTED')
+        self.assertEqual(state.dtype, 'str')
+
+    def test_strings_are_interned_and_columns_backfilled(self):
+        store = SampleStore()
+        store.append('M', 1, 1.0)
+        store.append('M', 2, None, 'A')
+        store.append('M', 3, None, 'A', idx=4)
+        col = store.get('M')
+        self.assertEqual(list(col.str_codes), [-1, 0, 0])
+        self.assertEqual(store.strings, ['A'])
+        self.assertEqual([col.sample_index(i) for i in range(3)], [None, None, 4])
+
+    def test_memory_report(self):
+        store = SampleStore()
+        for i in range(100):
+            store.append('M', i, float(i))
+        rep = store.memory_report()
+        self.assertEqual(rep['samples'], 100)
+        self.assertEqual(rep['metrics'], 1)
+        self.assertGreaterEqual(rep['bytes'], 100 * 16)
+        self.assertLess(rep['bytes_per_sample'], 100)
+        self.assertEqual(store.time_bounds(), (0, 99))
+
+    def test_merge_sorts_by_time_and_remaps_strings(self):
+        a = SampleStore()
+        a.append('M', 10, None, 'X')
+        a.append('M', 30, None, 'Y')
+        b = SampleStore()
+        b.append('M', 20, None, 'Y', idx=2)
+        b.append('M', 30, 5.0)
+        b.append('N', 5, 1.0)
+        merged = SampleStore.merge([a, b])
+        col = merged.get('M')
+        self.assertEqual(len(merged), 5)
+        self.assertEqual(list(col.times), [10, 20, 30, 30])
+        self.assertEqual([merged.value_str(col, i) for i in range(4)], ['X', 'Y', 'Y', None])
+        # Equal timestamps keep the order of the input stores.
+        self.assertEqual(col.value_num(3), 5.0)
+        self.assertEqual([col.sample_index(i) for i in range(4)], [None, 2, None, None])
+        self.assertEqual(list(merged.get('N').times), [5])
+
+    def test_spilled_segments_round_trip_and_window_reads(self):
+        with tempfile.TemporaryDirectory() as td:
+            store = SampleStore(spill_dir=td, segment_rows=10)
+            for i in range(35):
+                store.append('M', 1000 + i * 100, float(i), 'S%d' % (i % 3), idx=(i if i % 5 == 0 else None))
+            col = store.get('M')
+            self.assertEqual(len(col), 35)
+            self.assertEqual(col.segment_count, 3)
+            self.assertEqual(store.memory_report()['segments'], 3)
+            self.assertEqual(list(col.times), [1000 + i * 100 for i in range(35)])
+            self.assertEqual(col.value_num(12), 12.0)
+            self.assertEqual(store.value_str(col, 13), 'S1')
+            self.assertEqual(col.sample_index(15), 15)
+            self.assertIsNone(col.sample_index(16))
+            self.assertEqual(col.time_bounds(), (1000, 4400))
+            # Only the segment holding [2100, 2300] is read, plus the resident tail.
+            window = list(col.chunks(2100, 2300))
+            self.assertEqual([ch.base for ch in window], [10, 30])
+            store.close()
+            self.assertEqual(os.listdir(td), [])
+
+    def test_window_bisects_sorted_columns_and_filters_unsorted_ones(self):
+        def brute(col, lo, hi):
+            return [i for i, t in enumerate(col.times) if lo <= t <= hi]
+
+        def offsets(col, lo, hi):
+            return [ch.base + j for ch, j_lo, j_hi in col.window(lo, hi) for j in range(j_lo, j_hi)]
+
+        with tempfile.TemporaryDirectory() as td:
+            store = SampleStore(spill_dir=td, segment_rows=8)
+            for i in range(50):
+                store.append('M', 1000 + (i // 2) * 40, float(i))  # duplicate timestamps span segments
+            col = store.get('M')
+            self.assertGreater(col.segment_count, 0)
+            self.assertTrue(col.is_time_sorted())
+            for lo, hi in ((0, 999), (1000, 1000), (1030, 1200), (1280, 1400), (1950, 5000), (0, 10 ** 6), (1500, 1400)):
+                self.assertEqual(offsets(col, lo, hi), brute(col, lo, hi), (lo, hi))
+
+            store.append('M', 500, -1.0)
+            self.assertFalse(col.is_time_sorted())
+            self.assertEqual(offsets(col, 400, 1100), brute(col, 400, 1100))
+            merged = SampleStore.merge([store])
+            self.assertTrue(merged.get('M').time_sorted)
+            self.assertEqual(offsets(merged.get('M'), 400, 1100), list(range(7)))
+            merged.close()
+
+    def test_merge_of_spilled_overlapping_stores(self):
+        with tempfile.TemporaryDirectory() as td:
+            a = SampleStore(spill_dir=td, segment_rows=4)
+            b = SampleStore(spill_dir=td, segment_rows=4)
+            for i in range(10):
+                a.append('M', i * 10, float(i), 'A')
+                b.append('M', i * 10 + 5, float(100 + i), 'B' if i % 2 else None)
+            b.get('M').set_extra(3, {'per_decoded': True})
+            merged = SampleStore.merge([a, b], spill_dir=td, segment_rows=4)
+            col = merged.get('M')
+            self.assertEqual(len(merged), 20)
+            self.assertEqual(list(col.times), sorted([i * 10 for i in range(10)] + [i * 10 + 5 for i in range(10)]))
+            self.assertEqual(col.value_num(7), 103.0)
+            self.assertEqual(col.extra(7), {'per_decoded': True})
+            self.assertEqual([merged.value_str(col, i) for i in range(4)], ['A', None, 'A', 'B'])
+            self.assertGreater(col.segment_count, 0)
+            merged.close()
+
+    def test_spilled_column_is_sorted_out_of_core_without_leaving_files(self):
+        times = [(i * 7919) % 50 for i in range(50)]
+        with tempfile.TemporaryDirectory() as td:
+            spilled = SampleStore(spill_dir=td, segment_rows=8)
+            resident = SampleStore()
+            for k, t in enumerate(times):
+                for st in (spilled, resident):
+                    st.append('M', t, float(k), 'S%d' % (k % 4), idx=k % 3)
+            for st in (spilled, resident):
+                st.get('M').set_extra(5, {'per_decoded': True})
+                st.sort_column(st.get('M'))
+            a, b = spilled.get('M'), resident.get('M')
+            self.assertEqual(list(a.times), sorted(times))
+            self.assertEqual(list(a.values), list(b.values))
+            self.assertEqual([spilled.value_str(a, i) for i in range(50)], [resident.value_str(b, i) for i in range(50)])
+            self.assertEqual(list(a.idx), list(b.idx))
+            self.assertEqual(a.extras, b.extras)
+            self.assertEqual(len(spilled), 50)
+            self.assertTrue(a.is_time_sorted())
+            # Only the sorted column's segment file is left on disk.
+            (store_dir,) = os.listdir(td)
+            self.assertEqual(os.listdir(os.path.join(td, store_dir)), [os.path.basename(a._seg_path)])
+            spilled.close()
+
+    def test_process_spill_dir_sweeps_directories_of_finished_processes(self):
+        with tempfile.TemporaryDirectory() as td:
+            done = subprocess.Popen([sys.executable, '-c', 'pass'])
+            done.wait()
+            for name in ('proc_%d' % done.pid, 'proc_%d' % os.getppid(), 'samples_old', 'keep.db'):
+                path = os.path.join(td, name)
+                if name.endswith('.db'):
+                    open(path, 'w').close()
+                else:
+                    os.makedirs(path)
+            mine = process_spill_dir(td)
+            self.assertEqual(mine, os.path.join(td, 'proc_%d' % os.getpid()))
+            self.assertIs(process_spill_dir(td), mine)
+            self.assertEqual(sorted(os.listdir(td)), sorted(['proc_%d' % os.getppid(), 'proc_%d' % os.getpid(), 'keep.db']))
+
+    def test_string_slot_indexes_are_derived_once_per_string(self):
+        store = SampleStore()
+        calls = []
+
+        def slot(text):
+            calls.append(text)
+            return 3 if text == 'idx=3' else None
+
+        store.set_string_slot_fn(slot)
+        for i in range(4):
+            store.append('N', i, None, 'idx=3' if i % 2 else 'none')
+        col = store.get('N')
+        self.assertEqual([store.sample_index(col, i) for i in range(4)], [None, 3, None, 3])
+        self.assertEqual(calls, ['none', 'idx=3'])
+
+
+if __name__ == '__main__':
+    unittest.main()
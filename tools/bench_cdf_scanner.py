@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: bytes-slicing iter_fields vs zero-copy iter_field_spans.
+
+Builds a synthetic data.cdf record stream (timestamp submessage + N metric
+samples per record, mixing float32/float64/varint/string values) and times
+a full nested walk of every record with both scanners, then the end-to-end
+record decoder.
+
+Typical usage:
+  python tools/bench_cdf_scanner.py --records 200000 --samples 6
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import struct
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from trp_raw_decoder import (  # noqa: E402
+    _decode_cdf_records,
+    _new_cdf_decode_state,
+    iter_field_spans,
+    iter_fields,
+)
+
+
+def _varint(n: int) -> bytes:
+    out = bytearray()
+    while True:
+        b = n & 0x7F
+        n >>= 7
+        if n:
+            out.append(b | 0x80)
+        else:
+            out.append(b)
+            return bytes(out)
+
+
+def _field(field_no: int, wire: int, value) -> bytes:
+    key = _varint((field_no << 3) | wire)
+    if wire == 0:
+        return key + _varint(value)
+    if wire == 2:
+        return key + _varint(len(value)) + value
+    return key + value
+
+
+def build_records(count: int, samples: int, seed: int = 7):
+    rnd = random.Random(seed)
+    records = []
+    for i in range(count):
+        ts = _field(1, 0, 1733530000 + i // 4) + _field(2, 0, (i % 4) * 250_000_000)
+        rec = _field(1, 2, ts)
+        for k in range(samples):
+            kind = k % 4
+            if kind == 0:
+                val = _field(2, 5, struct.pack('<f', rnd.uniform(-120, -60)))
+            elif kind == 1:
+                val = _field(2, 1, struct.pack('<d', rnd.uniform(0, 1e6)))
+            elif kind == 2:
+                val = _field(2, 0, rnd.randint(0, 40))
+            else:
+                val = _field(3, 2, b'CONNECTED')
+            rec += _field(2, 2, _field(1, 0, 1001 + k) + val)
+        records.append(rec)
+    return records
+
+
+def walk_legacy(records) -> int:
+    n = 0
+    for rec in records:
+        for _, w, v in iter_fields(rec, max_fields=200):
+            if w == 2 and v:
+                for _ in iter_fields(v, max_fields=200):
+                    n += 1
+    return n
+
+
+def walk_spans(records) -> int:
+    n = 0
+    for rec in records:
+        mv = memoryview(rec)
+        for _, w, a, b in iter_field_spans(mv, max_fields=200):
+            if w == 2 and b > a:
+                for _ in iter_field_spans(mv, a, b, max_fields=200):
+                    n += 1
+    return n
+
+
+def _best_of(fn, arg, repeat: int):
+    best = None
+    out = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn(arg)
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    return best, out
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--records", type=int, default=100_000)
+    ap.add_argument("--samples", type=int, default=6, help="metric samples per record")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    records = build_records(args.records, args.samples)
+    print(f"records={len(records)} bytes={sum(len(r) for r in records)}")
+
+    t_old, n_old = _best_of(walk_legacy, records, args.repeat)
+    t_new, n_new = _best_of(walk_spans, records, args.repeat)
+    if n_old != n_new:
+        print(f"field count mismatch: legacy={n_old} spans={n_new}")
+        return 1
+    print(f"nested field walk  iter_fields={t_old:.3f}s  iter_field_spans={t_new:.3f}s  gain={t_old / t_new:.2f}x")
+
+    metric_map = {1001 + k: {"name": f"Bench.Metric{k}", "dtype": "float"} for k in range(args.samples)}
+
+    def _decode(recs):
+        state = _new_cdf_decode_state()
+        _decode_cdf_records(recs, metric_map, {}, state)
+        return state["kpi_count"]
+
+    t_dec, kpis = _best_of(_decode, records, args.repeat)
+    print(f"record decode      {t_dec:.3f}s  kpis={kpis}  ({len(records) / t_dec:,.0f} records/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
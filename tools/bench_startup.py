@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark: how long until the backend is importable, listening and warm.
+
+Each measurement runs in a fresh interpreter so module caches don't carry over:
+
+  * import   - `import server` (pycrate is no longer imported here)
+  * decode   - import lte_rrc_per_decoder + first MeasurementReport decode, which
+               pays the lazy pycrate load; compare with the import-only time
+  * server   - start server.py on a free port and time until the socket accepts
+               connections and until GET /api/ready reports the decoder warm
+
+Typical usage:
+  python tools/bench_startup.py --repeat 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# UPER MeasurementReport-r8-IEs: measId 12, PCell and two EUTRA neighbours.
+MR_PAYLOAD_HEX = "2b64a0241b507afed19c"
+
+_IMPORT_SNIPPET = "import time; t0 = time.perf_counter(); import server; print(time.perf_counter() - t0)"
+_DECODE_SNIPPET = (
+    "import time; t0 = time.perf_counter(); import lte_rrc_per_decoder as d; t1 = time.perf_counter(); "
+    f"out = d.decode_measurement_report_payload(bytes.fromhex('{MR_PAYLOAD_HEX}')); t2 = time.perf_counter(); "
+    "assert out['ok'], out; print(t1 - t0, t2 - t1)"
+)
+
+
+def _python(snippet: str) -> list:
+    out = subprocess.run([sys.executable, "-c", snippet], cwd=ROOT, check=True, capture_output=True, text=True)
+    return [float(x) for x in out.stdout.split()]
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _server_startup(timeout: float) -> tuple:
+    port = _free_port()
+    env = dict(os.environ, PORT=str(port), OPTIM_TRP_PERSIST="0")
+    t0 = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "server.py"], cwd=ROOT, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    listening = ready = None
+    try:
+        while time.perf_counter() - t0 < timeout:
+            if listening is None:
+                try:
+                    socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+                    listening = time.perf_counter() - t0
+                except OSError:
+                    time.sleep(0.005)
+                    continue
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/api/ready", timeout=2) as resp:
+                    if json.loads(resp.read()).get("ready"):
+                        ready = time.perf_counter() - t0
+                        break
+            except urllib.error.HTTPError:
+                pass
+            time.sleep(0.01)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+    return listening, ready
+
+
+def _fmt(values) -> str:
+    values = [v for v in values if v is not None]
+    if not values:
+        return "n/a"
+    return f"median {statistics.median(values) * 1000:8.1f} ms   min {min(values) * 1000:8.1f} ms"
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--timeout", type=float, default=60.0, help="seconds to wait for the server to get ready")
+    args = ap.parse_args()
+
+    imports, decoder_imports, first_decodes, listens, readies = [], [], [], [], []
+    for _ in range(max(1, args.repeat)):
+        imports.append(_python(_IMPORT_SNIPPET)[0])
+        imp, dec = _python(_DECODE_SNIPPET)
+        decoder_imports.append(imp)
+        first_decodes.append(dec)
+        listening, ready = _server_startup(args.timeout)
+        listens.append(listening)
+        readies.append(ready)
+
+    print(f"import server                    {_fmt(imports)}")
+    print(f"import lte_rrc_per_decoder       {_fmt(decoder_imports)}")
+    print(f"first decode (lazy pycrate load) {_fmt(first_decodes)}")
+    print(f"server.py socket listening       {_fmt(listens)}")
+    print(f"server.py /api/ready (warm)      {_fmt(readies)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -543,6 +543,41 @@
         if (el) el.textContent = text;
     }
 
+    const IMPORT_PHASE_LABELS = {
+        queued: 'Queued',
+        extract: 'Extracting',
+        cdf_decode: 'Decoding CDF',
+        per_decode: 'Decoding RRC',
+        index_build: 'Building indexes',
+        track: 'Reading track',
+        store: 'Saving run'
+    };
+
+    async function waitForImportJob(jobId) {
+        for (;;) {
+            const { res, payload } = await fetchJsonWithApiFallback('/api/trp/jobs/' + encodeURIComponent(jobId));
+            if (!res.ok || !payload) throw new Error((payload && payload.message) || ('HTTP ' + res.status));
+            if (payload.state === 'done') {
+                return { status: 'success', runId: payload.runId, ...(payload.result || {}) };
+            }
+            if (payload.state === 'error') {
+                return { status: 'error', message: payload.message || 'Import failed' };
+            }
+            const prog = payload.progress || {};
+            let text = 'TRP: ' + (IMPORT_PHASE_LABELS[payload.phase] || payload.phase || 'Importing');
+            if (Number.isFinite(Number(prog.done)) && Number(prog.total) > 0) {
+                const pct = Math.min(100, Math.round((Number(prog.done) / Number(prog.total)) * 100));
+                text += ' ' + pct + '%';
+                setUploadProgress(pct, pct + '%');
+            } else {
+                setUploadProgress(null, IMPORT_PHASE_LABELS[payload.phase] || 'Importing...');
+            }
+            if (Number.isFinite(Number(prog.eta_s)) && prog.eta_s !== null) text += ' (ETA ' + Math.ceil(Number(prog.eta_s)) + 's)';
+            setStatus(text);
+            await new Promise((resolve) => setTimeout(resolve, 500));
+        }
+    }
+
     async function uploadTrp(file) {
         await ensureApiReadyForUpload();
         resetUploadProgressState();
@@ -555,7 +590,7 @@
         let response;
         let payload;
         try {
-            const out = await postFormWithProgress('/api/trp/import', form, (p) => {
+            const out = await postFormWithProgress('/api/trp/import?async=1', form, (p) => {
                 if (Number.isFinite(Number(p))) {
                     uploadProgressState.hasComputableProgress = true;
                     stopUploadProgressTicker();
@@ -583,6 +618,20 @@
             return;
         }
 
+        if (response.ok && payload.jobId && !payload.runId) {
+            // Async import: the server decodes in the background, poll the job for progress.
+            stopUploadProgressTicker();
+            try {
+                payload = await waitForImportJob(payload.jobId);
+                response = { ok: payload.status === 'success', status: 200 };
+            } catch (err) {
+                hideUploadProgress();
+                setStatus('TRP: import failed');
+                alert('Import failed: ' + (err && err.message ? err.message : err));
+                return;
+            }
+        }
+
         if (!response.ok || payload.status !== 'success') {
             hideUploadProgress();
             setStatus('TRP: import failed');
@@ -12,36 +12,73 @@ TRP importer & in-memory run store.
     * fetch_timeseries_by_signal(db_path, run_id, signal, max_points=50000) -> {"status":"success","series":[...]}
     * fetch_run_track(db_path, run_id) -> {"status":"success","track":[...]}
     * fetch_run_events(db_path, run_id) -> {"status":"success","events":[...]}
-    * fetch_neighbors_at_time(db_path, run_id, center_iso, tol_ms=200, bucket_ms=80)
+    * fetch_neighbors_at_time(db_path, run_id, center_iso, tol_ms=200, bucket_ms=80)  (from the run's NeighborTimeline)
+
+Decoded KPI samples are kept per run in a columnar trp_sample_store.SampleStore
+(entry["samples"]) rather than a list of dicts.
+
+When persistence is enabled (a db_path, or OPTIM_TRP_PERSIST=1) every imported run
+is also written to trp_run_store; list_runs reads the stored run list and the
+fetch_* functions rehydrate a stored run into _RUNS on first access.
 """
 
 from __future__ import annotations
 
 import os
+import bisect
+import heapq
 import json
-import time
+import mmap
 import tempfile
+import threading
+import time
 import zipfile
 import re
 import zlib
+import multiprocessing
+from array import array
+from functools import partial
+from itertools import compress, repeat
+from operator import itemgetter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional, Tuple
+from collections import Counter
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 # Decoder pipeline (patched)
 from trp_raw_decoder import (
     parse_declarations_cdf,
     parse_lookup_tables_cdf,
-    decode_cdf_data_variant,
+    decode_cdf_member,
+    decode_cdf_record_range,
+    index_len_prefixed_records,
+    inflate_cdf_member_to_file,
+    list_cdf_data_members,
     parse_track_xml,
+    read_cdf_member,
 )
 from lte_rrc_per_decoder import (
     decode_measurement_report_payload,
     decode_rrc_reconfiguration_payload,
     decode_rrc_event_payload,
+    per_decode_cache_stats,
+    per_decoder_attempt_stats,
     per_decoder_status,
 )
 from lte_serving_neighbors import build_serving_neighbors_index
+from trp_rrc_messages import RrcMessageTable
+from trp_sample_store import MetricColumns, SampleStore, process_spill_dir
+from trp_series_pyramid import SeriesPyramid, build_series_pyramid, pyramid_memory_report
+from trp_run_store import (
+    find_run_by_digest,
+    list_stored_runs,
+    load_run,
+    max_stored_run_id,
+    persist_enabled,
+    save_event_decode,
+    save_run,
+)
 
 # ----------------------------
 # In-memory store
@@ -49,12 +86,24 @@ from lte_serving_neighbors import build_serving_neighbors_index
 
 _RUNS: Dict[int, Dict[str, Any]] = {}
 _NEXT_ID: int = 1
+_RUNS_LOCK = threading.Lock()
+# (source sha256, DECODER_VERSION) -> run id, for runs imported in this process.
+_RUNS_BY_DIGEST: Dict[Tuple[str, str], int] = {}
+
+# Bump whenever decoding changes what a run contains, so the import cache
+# (see import_trp_file content_sha256) does not return runs decoded by an older pipeline.
+DECODER_VERSION = "8"
 
 LTE_NEIGHBOR_PCI_METRIC = "Radio.Lte.Neighbor[64].Pci"
 LTE_NEIGHBOR_RSRP_METRIC = "Radio.Lte.Neighbor[64].Rsrp"
 LTE_NEIGHBOR_RSRQ_METRIC = "Radio.Lte.Neighbor[64].Rsrq"
 LTE_NEIGHBOR_CINR_METRICS = ["Radio.Lte.Neighbor[64].Cinr", "Radio.Lte.Neighbor[64].Sinr"]
 LTE_NEIGHBOR_EARFCN_METRICS = ["Radio.Lte.Neighbor[64].Earfcn", "Radio.Lte.Neighbor[64].Frequency"]
+# neighbors_at_time bucketMs is snapped to one of these widths, each a full-run NeighborTimeline.
+NEIGHBOR_TIMELINE_BUCKETS_MS = (20, 40, 80, 160, 320, 640)
+NEIGHBOR_TIMELINE_DEFAULT_MS = 80
+# Timelines kept per run besides the default one (least recently used are dropped).
+NEIGHBOR_TIMELINE_LRU = 2
 LTE_MR_METRIC_NAME = "Message.Layer3.Errc.DcchUl.MeasurementReport"
 LTE_RECFG_METRIC_NAME = "Message.Layer3.Errc.DcchDl.RrcConnectionReconfiguration"
 LTE_RRC_EXTRA_PER_EVENT_PREFIX: Dict[str, str] = {
@@ -75,6 +124,9 @@ LTE_RRC_EXTRA_PER_EVENT_PREFIX: Dict[str, str] = {
     "Message.Layer3.Errc.CcchDl.RrcConnectionReestablishmentReject": "rrc_reest_reject",
 }
 LTE_RRC_EXTRA_PER_METRIC_NAMES = set(LTE_RRC_EXTRA_PER_EVENT_PREFIX.keys())
+# Extra RRC messages the import-time indexes read (sidebar UE capability, SIB1 TAC). In the
+# deferred PER mode only these are decoded during import, the others on first access.
+LTE_RRC_EAGER_PER_PREFIXES = frozenset(("sib1", "ue_cap_info"))
 
 L1L2_SCHEDULER_FIELD_SPECS: Dict[str, Dict[str, Any]] = {
     "allocated_rb_dl": {
@@ -364,9 +416,25 @@ def _epoch_ms_to_iso(ms: Any) -> Optional[str]:
 def _sample_time_ms(sample: Dict[str, Any]) -> Optional[int]:
     if not isinstance(sample, dict):
         return None
+    t_ms = sample.get("t_ms")
+    if isinstance(t_ms, int) and not isinstance(t_ms, bool):
+        return t_ms
     return _to_epoch_ms(sample.get("time") or sample.get("t") or sample.get("timestamp"))
 
 
+def _event_for_api(event: Dict[str, Any], messages: Optional[RrcMessageTable] = None) -> Dict[str, Any]:
+    """
+    Events are kept with integer t_ms only and decoded RRC messages by rrc_msg_id; the ISO
+    "time" and the message fields/params are rendered when they are serialized.
+    """
+    event = _with_rrc_message(event, messages)
+    if not isinstance(event, dict) or event.get("time") or not isinstance(event.get("t_ms"), int):
+        return event
+    out = dict(event)
+    out["time"] = _epoch_ms_to_iso(event["t_ms"])
+    return out
+
+
 def _sample_payload_bytes(sample: Dict[str, Any]) -> Optional[bytes]:
     if not isinstance(sample, dict):
         return None
@@ -504,21 +572,22 @@ def _build_ca_capability_label(max_num_carriers: Optional[int], band_combos: Lis
     return None
 
 
-def _extract_sidebar_info(kpi_samples: List[Dict[str, Any]], events: List[Dict[str, Any]]) -> Dict[str, Any]:
+def _extract_sidebar_info(
+    kpi_samples: Any, events: List[Dict[str, Any]], messages: Optional[RrcMessageTable] = None,
+) -> Dict[str, Any]:
     info: Dict[str, Any] = {}
+    store = _as_sample_store(kpi_samples)
 
-    by_name: Dict[str, List[Dict[str, Any]]] = {}
-    for s in kpi_samples or []:
-        nm = str((s or {}).get("name") or "").strip()
-        if not nm:
-            continue
-        by_name.setdefault(nm, []).append(s)
+    def _numeric_values(metric_name: str) -> List[float]:
+        col = store.get(metric_name)
+        if col is None:
+            return []
+        return [v for chunk in col.chunks() for v in chunk.values if v == v]
 
     def _most_common_int(metric_name: str) -> Optional[int]:
-        rows = by_name.get(metric_name) or []
         freq: Dict[int, int] = {}
-        for r in rows:
-            v = _safe_int((r or {}).get("value_num"))
+        for raw in _numeric_values(metric_name):
+            v = _safe_int(raw)
             if v is None:
                 continue
             freq[v] = int(freq.get(v) or 0) + 1
@@ -534,6 +603,7 @@ def _extract_sidebar_info(kpi_samples: List[Dict[str, Any]], events: List[Dict[s
         ev_name = str((ev or {}).get("event_name") or "").lower()
         if "uecapabilityinformation" not in ev_name:
             continue
+        ev = _with_rrc_message(ev, messages)
 
         raw_summary = (
             _event_param_value_ci(ev, "ue_cap_info_summary")
@@ -582,7 +652,7 @@ def _extract_sidebar_info(kpi_samples: List[Dict[str, Any]], events: List[Dict[s
         if score <= 0:
             continue
 
-        t_ms = _to_epoch_ms((ev or {}).get("time"))
+        t_ms = _sample_time_ms(ev or {})
         t_ord = int(t_ms) if isinstance(t_ms, int) else -1
         if score > best_score or (score == best_score and t_ord > best_time):
             best_score = score
@@ -592,7 +662,7 @@ def _extract_sidebar_info(kpi_samples: List[Dict[str, Any]], events: List[Dict[s
                 "mimo_capability": str(mimo_cap).strip() if _has_value(mimo_cap) else None,
                 "ca_capability": str(ca_cap).strip() if _has_value(ca_cap) else None,
                 "ca_band_combinations": band_combos[:12] if isinstance(band_combos, list) else [],
-                "ue_capability_source_time": (ev or {}).get("time"),
+                "ue_capability_source_time": _epoch_ms_to_iso(t_ms) or (ev or {}).get("time"),
                 "ue_capability_source": "decoded_ue_capability_information",
             }
 
@@ -603,30 +673,23 @@ def _extract_sidebar_info(kpi_samples: List[Dict[str, Any]], events: List[Dict[s
 
     # Fallback inference from KPI metrics when UE capability message has no decoded EUTRA details.
     def _latest_num(metric_name: str) -> Optional[float]:
-        rows = by_name.get(metric_name) or []
-        best_t = -1
+        col = store.get(metric_name)
+        if col is None:
+            return None
+        best_t: Optional[int] = None
         best_v: Optional[float] = None
-        for r in rows:
-            v = _safe_float((r or {}).get("value_num"))
-            if v is None:
-                continue
-            t = _to_epoch_ms((r or {}).get("time"))
-            ord_t = int(t) if isinstance(t, int) else -1
-            if ord_t >= best_t:
-                best_t = ord_t
-                best_v = float(v)
+        for chunk in col.chunks():
+            for t, v in zip(chunk.times, chunk.values):
+                if v != v:
+                    continue
+                if best_t is None or t >= best_t:
+                    best_t = t
+                    best_v = float(v)
         return best_v
 
     def _max_num(metric_name: str) -> Optional[float]:
-        rows = by_name.get(metric_name) or []
-        best_v: Optional[float] = None
-        for r in rows:
-            v = _safe_float((r or {}).get("value_num"))
-            if v is None:
-                continue
-            if best_v is None or float(v) > float(best_v):
-                best_v = float(v)
-        return best_v
+        vals = _numeric_values(metric_name)
+        return float(max(vals)) if vals else None
 
     max_num_carriers = _safe_int(_latest_num("Pocket.General.Device.MaxNumCarriers"))
     mimo_enabled_raw = _latest_num("Radio.Lte.ServingSystem.MimoEnabled")
@@ -665,9 +728,15 @@ def _extract_sidebar_info(kpi_samples: List[Dict[str, Any]], events: List[Dict[s
 
         for ev in events or []:
             ev_name = str((ev or {}).get("event_name") or "").strip().lower()
-            msg_id = str(_event_param_value_ci(ev, "rrc_message_id") or (ev or {}).get("rrc_message_id") or "").strip().lower()
+            msg_id = str(
+                _event_param_value_ci(ev, "rrc_message_id")
+                or (ev or {}).get("rrc_message_id")
+                or (_rrc_record(ev, messages) or {}).get("message_id")
+                or ""
+            ).strip().lower()
             if "systeminformationblocktype1" not in ev_name and msg_id != "sib1" and "sib1" not in ev_name:
                 continue
+            ev = _with_rrc_message(ev, messages)
 
             candidates: List[Any] = [
                 _event_param_value_ci(ev, "sib1_tac"),
@@ -705,7 +774,7 @@ def _extract_sidebar_info(kpi_samples: List[Dict[str, Any]], events: List[Dict[s
 
             if tac_val is None:
                 continue
-            t_ms = _to_epoch_ms((ev or {}).get("time"))
+            t_ms = _sample_time_ms(ev or {})
             ord_t = int(t_ms) if isinstance(t_ms, int) else -1
             if ord_t >= best_tac_time:
                 best_tac_time = ord_t
@@ -745,30 +814,44 @@ def _metric_name_matches_scheduler_field(metric_name: str, spec: Dict[str, Any])
     return False
 
 
-def _compute_interval_stats(samples: List[Dict[str, Any]]) -> Dict[str, Optional[float]]:
-    if len(samples) < 2:
-        return {"min": None, "p50": None, "p90": None, "max": None}
-    sorted_rows = sorted(samples, key=lambda r: _safe_int((r or {}).get("t_ms")) or 0)
-    deltas: List[int] = []
+def _numeric_times(col: MetricColumns) -> Iterator[int]:
+    for chunk in col.chunks():
+        for t, v in zip(chunk.times, chunk.values):
+            if v == v:
+                yield t
+
+
+def _compute_interval_stats(times: Iterable[int]) -> Tuple[int, Dict[str, Optional[float]]]:
+    """
+    Sample count and interval percentiles of time-ordered sample times, streamed: the
+    intervals are tallied per distinct ms value, so memory does not grow with the run.
+    """
+    count = 0
+    tally: Counter = Counter()
     prev: Optional[int] = None
-    for row in sorted_rows:
-        t_ms = _safe_int((row or {}).get("t_ms"))
-        if t_ms is None:
-            continue
-        if prev is not None and t_ms > prev:
-            deltas.append(int(t_ms - prev))
-        prev = t_ms
-    if not deltas:
-        return {"min": None, "p50": None, "p90": None, "max": None}
-    deltas.sort()
-    n = len(deltas)
-    p50 = float(deltas[n // 2])
-    p90 = float(deltas[min(n - 1, int(round(0.9 * (n - 1))))])
-    return {
-        "min": float(deltas[0]),
-        "p50": p50,
-        "p90": p90,
-        "max": float(deltas[-1]),
+    for t in times:
+        count += 1
+        if prev is not None and t > prev:
+            tally[int(t - prev)] += 1
+        prev = t
+    if not tally:
+        return count, {"min": None, "p50": None, "p90": None, "max": None}
+    ordered = sorted(tally.items())
+    n = sum(tally.values())
+
+    def _delta_at(rank: int) -> float:
+        seen = 0
+        for delta, k in ordered:
+            seen += k
+            if seen > rank:
+                return float(delta)
+        return float(ordered[-1][0])
+
+    return count, {
+        "min": float(ordered[0][0]),
+        "p50": _delta_at(n // 2),
+        "p90": _delta_at(min(n - 1, int(round(0.9 * (n - 1))))),
+        "max": float(ordered[-1][0]),
     }
 
 
@@ -789,7 +872,12 @@ def _detect_l1l2_payload_presence(events: List[Dict[str, Any]]) -> Dict[str, Any
     }
 
 
-def build_l1l2_scheduler_index(kpi_samples: List[Dict[str, Any]], events: List[Dict[str, Any]]) -> Dict[str, Any]:
+def build_l1l2_scheduler_index(kpi_samples: Any, events: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Scheduler fields (L1L2_SCHEDULER_FIELD_SPECS) with the metrics feeding them and their
+    sampling stats. Samples stay in the sample store: the stats are streamed from the
+    columns and fetch_l1l2_scheduler_at_time reads a time window of them.
+    """
     fields: Dict[str, Dict[str, Any]] = {}
     for field_id, spec in L1L2_SCHEDULER_FIELD_SPECS.items():
         fields[field_id] = {
@@ -797,7 +885,6 @@ def build_l1l2_scheduler_index(kpi_samples: List[Dict[str, Any]], events: List[D
             "unit": spec.get("unit") or "",
             "perTtiRequired": bool(spec.get("per_tti_required")),
             "metricNames": [],
-            "samples": [],
             "stats": {
                 "sampleCount": 0,
                 "intervalMs": {"min": None, "p50": None, "p90": None, "max": None},
@@ -805,40 +892,27 @@ def build_l1l2_scheduler_index(kpi_samples: List[Dict[str, Any]], events: List[D
             },
         }
 
-    for s in kpi_samples or []:
-        name = str((s or {}).get("name") or "").strip()
-        if not name:
+    store = _as_sample_store(kpi_samples)
+    columns: Dict[str, List[MetricColumns]] = {field_id: [] for field_id in fields}
+    for name, col in store.items():
+        # Match each metric name once; columns without numeric samples don't feed a field.
+        matched = [fid for fid, spec in L1L2_SCHEDULER_FIELD_SPECS.items() if _metric_name_matches_scheduler_field(name, spec)]
+        if not matched or next(_numeric_times(col), None) is None:
             continue
-        t_ms = _sample_time_ms(s or {})
-        v = _safe_float((s or {}).get("value_num"))
-        if t_ms is None or v is None:
-            continue
-        for field_id, spec in L1L2_SCHEDULER_FIELD_SPECS.items():
-            if not _metric_name_matches_scheduler_field(name, spec):
-                continue
-            row = fields[field_id]
-            mnames = row["metricNames"]
-            if name not in mnames:
-                mnames.append(name)
-            row["samples"].append({
-                "time": (s or {}).get("time") or _epoch_ms_to_iso(t_ms),
-                "t_ms": int(t_ms),
-                "value": float(v),
-                "metric": name,
-            })
+        store.sort_column(col)
+        for field_id in matched:
+            fields[field_id]["metricNames"].append(name)
+            columns[field_id].append(col)
 
     for field_id, row in fields.items():
-        samples = row.get("samples") or []
-        samples.sort(key=lambda r: _safe_int((r or {}).get("t_ms")) or 0)
-        row["metricNames"] = sorted(list(row.get("metricNames") or []))
-        stats = row.get("stats") or {}
-        stats["sampleCount"] = len(samples)
-        int_stats = _compute_interval_stats(samples)
+        row["metricNames"] = sorted(row["metricNames"])
+        stats = row["stats"]
+        count, int_stats = _compute_interval_stats(heapq.merge(*(_numeric_times(col) for col in columns[field_id])))
+        stats["sampleCount"] = count
         stats["intervalMs"] = int_stats
         p50 = _safe_float((int_stats or {}).get("p50"))
         # Treat <=2 ms median cadence as per-TTI equivalent (LTE TTI is 1 ms).
         stats["perTtiExact"] = bool(p50 is not None and p50 <= 2.0)
-        row["stats"] = stats
 
     payload_presence = _detect_l1l2_payload_presence(events)
     per_decode_supported = bool(payload_presence.get("rawPayloadEventsDetected"))
@@ -864,17 +938,21 @@ def build_l1l2_scheduler_index(kpi_samples: List[Dict[str, Any]], events: List[D
 def _get_l1l2_scheduler_index(entry: Dict[str, Any]) -> Dict[str, Any]:
     idx = entry.get("l1l2_scheduler_index")
     if isinstance(idx, dict) and idx:
+        # Runs stored before the index kept only stats still carry per-sample copies.
+        for row in (idx.get("fields") or {}).values():
+            row.pop("samples", None)
         return idx
-    idx = build_l1l2_scheduler_index(entry.get("kpi_samples") or [], entry.get("events") or [])
+    idx = build_l1l2_scheduler_index(_entry_samples(entry), entry.get("events") or [])
     entry["l1l2_scheduler_index"] = idx
     return idx
 
 
 def fetch_l1l2_scheduler_capabilities(db_path: Optional[str], run_id: int) -> Dict[str, Any]:
     rid = int(run_id)
-    if rid not in _RUNS:
+    entry = _get_run_entry(db_path, rid)
+    if entry is None:
         return {"status": "error", "message": "Run not found"}
-    idx = _get_l1l2_scheduler_index(_RUNS[rid])
+    idx = _get_l1l2_scheduler_index(entry)
     fields_out: List[Dict[str, Any]] = []
     for field_id, row in (idx.get("fields") or {}).items():
         stats = row.get("stats") or {}
@@ -896,27 +974,32 @@ def fetch_l1l2_scheduler_capabilities(db_path: Optional[str], run_id: int) -> Di
 
 
 def _nearest_scheduler_sample(
-    samples: List[Dict[str, Any]],
+    store: SampleStore,
+    metric_names: List[str],
     center_ms: int,
     window_ms: int,
 ) -> Optional[Dict[str, Any]]:
+    """Numeric sample of the metrics closest to center_ms within window_ms (the earlier one on ties)."""
     best: Optional[Dict[str, Any]] = None
-    best_dt: Optional[int] = None
-    for row in samples or []:
-        t_ms = _safe_int((row or {}).get("t_ms"))
-        if t_ms is None:
+    best_key: Optional[Tuple[int, int]] = None
+    for name in metric_names:
+        col = store.get(name)
+        if col is None:
             continue
-        dt = abs(t_ms - center_ms)
-        if dt > window_ms:
-            continue
-        if best is None or dt < (best_dt or 10**18):
-            best = row
-            best_dt = dt
-    if best is None:
+        for chunk, j_lo, j_hi in col.window(center_ms - window_ms, center_ms + window_ms):
+            times, values = chunk.times, chunk.values
+            for j in range(j_lo, j_hi):
+                v = values[j]
+                if v != v:
+                    continue
+                key = (abs(times[j] - center_ms), times[j])
+                if best_key is None or key < best_key:
+                    best_key = key
+                    best = {"t_ms": int(times[j]), "value": float(v), "metric": name}
+    if best is None or best_key is None:
         return None
-    out = dict(best)
-    out["delta_ms"] = int(best_dt or 0)
-    return out
+    best["delta_ms"] = int(best_key[0])
+    return best
 
 
 def fetch_l1l2_scheduler_at_time(
@@ -926,17 +1009,19 @@ def fetch_l1l2_scheduler_at_time(
     window_ms: int = 2000,
 ) -> Dict[str, Any]:
     rid = int(run_id)
-    if rid not in _RUNS:
+    entry = _get_run_entry(db_path, rid)
+    if entry is None:
         return {"status": "error", "message": "Run not found"}
     center_ms = _to_epoch_ms(center_iso)
     if center_ms is None:
         return {"status": "error", "message": "Invalid time"}
     win = int(max(1, _safe_int(window_ms) or 2000))
-    idx = _get_l1l2_scheduler_index(_RUNS[rid])
+    idx = _get_l1l2_scheduler_index(entry)
+    store = _entry_samples(entry)
 
     fields_out: List[Dict[str, Any]] = []
     for field_id, row in (idx.get("fields") or {}).items():
-        nearest = _nearest_scheduler_sample(row.get("samples") or [], center_ms=center_ms, window_ms=win)
+        nearest = _nearest_scheduler_sample(store, row.get("metricNames") or [], center_ms=center_ms, window_ms=win)
         stats = row.get("stats") or {}
         fields_out.append({
             "field": field_id,
@@ -946,7 +1031,7 @@ def fetch_l1l2_scheduler_at_time(
             "perTtiExact": bool(stats.get("perTtiExact")),
             "value": _safe_float((nearest or {}).get("value")),
             "metric": (nearest or {}).get("metric"),
-            "sample_time": (nearest or {}).get("time"),
+            "sample_time": _epoch_ms_to_iso((nearest or {}).get("t_ms")),
             "delta_ms": _safe_int((nearest or {}).get("delta_ms")),
             "sampleCount": int(stats.get("sampleCount") or 0),
             "intervalMs": stats.get("intervalMs") or {},
@@ -1028,22 +1113,292 @@ def _attach_patch_to_event(event: Dict[str, Any], patch: Dict[str, Any], params_
 
 
 def _apply_decode_to_matching_events(
-    events_by_key: Dict[Tuple[str, str], List[Dict[str, Any]]],
-    time_iso: str,
+    events_by_key: Dict[Tuple[int, str], List[Dict[str, Any]]],
+    time_ms: Optional[int],
     event_name: str,
     patch: Dict[str, Any],
     params_patch: Optional[Dict[str, Any]] = None,
 ) -> None:
-    if not time_iso or not event_name:
+    if time_ms is None or not event_name:
         return
-    for ev in events_by_key.get((time_iso, event_name), []):
+    for ev in events_by_key.get((time_ms, event_name), []):
         _attach_patch_to_event(ev, patch or {}, params_patch or {})
 
 
+def _per_decode_mode() -> str:
+    """PER decode mode for imports (OPTIM_TRP_PER_MODE): "eager" (default) or "deferred"."""
+    mode = os.environ.get("OPTIM_TRP_PER_MODE", "").strip().lower()
+    return "deferred" if mode == "deferred" else "eager"
+
+
+def _rrc_compress_enabled() -> bool:
+    """Keep the run's decoded RRC message table zlib-compressed (OPTIM_TRP_RRC_COMPRESS=1)."""
+    return os.environ.get("OPTIM_TRP_RRC_COMPRESS", "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def _rrc_extra_prefix(name: str) -> str:
+    return LTE_RRC_EXTRA_PER_EVENT_PREFIX.get(name) or ("sib1" if "systeminformationblocktype1" in name.lower() else "rrc_msg")
+
+
+def _rrc_extra_patches(prefix: str, payload_len: int, dec: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Sample/event patch and event params patch for one decoded (or failed) extra RRC message."""
+    if not dec.get("ok"):
+        fail_patch = {
+            "per_decoded": False,
+            "per_decoder": "pycrate_rrclte",
+            "per_decoder_type": None,
+            "payload_len": payload_len,
+            "rrc_message_id": prefix,
+        }
+        fail_params = {
+            f"{prefix}_full_decoded": "no",
+            f"{prefix}_full_decoder": "pycrate_rrclte",
+            f"{prefix}_full_type": "",
+            f"{prefix}_summary": "",
+        }
+        return fail_patch, fail_params
+
+    msg_id = str(dec.get("message_id") or prefix)
+    summary = dec.get("summary") or {}
+    full_json_txt = _json_compact(dec.get("decoded_json") or {})
+    summary_txt = _json_compact(summary)
+    patch = {
+        "per_decoded": True,
+        "per_decoder": dec.get("decoder"),
+        "per_decoder_type": dec.get("decoder_type"),
+        "per_decode_offset": dec.get("decode_offset"),
+        "decoded_json": dec.get("decoded_json"),
+        "rrc_message_id": msg_id,
+        "rrc_message_summary": summary,
+        f"{prefix}_summary": summary,
+        "payload_len": payload_len,
+    }
+    params_patch = {
+        f"{prefix}_full_decoded": "yes",
+        f"{prefix}_full_decoder": str(dec.get("decoder") or "pycrate_rrclte"),
+        f"{prefix}_full_type": str(dec.get("decoder_type") or ""),
+        f"{prefix}_full_json": full_json_txt,
+        f"{prefix}_summary": summary_txt,
+        "rrc_message_id": msg_id,
+        "rrc_message_summary": summary_txt,
+    }
+    if msg_id == "sib1":
+        tac = _parse_tac_value(summary)
+        if tac is not None:
+            patch["sib1_tac"] = int(tac)
+            params_patch["sib1_tac"] = str(int(tac))
+    elif msg_id == "ue_information_request":
+        req_rlf = summary.get("rlfReportReq")
+        req_rach = summary.get("rachReportReq")
+        if req_rlf is not None:
+            patch["ue_info_req_rlf_report_req"] = bool(req_rlf)
+            params_patch["ue_info_req_rlf_report_req"] = "yes" if bool(req_rlf) else "no"
+        if req_rach is not None:
+            patch["ue_info_req_rach_report_req"] = bool(req_rach)
+            params_patch["ue_info_req_rach_report_req"] = "yes" if bool(req_rach) else "no"
+    elif msg_id == "ue_information_response":
+        root_cause = summary.get("rlfRootCause")
+        root_details = summary.get("rlfRootCauseDetails")
+        timeline_txt = summary.get("reestablishmentTimeline")
+        reason_breakdown = summary.get("rlfReasonBreakdown")
+        has_rlf = summary.get("hasRlfReport")
+        if has_rlf is not None:
+            patch["ue_info_rsp_has_rlf_report"] = bool(has_rlf)
+            params_patch["ue_info_rsp_has_rlf_report"] = "yes" if bool(has_rlf) else "no"
+        if _has_value(root_cause):
+            patch["ue_info_rsp_rlf_root_cause"] = str(root_cause)
+            params_patch["ue_info_rsp_rlf_root_cause"] = str(root_cause)
+        if _has_value(root_details):
+            patch["ue_info_rsp_rlf_root_cause_details"] = str(root_details)
+            params_patch["ue_info_rsp_rlf_root_cause_details"] = str(root_details)
+        if _has_value(timeline_txt):
+            patch["ue_info_rsp_reest_timeline"] = str(timeline_txt)
+            params_patch["ue_info_rsp_reest_timeline"] = str(timeline_txt)
+        if isinstance(reason_breakdown, dict) and reason_breakdown:
+            patch["ue_info_rsp_rlf_reason_breakdown"] = reason_breakdown
+            params_patch["ue_info_rsp_rlf_reason_breakdown"] = _json_compact(reason_breakdown)
+    return patch, params_patch
+
+
+def _mr_patches(payload_len: int, dec: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Sample/event patch and event params patch for one decoded (or failed) MeasurementReport."""
+    if not dec.get("ok"):
+        fail_patch = {
+            "per_decoded": False,
+            "per_decoder": "pycrate_rrclte",
+            "per_decoder_type": None,
+            "payload_len": payload_len,
+        }
+        fail_params = {
+            "measurement_report_full_decoded": "no",
+            "measurement_report_full_decoder": "pycrate_rrclte",
+            "measurement_report_full_type": "",
+        }
+        return fail_patch, fail_params
+
+    merged_neighbors = list(dec.get("neighbors_lte") or []) + list(dec.get("neighbors_utra") or []) + list(dec.get("neighbors_geran") or [])
+    summary = dec.get("summary") or {}
+    serving_json = dec.get("serving") or {}
+    neighbors_lte = dec.get("neighbors_lte") or []
+    neighbors_utra = dec.get("neighbors_utra") or []
+    neighbors_geran = dec.get("neighbors_geran") or []
+    servfreq_rows = dec.get("servfreq") or []
+    patch = {
+        "per_decoded": True,
+        "per_decoder": dec.get("decoder"),
+        "per_decoder_type": dec.get("decoder_type"),
+        "per_decode_offset": dec.get("decode_offset"),
+        "decoded_json": dec.get("decoded_json"),
+        "measurement_report_summary": summary,
+        "measurement_report_serving_json": serving_json,
+        "measurement_report_neighbors_json": merged_neighbors,
+        "measurement_report_neighbors_lte_json": neighbors_lte,
+        "measurement_report_neighbors_utra_json": neighbors_utra,
+        "measurement_report_neighbors_geran_json": neighbors_geran,
+        "measurement_report_servfreq_json": servfreq_rows,
+        "payload_len": payload_len,
+    }
+    params_patch = {
+        "measurement_report_full_decoded": "yes",
+        "measurement_report_full_decoder": str(dec.get("decoder") or "pycrate_rrclte"),
+        "measurement_report_full_type": str(dec.get("decoder_type") or ""),
+        "measurement_report_full_json": _json_compact(dec.get("decoded_json") or {}),
+        "measurement_report_measid": summary.get("measId"),
+        "measurement_report_summary": _json_compact(summary),
+        "measurement_report_serving_json": _json_compact(serving_json),
+        "measurement_report_neighbors_json": _json_compact(merged_neighbors),
+        "measurement_report_neighbors_lte_json": _json_compact(neighbors_lte),
+        "measurement_report_neighbors_utra_json": _json_compact(neighbors_utra),
+        "measurement_report_neighbors_geran_json": _json_compact(neighbors_geran),
+        "measurement_report_servfreq_json": _json_compact(servfreq_rows),
+    }
+    return patch, params_patch
+
+
+def _recfg_patches(payload_len: int, dec: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Sample/event patch and event params patch for one decoded (or failed) RRCConnectionReconfiguration."""
+    if not dec.get("ok"):
+        fail_patch = {
+            "per_decoded": False,
+            "per_decoder": "pycrate_rrclte",
+            "per_decoder_type": None,
+            "payload_len": payload_len,
+        }
+        fail_params = {
+            "rrc_recfg_full_decoded": "no",
+            "rrc_recfg_full_decoder": "pycrate_rrclte",
+            "rrc_recfg_full_type": "",
+            "rrc_recfg_summary": "",
+            "rrc_recfg_meas_config_present": "no",
+        }
+        return fail_patch, fail_params
+
+    summary = dec.get("summary") or {}
+    meas_cfg = dec.get("meas_config") or {}
+    patch = {
+        "per_decoded": True,
+        "per_decoder": dec.get("decoder"),
+        "per_decoder_type": dec.get("decoder_type"),
+        "per_decode_offset": dec.get("decode_offset"),
+        "decoded_json": dec.get("decoded_json"),
+        "rrc_reconfiguration_meas_config_json": meas_cfg,
+        "rrc_reconfiguration_summary": summary,
+        "payload_len": payload_len,
+    }
+    summary_txt_parts = []
+    if summary.get("has_measConfig"):
+        summary_txt_parts.append("measConfig")
+    if summary.get("has_mobilityControlInfo"):
+        summary_txt_parts.append("mobilityControlInfo")
+    if summary.get("has_radioResourceConfigDedicated"):
+        summary_txt_parts.append("radioResourceConfigDedicated")
+    summary_txt = ", ".join(summary_txt_parts) if summary_txt_parts else "RRCConnectionReconfiguration decoded"
+    params_patch = {
+        "rrc_recfg_full_decoded": "yes",
+        "rrc_recfg_full_decoder": str(dec.get("decoder") or "pycrate_rrclte"),
+        "rrc_recfg_full_type": str(dec.get("decoder_type") or ""),
+        "rrc_recfg_full_json": _json_compact(dec.get("decoded_json") or {}),
+        "rrc_recfg_summary": summary_txt,
+        "rrc_recfg_meas_config_present": "yes" if bool(summary.get("has_measConfig")) else "no",
+        "rrc_recfg_meas_config_json": _json_compact(meas_cfg),
+    }
+    return patch, params_patch
+
+
+def _per_patches(name: str, payload_len: int, dec: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Full sample/event patch and params patch for a decode result of the RRC metric/event name."""
+    if name == LTE_MR_METRIC_NAME:
+        return _mr_patches(payload_len, dec)
+    if name == LTE_RECFG_METRIC_NAME:
+        return _recfg_patches(payload_len, dec)
+    return _rrc_extra_patches(_rrc_extra_prefix(name), payload_len, dec)
+
+
+def _per_result_patches(
+    name: str, payload: bytes, dec: Dict[str, Any], messages: Optional[RrcMessageTable] = None,
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Patches for one decode result. With a message table a successful decode is stored there
+    once and samples/events only get its rrc_msg_id; failures are always patched in full.
+    """
+    if messages is None or not dec.get("ok"):
+        return _per_patches(name, len(payload), dec)
+    msg_id = messages.add(dec, key=(name, payload))
+    return {"per_decoded": True, "rrc_msg_id": msg_id, "payload_len": len(payload)}, {}
+
+
+def _rrc_record(event: Dict[str, Any], messages: Optional[RrcMessageTable]) -> Optional[Dict[str, Any]]:
+    if messages is None or not isinstance(event, dict) or event.get("rrc_msg_id") is None:
+        return None
+    return messages.get(event.get("rrc_msg_id"))
+
+
+def _with_rrc_message(event: Dict[str, Any], messages: Optional[RrcMessageTable]) -> Dict[str, Any]:
+    """
+    The event with its rrc_msg_id record expanded into the fields and params an inline
+    import stores; the stored event is not modified. Other events are returned as is.
+    """
+    record = _rrc_record(event, messages)
+    if record is None:
+        return event
+    out = dict(event)
+    out["params"] = [dict(row) if isinstance(row, dict) else row for row in event.get("params") or []]
+    out.pop("params_map", None)
+    patch, params_patch = _per_patches(str(event.get("event_name") or ""), int(event.get("payload_len") or 0), record)
+    _attach_patch_to_event(out, patch, params_patch)
+    return out
+
+
+def _rrc_decoded_lookup(messages: Optional[RrcMessageTable]):
+    """Decoded tree of an event's rrc_msg_id record, for consumers reading events directly."""
+    if messages is None:
+        return None
+
+    def lookup(event: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        record = _rrc_record(event, messages)
+        return record.get("decoded_json") if record else None
+
+    return lookup
+
+
 def _decode_lte_rrc_payloads_in_place(
     kpi_samples: List[Dict[str, Any]],
     events: List[Dict[str, Any]],
+    progress: Optional[Any] = None,
+    deferred: bool = False,
+    messages: Optional[RrcMessageTable] = None,
 ) -> Dict[str, Any]:
+    """
+    PER-decode the RRC payload samples and patch them and their matching events.
+
+    With deferred=True only MeasurementReport, RRCConnectionReconfiguration and the
+    LTE_RRC_EAGER_PER_PREFIXES messages are decoded; the other extra messages are marked
+    per_deferred for fetch_event_decode. Their events reference the payload sample by its
+    column offset (per_sample_ref, the row's _store_ref) rather than copying the payload.
+
+    With a messages table, successful decodes are stored there once and samples/events
+    reference them by rrc_msg_id (see _with_rrc_message); otherwise they are patched inline.
+    """
     stats = {
         "measurement_reports_seen": 0,
         "measurement_reports_decoded": 0,
@@ -1054,249 +1409,227 @@ def _decode_lte_rrc_payloads_in_place(
         "rrc_extra_seen": 0,
         "rrc_extra_decoded": 0,
         "rrc_extra_failed": 0,
+        "rrc_extra_deferred": 0,
         "rrc_extra_by_message": {},
+        "mode": "deferred" if deferred else "eager",
         "decoder_status": per_decoder_status(),
     }
 
     if not stats["decoder_status"].get("available"):
         return stats
 
-    events_by_key: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+    # Samples and events are matched on (epoch ms, name) so ISO formatting differences don't matter.
+    events_by_key: Dict[Tuple[int, str], List[Dict[str, Any]]] = {}
     for ev in events or []:
-        key = (str(ev.get("time") or ""), str(ev.get("event_name") or ""))
+        t_ms = _sample_time_ms(ev)
+        if t_ms is None:
+            continue
+        key = (t_ms, str(ev.get("event_name") or ""))
         events_by_key.setdefault(key, []).append(ev)
 
-    for s in kpi_samples or []:
+    # Gather every payload first, decode them (on a process pool for large imports), then
+    # apply the patches in row order so samples and events end up as a serial pass leaves them.
+    jobs: List[Tuple[int, str, bytes]] = []
+    deferred_jobs: List[Tuple[int, str, bytes]] = []
+    for row_no, s in enumerate(kpi_samples or []):
         name = str((s or {}).get("name") or "")
-        lower_name = name.lower()
-        is_sib1_metric = "systeminformationblocktype1" in lower_name
         if (
             name not in (LTE_MR_METRIC_NAME, LTE_RECFG_METRIC_NAME)
             and name not in LTE_RRC_EXTRA_PER_METRIC_NAMES
-            and not is_sib1_metric
+            and "systeminformationblocktype1" not in name.lower()
         ):
             continue
         payload = _sample_payload_bytes(s or {})
         if not payload:
             continue
-        time_iso = str((s or {}).get("time") or "")
+        if (
+            deferred
+            and name not in (LTE_MR_METRIC_NAME, LTE_RECFG_METRIC_NAME)
+            and _rrc_extra_prefix(name) not in LTE_RRC_EAGER_PER_PREFIXES
+        ):
+            deferred_jobs.append((row_no, name, payload))
+        else:
+            jobs.append((row_no, name, payload))
+    decoded, counters = _decode_per_payloads([(name, payload) for _, name, payload in jobs], progress=progress)
+
+    for (row_no, name, payload), dec in zip(jobs, decoded):
+        s = kpi_samples[row_no]
+        time_ms = _sample_time_ms(s or {})
 
         if name == LTE_MR_METRIC_NAME:
-            stats["measurement_reports_seen"] += 1
-            dec = decode_measurement_report_payload(payload)
-            if not dec.get("ok"):
-                stats["measurement_reports_failed"] += 1
-                fail_patch = {
-                    "per_decoded": False,
-                    "per_decoder": "pycrate_rrclte",
-                    "per_decoder_type": None,
-                    "payload_len": len(payload),
-                }
-                fail_params = {
-                    "measurement_report_full_decoded": "no",
-                    "measurement_report_full_decoder": "pycrate_rrclte",
-                    "measurement_report_full_type": "",
-                }
-                s.update(fail_patch)
-                _apply_decode_to_matching_events(events_by_key, time_iso, name, fail_patch, fail_params)
-                continue
-            stats["measurement_reports_decoded"] += 1
-            merged_neighbors = list(dec.get("neighbors_lte") or []) + list(dec.get("neighbors_utra") or []) + list(dec.get("neighbors_geran") or [])
-            summary = dec.get("summary") or {}
-            serving_json = dec.get("serving") or {}
-            neighbors_lte = dec.get("neighbors_lte") or []
-            neighbors_utra = dec.get("neighbors_utra") or []
-            neighbors_geran = dec.get("neighbors_geran") or []
-            servfreq_rows = dec.get("servfreq") or []
-            full_json_txt = _json_compact(dec.get("decoded_json") or {})
-            neighbors_txt = _json_compact(merged_neighbors)
-            serving_txt = _json_compact(serving_json)
-            servfreq_txt = _json_compact(servfreq_rows)
-            patch = {
-                "per_decoded": True,
-                "per_decoder": dec.get("decoder"),
-                "per_decoder_type": dec.get("decoder_type"),
-                "per_decode_offset": dec.get("decode_offset"),
-                "decoded_json": dec.get("decoded_json"),
-                "measurement_report_summary": summary,
-                "measurement_report_serving_json": serving_json,
-                "measurement_report_neighbors_json": merged_neighbors,
-                "measurement_report_neighbors_lte_json": neighbors_lte,
-                "measurement_report_neighbors_utra_json": neighbors_utra,
-                "measurement_report_neighbors_geran_json": neighbors_geran,
-                "measurement_report_servfreq_json": servfreq_rows,
-                "payload_len": len(payload),
-            }
-            params_patch = {
-                "measurement_report_full_decoded": "yes",
-                "measurement_report_full_decoder": str(dec.get("decoder") or "pycrate_rrclte"),
-                "measurement_report_full_type": str(dec.get("decoder_type") or ""),
-                "measurement_report_full_json": full_json_txt,
-                "measurement_report_measid": summary.get("measId"),
-                "measurement_report_summary": _json_compact(summary),
-                "measurement_report_serving_json": serving_txt,
-                "measurement_report_neighbors_json": neighbors_txt,
-                "measurement_report_neighbors_lte_json": _json_compact(neighbors_lte),
-                "measurement_report_neighbors_utra_json": _json_compact(neighbors_utra),
-                "measurement_report_neighbors_geran_json": _json_compact(neighbors_geran),
-                "measurement_report_servfreq_json": servfreq_txt,
-            }
-            s.update(patch)
-            _apply_decode_to_matching_events(events_by_key, time_iso, name, patch, params_patch)
+            kind = "measurement_reports"
+        elif name == LTE_RECFG_METRIC_NAME:
+            kind = "reconfig"
+        else:
+            kind = "rrc_extra"
+        stats[f"{kind}_seen"] += 1
+        patch, params_patch = _per_result_patches(name, payload, dec, messages)
+        s.update(patch)
+        _apply_decode_to_matching_events(events_by_key, time_ms, name, patch, params_patch)
+        if not dec.get("ok"):
+            stats[f"{kind}_failed"] += 1
             continue
-
-        if name == LTE_RECFG_METRIC_NAME:
-            stats["reconfig_seen"] += 1
-            dec = decode_rrc_reconfiguration_payload(payload)
-            if not dec.get("ok"):
-                stats["reconfig_failed"] += 1
-                fail_patch = {
-                    "per_decoded": False,
-                    "per_decoder": "pycrate_rrclte",
-                    "per_decoder_type": None,
-                    "payload_len": len(payload),
-                }
-                fail_params = {
-                    "rrc_recfg_full_decoded": "no",
-                    "rrc_recfg_full_decoder": "pycrate_rrclte",
-                    "rrc_recfg_full_type": "",
-                    "rrc_recfg_summary": "",
-                    "rrc_recfg_meas_config_present": "no",
-                }
-                s.update(fail_patch)
-                _apply_decode_to_matching_events(events_by_key, time_iso, name, fail_patch, fail_params)
-                continue
-            stats["reconfig_decoded"] += 1
-            summary = dec.get("summary") or {}
-            meas_cfg = dec.get("meas_config") or {}
-            full_json_txt = _json_compact(dec.get("decoded_json") or {})
-            meas_cfg_txt = _json_compact(meas_cfg)
-            patch = {
-                "per_decoded": True,
-                "per_decoder": dec.get("decoder"),
-                "per_decoder_type": dec.get("decoder_type"),
-                "per_decode_offset": dec.get("decode_offset"),
-                "decoded_json": dec.get("decoded_json"),
-                "rrc_reconfiguration_meas_config_json": meas_cfg,
-                "rrc_reconfiguration_summary": summary,
-                "payload_len": len(payload),
-            }
-            summary_txt_parts = []
-            if summary.get("has_measConfig"):
-                summary_txt_parts.append("measConfig")
-            if summary.get("has_mobilityControlInfo"):
-                summary_txt_parts.append("mobilityControlInfo")
-            if summary.get("has_radioResourceConfigDedicated"):
-                summary_txt_parts.append("radioResourceConfigDedicated")
-            summary_txt = ", ".join(summary_txt_parts) if summary_txt_parts else "RRCConnectionReconfiguration decoded"
-            params_patch = {
-                "rrc_recfg_full_decoded": "yes",
-                "rrc_recfg_full_decoder": str(dec.get("decoder") or "pycrate_rrclte"),
-                "rrc_recfg_full_type": str(dec.get("decoder_type") or ""),
-                "rrc_recfg_full_json": full_json_txt,
-                "rrc_recfg_summary": summary_txt,
-                "rrc_recfg_meas_config_present": "yes" if bool(summary.get("has_measConfig")) else "no",
-                "rrc_recfg_meas_config_json": meas_cfg_txt,
-            }
-            s.update(patch)
-            _apply_decode_to_matching_events(events_by_key, time_iso, name, patch, params_patch)
+        stats[f"{kind}_decoded"] += 1
+        if kind != "rrc_extra":
             continue
-
         # Additional LTE RRC PER decode profiles
-        prefix = LTE_RRC_EXTRA_PER_EVENT_PREFIX.get(name) or ("sib1" if "systeminformationblocktype1" in lower_name else "rrc_msg")
-        stats["rrc_extra_seen"] += 1
-        dec = decode_rrc_event_payload(payload, name)
-        if not dec.get("ok"):
-            stats["rrc_extra_failed"] += 1
-            fail_patch = {
-                "per_decoded": False,
-                "per_decoder": "pycrate_rrclte",
-                "per_decoder_type": None,
-                "payload_len": len(payload),
-                "rrc_message_id": prefix,
-            }
-            fail_params = {
-                f"{prefix}_full_decoded": "no",
-                f"{prefix}_full_decoder": "pycrate_rrclte",
-                f"{prefix}_full_type": "",
-                f"{prefix}_summary": "",
-            }
-            s.update(fail_patch)
-            _apply_decode_to_matching_events(events_by_key, time_iso, name, fail_patch, fail_params)
-            continue
-
-        stats["rrc_extra_decoded"] += 1
-        msg_id = str(dec.get("message_id") or prefix)
+        msg_id = str(dec.get("message_id") or _rrc_extra_prefix(name))
         by_msg = stats.get("rrc_extra_by_message")
         if not isinstance(by_msg, dict):
             by_msg = {}
             stats["rrc_extra_by_message"] = by_msg
         by_msg[msg_id] = int(by_msg.get(msg_id) or 0) + 1
 
-        summary = dec.get("summary") or {}
-        full_json_txt = _json_compact(dec.get("decoded_json") or {})
-        summary_txt = _json_compact(summary)
+    for row_no, name, payload in deferred_jobs:
+        s = kpi_samples[row_no]
+        prefix = _rrc_extra_prefix(name)
+        stats["rrc_extra_seen"] += 1
+        stats["rrc_extra_deferred"] += 1
         patch = {
-            "per_decoded": True,
-            "per_decoder": dec.get("decoder"),
-            "per_decoder_type": dec.get("decoder_type"),
-            "per_decode_offset": dec.get("decode_offset"),
-            "decoded_json": dec.get("decoded_json"),
-            "rrc_message_id": msg_id,
-            "rrc_message_summary": summary,
-            f"{prefix}_summary": summary,
+            "per_decoded": False,
+            "per_deferred": True,
+            "per_decoder": "pycrate_rrclte",
+            "per_decoder_type": None,
             "payload_len": len(payload),
+            "rrc_message_id": prefix,
         }
-        params_patch = {
-            f"{prefix}_full_decoded": "yes",
-            f"{prefix}_full_decoder": str(dec.get("decoder") or "pycrate_rrclte"),
-            f"{prefix}_full_type": str(dec.get("decoder_type") or ""),
-            f"{prefix}_full_json": full_json_txt,
-            f"{prefix}_summary": summary_txt,
-            "rrc_message_id": msg_id,
-            "rrc_message_summary": summary_txt,
-        }
-        if msg_id == "sib1":
-            tac = _parse_tac_value(summary)
-            if tac is not None:
-                patch["sib1_tac"] = int(tac)
-                params_patch["sib1_tac"] = str(int(tac))
-        elif msg_id == "ue_information_request":
-            req_rlf = summary.get("rlfReportReq")
-            req_rach = summary.get("rachReportReq")
-            if req_rlf is not None:
-                patch["ue_info_req_rlf_report_req"] = bool(req_rlf)
-                params_patch["ue_info_req_rlf_report_req"] = "yes" if bool(req_rlf) else "no"
-            if req_rach is not None:
-                patch["ue_info_req_rach_report_req"] = bool(req_rach)
-                params_patch["ue_info_req_rach_report_req"] = "yes" if bool(req_rach) else "no"
-        elif msg_id == "ue_information_response":
-            root_cause = summary.get("rlfRootCause")
-            root_details = summary.get("rlfRootCauseDetails")
-            timeline_txt = summary.get("reestablishmentTimeline")
-            reason_breakdown = summary.get("rlfReasonBreakdown")
-            has_rlf = summary.get("hasRlfReport")
-            if has_rlf is not None:
-                patch["ue_info_rsp_has_rlf_report"] = bool(has_rlf)
-                params_patch["ue_info_rsp_has_rlf_report"] = "yes" if bool(has_rlf) else "no"
-            if _has_value(root_cause):
-                patch["ue_info_rsp_rlf_root_cause"] = str(root_cause)
-                params_patch["ue_info_rsp_rlf_root_cause"] = str(root_cause)
-            if _has_value(root_details):
-                patch["ue_info_rsp_rlf_root_cause_details"] = str(root_details)
-                params_patch["ue_info_rsp_rlf_root_cause_details"] = str(root_details)
-            if _has_value(timeline_txt):
-                patch["ue_info_rsp_reest_timeline"] = str(timeline_txt)
-                params_patch["ue_info_rsp_reest_timeline"] = str(timeline_txt)
-            if isinstance(reason_breakdown, dict) and reason_breakdown:
-                patch["ue_info_rsp_rlf_reason_breakdown"] = reason_breakdown
-                params_patch["ue_info_rsp_rlf_reason_breakdown"] = _json_compact(reason_breakdown)
         s.update(patch)
-        _apply_decode_to_matching_events(events_by_key, time_iso, name, patch, params_patch)
+        # Events point at the sample holding the payload; plain sample dicts (no store) carry it as hex.
+        ref = s.get("_store_ref")
+        source = {"per_sample_ref": ref} if isinstance(ref, int) else {"per_payload_hex": payload.hex()}
+        _apply_decode_to_matching_events(
+            events_by_key, _sample_time_ms(s or {}), name,
+            dict(patch, **source), {f"{prefix}_full_decoded": "deferred"},
+        )
 
+    # Content-addressed decode cache activity during this import (repeated payloads are not re-decoded).
+    cache = counters["cache"]
+    stats["cache_hits"] = cache.get("hits", 0) + cache.get("disk_hits", 0)
+    stats["cache_disk_hits"] = cache.get("disk_hits", 0)
+    stats["cache_misses"] = cache.get("misses", 0)
+    # Candidate search effort per message profile (from_uper calls, learned-winner hits, full searches).
+    stats["decode_attempts"] = {p: row for p, row in counters["attempts"].items() if row.get("decodes")}
+    stats["workers"] = counters["workers"]
     return stats
 
 
+def _pool_mp_context():
+    """
+    Start method for the decode process pools. They are created from import job threads
+    in a process that also runs the HTTP and pycrate warmup threads, so a forked child
+    could inherit a lock held by another thread (PER_DECODE_CACHE._lock) or the parent's
+    SQLite connection (PerDecodeCache._db). forkserver (spawn where it is missing) starts
+    workers from a clean process; they import this module and build their own cache.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+# PER payloads below this count are decoded in-process (pool start-up would dominate).
+_PER_POOL_MIN_PAYLOADS = 64
+_PER_BATCHES_PER_WORKER = 4
+
+
+def _per_decode_workers() -> int:
+    """Worker processes for the PER decode stage (OPTIM_TRP_PER_WORKERS, default: CPU count, 1 = serial)."""
+    raw = os.environ.get("OPTIM_TRP_PER_WORKERS", "").strip()
+    workers = _safe_int(raw) if raw else None
+    if workers is None:
+        workers = os.cpu_count() or 1
+    return max(1, int(workers))
+
+
+def _decode_per_payload(name: str, payload: bytes) -> Dict[str, Any]:
+    if name == LTE_MR_METRIC_NAME:
+        return decode_measurement_report_payload(payload)
+    if name == LTE_RECFG_METRIC_NAME:
+        return decode_rrc_reconfiguration_payload(payload)
+    return decode_rrc_event_payload(payload, name)
+
+
+def _add_per_counters(total: Dict[str, Any], cache: Dict[str, int], attempts: Dict[str, Dict[str, int]]) -> None:
+    for k, v in cache.items():
+        total["cache"][k] = total["cache"].get(k, 0) + int(v)
+    for profile, row in attempts.items():
+        acc = total["attempts"].setdefault(profile, {})
+        for k, v in row.items():
+            acc[k] = acc.get(k, 0) + int(v)
+
+
+def _decode_per_batch(
+    items: List[Tuple[str, bytes]],
+    progress: Optional[Any] = None,
+    done0: int = 0,
+    total: Optional[int] = None,
+) -> Tuple[List[Dict[str, Any]], Dict[str, int], Dict[str, Dict[str, int]]]:
+    """
+    Decode (metric name, payload) items in order. Runs in pool workers (each process
+    holds its own pycrate RRCLTE objects, which from_uper mutates) and in-process on the
+    import job's thread, where the decoder serialises access to the shared objects.
+    Returns the results plus this batch's cache and candidate-search counter deltas.
+    """
+    cache0 = per_decode_cache_stats()
+    attempts0 = per_decoder_attempt_stats()
+    out: List[Dict[str, Any]] = []
+    for k, (name, payload) in enumerate(items):
+        if progress is not None and k % 256 == 0:
+            progress("per_decode", done=done0 + k, total=total, unit="payloads")
+        out.append(_decode_per_payload(name, payload))
+    cache1 = per_decode_cache_stats()
+    cache = {k: int(cache1[k]) - int(cache0.get(k, 0)) for k in ("hits", "disk_hits", "misses")}
+    attempts: Dict[str, Dict[str, int]] = {}
+    for profile, row in per_decoder_attempt_stats().items():
+        before = attempts0.get(profile) or {}
+        delta = {k: int(v) - int(before.get(k, 0)) for k, v in row.items()}
+        if any(delta.values()):
+            attempts[profile] = delta
+    return out, cache, attempts
+
+
+def _decode_per_payloads(
+    items: List[Tuple[str, bytes]],
+    progress: Optional[Any] = None,
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Decode (metric name, payload) items, on a process pool of _per_decode_workers()
+    when there are at least _PER_POOL_MIN_PAYLOADS of them. Items are cut into
+    contiguous batches and results are reassembled in input order, so callers apply
+    them exactly as a serial pass would; any pool failure falls back to serial.
+    """
+    total = len(items)
+    counters: Dict[str, Any] = {"cache": {}, "attempts": {}, "workers": 1}
+    workers = min(_per_decode_workers(), max(1, total // 8))
+    if workers > 1 and total >= _PER_POOL_MIN_PAYLOADS:
+        parts = min(total, workers * _PER_BATCHES_PER_WORKER)
+        bounds = [((k * total) // parts, ((k + 1) * total) // parts) for k in range(parts)]
+        try:
+            by_batch: Dict[int, Any] = {}
+            with ProcessPoolExecutor(max_workers=workers, mp_context=_pool_mp_context()) as pool:
+                futures = {pool.submit(_decode_per_batch, items[lo:hi]): k for k, (lo, hi) in enumerate(bounds)}
+                done = 0
+                if progress is not None:
+                    progress("per_decode", done=0, total=total, unit="payloads")
+                for fut in as_completed(futures):
+                    k = futures[fut]
+                    by_batch[k] = fut.result()
+                    done += bounds[k][1] - bounds[k][0]
+                    if progress is not None:
+                        progress("per_decode", done=done, total=total, unit="payloads")
+            out: List[Dict[str, Any]] = []
+            for k in range(parts):
+                rows, cache, attempts = by_batch[k]
+                out.extend(rows)
+                _add_per_counters(counters, cache, attempts)
+            counters["workers"] = workers
+            return out, counters
+        except Exception as e:
+            print(f"[TRP_IMPORT] parallel PER decode unavailable ({e}); decoding serially")
+            counters = {"cache": {}, "attempts": {}, "workers": 1}
+    out, cache, attempts = _decode_per_batch(items, progress=progress, total=total)
+    _add_per_counters(counters, cache, attempts)
+    return out, counters
+
+
 def _extract_neighbor_sample_index(sample: Dict[str, Any]) -> Optional[int]:
     """
     Best-effort extraction of per-sample neighbor array index from decoded sample metadata.
@@ -1340,6 +1673,97 @@ def _extract_neighbor_sample_index(sample: Dict[str, Any]) -> Optional[int]:
     return None
 
 
+# ----------------------------
+# Columnar sample store helpers
+# ----------------------------
+
+_SAMPLE_ROW_BASE_KEYS = frozenset(("time", "t_ms", "name", "value_num", "value_str", "_store_ref"))
+
+
+def _is_per_metric_name(name: str) -> bool:
+    if name in (LTE_MR_METRIC_NAME, LTE_RECFG_METRIC_NAME) or name in LTE_RRC_EXTRA_PER_METRIC_NAMES:
+        return True
+    return "systeminformationblocktype1" in name.lower()
+
+
+def _sample_store_from_rows(rows: List[Dict[str, Any]]) -> SampleStore:
+    """Build a SampleStore from legacy sample dicts (rows without a parsable time are skipped)."""
+    store = SampleStore()
+    for s in rows or []:
+        if not isinstance(s, dict):
+            continue
+        name = str(s.get("name") or "").strip()
+        t_ms = _sample_time_ms(s)
+        if not name or t_ms is None:
+            continue
+        val_str = s.get("value_str")
+        store.append(
+            name,
+            t_ms,
+            _safe_float(s.get("value_num")),
+            None if val_str is None else str(val_str),
+            metric_id=_safe_int(s.get("metric_id")),
+            dtype=s.get("dtype"),
+            lookup=s.get("lookup"),
+            idx=_extract_neighbor_sample_index(s),
+            unit=s.get("unit") or "",
+        )
+    return store
+
+
+def _as_sample_store(kpi_samples: Any) -> SampleStore:
+    if isinstance(kpi_samples, SampleStore):
+        return kpi_samples
+    return _sample_store_from_rows(kpi_samples or [])
+
+
+def _entry_samples(entry: Dict[str, Any]) -> SampleStore:
+    store = entry.get("samples")
+    if isinstance(store, SampleStore):
+        return store
+    store = SampleStore()
+    entry["samples"] = store
+    return store
+
+
+def _slot_index_from_text(value_str: str) -> Optional[int]:
+    """SampleStore string-slot derivation: decoder-produced samples only carry the slot index in their text."""
+    return _extract_neighbor_sample_index({"value_str": value_str})
+
+
+def _materialize_per_rows(store: SampleStore) -> List[Dict[str, Any]]:
+    """Expand only the RRC payload-carrying metrics back into sample dicts for PER decoding."""
+    rows: List[Dict[str, Any]] = []
+    for name, col in store.items():
+        if not _is_per_metric_name(name):
+            continue
+        for chunk in col.chunks():
+            codes = chunk.str_codes
+            if codes is None:
+                continue
+            for j, code in enumerate(codes):
+                if code < 0:
+                    continue
+                v = chunk.values[j]
+                rows.append({
+                    "t_ms": int(chunk.times[j]),
+                    "name": name,
+                    "value_num": None if v != v else v,
+                    "value_str": store.strings[code],
+                    "_store_ref": chunk.base + j,
+                })
+    return rows
+
+
+def _store_per_patches(store: SampleStore, rows: List[Dict[str, Any]]) -> None:
+    for row in rows:
+        col = store.get(str(row.get("name") or ""))
+        ref = row.get("_store_ref")
+        if col is None or not isinstance(ref, int):
+            continue
+        col.set_extra(ref, {k: v for k, v in row.items() if k not in _SAMPLE_ROW_BASE_KEYS})
+
+
 def _run_metric_names(entry: Dict[str, Any]) -> set[str]:
     cached = entry.get("_metric_name_set")
     if isinstance(cached, set):
@@ -1349,10 +1773,7 @@ def _run_metric_names(entry: Dict[str, Any]) -> set[str]:
         nm = str((s or {}).get("signal_name") or "").strip()
         if nm:
             out.add(nm)
-    for s in entry.get("kpi_samples") or []:
-        nm = str((s or {}).get("name") or "").strip()
-        if nm:
-            out.add(nm)
+    out.update(_entry_samples(entry).names())
     entry["_metric_name_set"] = out
     return out
 
@@ -1370,19 +1791,21 @@ def _normalize_neighbor_earfcn_div(entry: Dict[str, Any]) -> int:
     if cached in (1, 2):
         return int(cached)
 
-    samples = entry.get("kpi_samples") or []
     raw_vals: List[int] = []
     serving_vals: set[int] = set()
-    for s in samples:
-        name = str((s or {}).get("name") or "")
+    for name, col in _entry_samples(entry).items():
         low = name.lower()
-        v = _safe_int((s or {}).get("value_num"))
-        if v is None:
-            continue
         if low == LTE_NEIGHBOR_EARFCN_METRICS[0].lower() or low == LTE_NEIGHBOR_EARFCN_METRICS[1].lower():
-            raw_vals.append(int(v))
+            target: Any = raw_vals.append
         elif "radio.lte.servingcell" in low and "earfcn" in low and "neighbor" not in low:
-            serving_vals.add(int(v))
+            target = serving_vals.add
+        else:
+            continue
+        for chunk in col.chunks():
+            for raw in chunk.values:
+                v = _safe_int(raw) if raw == raw else None
+                if v is not None:
+                    target(int(v))
 
     div = 1
     if raw_vals:
@@ -1436,18 +1859,49 @@ def _downsample(series: List[Dict[str, Any]], max_points: int) -> List[Dict[str,
     return dedup
 
 
-def _build_catalog(kpi_samples: List[Dict[str, Any]], decls: Dict[int, Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[str]]:
+def _m4_select(times: Any, values: Any, buckets: int, t_lo: int, t_hi: int) -> List[int]:
+    """
+    Positions kept by an M4 reduction of a time-sorted numeric series: the first, last,
+    minimum and maximum point of each of `buckets` equal time buckets over [t_lo, t_hi],
+    in series order. Drawn as a line at `buckets` pixels wide it looks like the full
+    series, so dips and spikes survive any zoom level.
+    """
+    n = len(times)
+    span = max(1, t_hi - t_lo + 1)
+    keep: List[int] = []
+    a = 0
+    while a < n:
+        # Bucket of times[a] and its end: the first time at or past the next bucket start.
+        b_no = (times[a] - t_lo) * buckets // span
+        b = max(a + 1, bisect.bisect_left(times, t_lo - (-(b_no + 1) * span // buckets), a))
+        part = values[a:b]
+        lo = a + part.index(min(part))
+        hi = a + part.index(max(part))
+        keep.extend(sorted({a, lo, hi, b - 1}))
+        a = b
+    return keep
+
+
+def _column_slices(col: MetricColumns, t_from: Optional[int], t_to: Optional[int]):
+    """(chunk, j_lo, j_hi) slices of a column, restricted to [t_from, t_to] when either bound is given."""
+    if t_from is None and t_to is None:
+        for chunk in col.chunks():
+            yield chunk, 0, len(chunk)
+        return
+    yield from col.window(-(1 << 62) if t_from is None else t_from, (1 << 62) if t_to is None else t_to)
+
+
+def _build_catalog(kpi_samples: Any, decls: Dict[int, Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[str]]:
     # count by name
     counts: Dict[str, int] = {}
     dtype_by_name: Dict[str, str] = {}
     unit_by_name: Dict[str, str] = {}
-    for s in kpi_samples:
-        name = s.get("name") or ""
-        if not name:
+    for name, col in _as_sample_store(kpi_samples).items():
+        if not name or not len(col):
             continue
-        counts[name] = counts.get(name, 0) + 1
-        dtype_by_name[name] = s.get("dtype") or dtype_by_name.get(name, "num")
-        unit_by_name[name] = s.get("unit") or unit_by_name.get(name, "")
+        counts[name] = len(col)
+        dtype_by_name[name] = col.dtype or "num"
+        unit_by_name[name] = col.unit or ""
 
     # Prefer declaration metadata where possible
     signals: List[Dict[str, Any]] = []
@@ -1504,27 +1958,19 @@ def _build_sidebar_groups(kpis: List[str]) -> List[Dict[str, Any]]:
     return groups
 
 
-def _extract_neighbor_metrics_from_samples(kpi_samples: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+def _extract_neighbor_metrics_from_samples(kpi_samples: Any) -> List[Dict[str, Any]]:
     """
     Extract LTE neighbor metrics directly from decoded TRP KPI samples (not from catalog),
     grouped by exact metric name with sample_count.
     """
     pat = re.compile(r"^Radio\.Lte\.Neighbor\[(\d+)\]\.(Pci|Rsrp|Rsrq|Cinr|Earfcn|Frequency)$", re.IGNORECASE)
     rows_by_name: Dict[str, Dict[str, Any]] = {}
-    for s in (kpi_samples or []):
-        name = str((s or {}).get("name") or "").strip()
-        if not name:
-            continue
-        if not pat.match(name):
+    store = _as_sample_store(kpi_samples)
+    for name, col in store.items():
+        if not name or not len(col) or not pat.match(name):
             continue
-        row = rows_by_name.get(name)
-        if row is None:
-            row = {"sample_count": 0, "sample_indexes": set()}
-            rows_by_name[name] = row
-        row["sample_count"] = int(row.get("sample_count") or 0) + 1
-        idx = _extract_neighbor_sample_index(s or {})
-        if idx is not None:
-            row["sample_indexes"].add(int(idx))
+        indexes = {i for chunk in col.chunks() for i in store.chunk_sample_indexes(chunk) if i is not None}
+        rows_by_name[name] = {"sample_count": len(col), "sample_indexes": indexes}
 
     out: List[Dict[str, Any]] = []
     for name, row in rows_by_name.items():
@@ -1710,100 +2156,383 @@ def build_kpi_type_summary(kpi_samples: List[Dict[str, Any]], metric_map: Option
     return {"chosen": chosen, "stats": stats}
 
 
+# ----------------------------
+# Parallel data.cdf decoding
+# ----------------------------
+
+# A data.cdf member is split into at most this many record ranges per worker,
+# each holding at least _CDF_CHUNK_MIN_RECORDS records.
+_CDF_CHUNKS_PER_WORKER = 4
+_CDF_CHUNK_MIN_RECORDS = 20000
+
+
+def _env_row_limit(name: str) -> Optional[int]:
+    """Optional safety cap from the environment; unset or <= 0 means unlimited."""
+    limit = _safe_int(os.environ.get(name, "").strip() or None)
+    return limit if limit and limit > 0 else None
+
+
+def _segment_dir() -> str:
+    """Where this process's sample stores spill their on-disk segments (under OPTIM_TRP_SEGMENT_DIR)."""
+    base = os.environ.get("OPTIM_TRP_SEGMENT_DIR", "").strip() or os.path.join(tempfile.gettempdir(), "optim_trp_segments")
+    return process_spill_dir(base)
+
+
+def _set_run_entry(run_id: int, entry: Dict[str, Any]) -> None:
+    """Install a run entry; a replaced entry's sample store is closed so its segment files go away."""
+    old = _RUNS.get(run_id)
+    _RUNS[run_id] = entry
+    if old is not None and old is not entry:
+        old_samples = old.get("samples")
+        if isinstance(old_samples, SampleStore) and old_samples is not entry.get("samples"):
+            old_samples.close()
+
+
+def _report_cdf_records(progress: Any, base: int, total: Optional[int], records: int) -> None:
+    progress("cdf_decode", done=base + records, total=total, unit="records")
+
+
+def _cdf_decode_workers() -> int:
+    """Worker processes for data.cdf decoding (OPTIM_TRP_DECODE_WORKERS, default: CPU count)."""
+    raw = os.environ.get("OPTIM_TRP_DECODE_WORKERS", "").strip()
+    workers = _safe_int(raw) if raw else None
+    if workers is None:
+        workers = os.cpu_count() or 1
+    return max(1, int(workers))
+
+
+def _split_record_index(offsets: Any, parts: int) -> List[Tuple[int, int]]:
+    """Split a record-boundary index into `parts` contiguous (start, end) byte ranges of similar record counts."""
+    n = len(offsets) - 1
+    parts = max(1, min(parts, n))
+    return [(offsets[(k * n) // parts], offsets[((k + 1) * n) // parts]) for k in range(parts)]
+
+
+def _plan_cdf_chunk_tasks(
+    zf: zipfile.ZipFile,
+    members: List[str],
+    tmp_dir: str,
+    workers: int,
+    progress: Optional[Any] = None,
+) -> List[Tuple[Any, Tuple[Any, ...], List[str], Optional[int]]]:
+    """
+    Inflate each member to a temp file, index its record boundaries and cut it
+    into record ranges. Returns (fn, args, warnings, n_records) tasks in serial order.
+    """
+    tasks: List[Tuple[Any, Tuple[Any, ...], List[str], Optional[int]]] = []
+    for k, member in enumerate(members):
+        if progress is not None:
+            progress("extract", done=k, total=len(members), unit="members")
+        path = os.path.join(tmp_dir, f"data_{k}.cdf")
+        with open(path, "wb") as out_fh:
+            size, warning = inflate_cdf_member_to_file(zf, member, out_fh)
+        offsets = array("q", [0])
+        if size:
+            with open(path, "rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                offsets = index_len_prefixed_records(mm)
+        n_records = len(offsets) - 1
+        parts = min(workers * _CDF_CHUNKS_PER_WORKER, -(-n_records // _CDF_CHUNK_MIN_RECORDS))
+        ranges = _split_record_index(offsets, parts)
+        for j, (start, end) in enumerate(ranges):
+            warnings = [warning] if (warning and j == len(ranges) - 1) else []
+            n = ((j + 1) * n_records) // len(ranges) - (j * n_records) // len(ranges)
+            tasks.append((decode_cdf_record_range, (path, start, end), warnings, n))
+    return tasks
+
+
+def _decode_cdf_providers(
+    trp_path: str,
+    zf: zipfile.ZipFile,
+    decls: Dict[int, Any],
+    lookups: Dict[str, Any],
+    progress: Optional[Any] = None,
+) -> Dict[str, Any]:
+    """
+    Decode every provider data.cdf member, in parallel when workers > 1.
+
+    With one worker each member is streamed from the zip in-process. Otherwise
+    every member is inflated to an mmapped temp file, split at record
+    boundaries into ranges and the ranges are decoded on a process pool (so
+    multiple providers and single large members both use every core).
+
+    Each task decodes into its own SampleStore, which spills large metrics to
+    disk segments under _segment_dir(), so runs are not truncated by memory.
+    The partial stores are merged by timestamp (ties keep serial order) and
+    events are stably sorted by t_ms, so the result is identical for any
+    worker count. The optional OPTIM_TRP_MAX_KPI_ROWS cap is honoured exactly:
+    the task in which the serial budget runs out is re-decoded with the right
+    offset and later tasks are dropped, as a serial walk would.
+
+    progress, when given, is called as progress(phase, done=, total=, unit=)
+    with phase "extract" while members are inflated and "cdf_decode" as
+    records are decoded (per finished range on the pool, every
+    PROGRESS_RECORDS records in-process).
+    """
+    wall0 = time.time()
+    members = list_cdf_data_members(zf)
+    workers = _cdf_decode_workers()
+    kpi_limit = _env_row_limit("OPTIM_TRP_MAX_KPI_ROWS")
+    event_limit = _env_row_limit("OPTIM_TRP_MAX_EVENT_ROWS")
+    store_factory = partial(SampleStore, spill_dir=_segment_dir())
+    with tempfile.TemporaryDirectory(prefix="trp_cdf_") as tmp_dir:
+        if workers > 1 and members:
+            tasks = _plan_cdf_chunk_tasks(zf, members, tmp_dir, workers, progress=progress)
+        else:
+            tasks = [(decode_cdf_member, (trp_path, m), [], None) for m in members]
+        known = [n for _, _, _, n in tasks if n is not None]
+        total_records = sum(known) if len(known) == len(tasks) else None
+        if progress is not None:
+            progress("cdf_decode", done=0, total=total_records, unit="records")
+
+        results: List[Dict[str, Any]] = []
+        if workers > 1 and len(tasks) > 1:
+            try:
+                with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), mp_context=_pool_mp_context()) as pool:
+                    futures = {
+                        pool.submit(fn, *args, decls, lookups, store_factory, kpi_limit=kpi_limit): k
+                        for k, (fn, args, _, _) in enumerate(tasks)
+                    }
+                    by_task: Dict[int, Dict[str, Any]] = {}
+                    done_records = 0
+                    for fut in as_completed(futures):
+                        res = fut.result()
+                        by_task[futures[fut]] = res
+                        done_records += int(res["frames"])
+                        if progress is not None:
+                            progress("cdf_decode", done=done_records, total=total_records, unit="records")
+                    results = [by_task[k] for k in range(len(tasks))]
+            except Exception as e:
+                print(f"[TRP_IMPORT] parallel data.cdf decode unavailable ({e}); decoding serially")
+                results = []
+        if not results:
+            done_records = 0
+            for fn, args, _, _ in tasks:
+                task_progress = None
+                if progress is not None:
+                    task_progress = partial(_report_cdf_records, progress, done_records, total_records)
+                res = fn(*args, decls, lookups, store_factory, kpi_limit=kpi_limit, progress=task_progress)
+                done_records += int(res["frames"])
+                if progress is not None:
+                    progress("cdf_decode", done=done_records, total=total_records, unit="records")
+                results.append(res)
+
+        kept: List[Dict[str, Any]] = []
+        offset = 0
+        for (fn, args, warnings, _), res in zip(tasks, results):
+            if kpi_limit is not None and offset + res["kpiCount"] >= kpi_limit:
+                if offset:
+                    res["store"].close()
+                    res = fn(*args, decls, lookups, store_factory, kpi_offset=offset, kpi_limit=kpi_limit)
+                kept.append(res)
+                break
+            res["warnings"] = res["warnings"] + warnings
+            kept.append(res)
+            offset += res["kpiCount"]
+        for res in results[len(kept):]:
+            res["store"].close()
+
+    samples = SampleStore.merge([r["store"] for r in kept], spill_dir=_segment_dir())
+    samples.set_string_slot_fn(_slot_index_from_text)
+    events: List[Dict[str, Any]] = []
+    for res in kept:
+        events.extend(res["events"])
+    if event_limit is not None:
+        events = events[:event_limit]
+    events.sort(key=lambda ev: _sample_time_ms(ev) or 0)
+
+    wall = time.time() - wall0
+    serial = sum(float(r["elapsed"]) for r in results)
+    speedup = (serial / wall) if wall > 0 else 1.0
+    print(
+        f"[TRP_IMPORT] data.cdf decode providers={len(members)} chunks={len(tasks)} workers={workers} "
+        f"wall={wall:.2f}s serial_equiv={serial:.2f}s speedup={speedup:.2f}x"
+    )
+    return {
+        "samples": samples,
+        "events": events,
+        "frames": sum(int(r["frames"]) for r in kept),
+        "warnings": [w for r in kept for w in r["warnings"]],
+        "stats": {
+            "providers": len(members),
+            "chunks": len(tasks),
+            "workers": workers,
+            "wall_s": round(wall, 3),
+            "serial_equiv_s": round(serial, 3),
+            "speedup": round(speedup, 2),
+        },
+    }
+
+
 # ----------------------------
 # Public API used by server.py
 # ----------------------------
 
-def import_trp_file(trp_path: str, db_path: Optional[str] = None, upload_dir: Optional[str] = None) -> Dict[str, Any]:
+def _no_progress(phase: str, done: Optional[int] = None, total: Optional[int] = None, unit: Optional[str] = None) -> None:
+    return None
+
+
+def _cached_import_result(db_path: Optional[str], content_sha256: str) -> Optional[Dict[str, Any]]:
+    key = (content_sha256, DECODER_VERSION)
+    run_id = _RUNS_BY_DIGEST.get(key)
+    if run_id is None and persist_enabled(db_path):
+        try:
+            run_id = find_run_by_digest(db_path, content_sha256, DECODER_VERSION)
+        except Exception as exc:
+            print(f"[TRP_IMPORT] run store unavailable for the import cache: {exc}")
+    if run_id is None:
+        return None
+    entry = _get_run_entry(db_path, run_id)
+    if entry is None:
+        return None
+    _RUNS_BY_DIGEST[key] = run_id
+    meta = entry["run"].get("metadata") or {}
+    return {
+        "runId": run_id,
+        "kpi_count": int(meta.get("decoded_kpis") or 0),
+        "event_count": int(meta.get("decoded_events") or 0),
+        "track_count": int(meta.get("track_points") or 0),
+        "cached": True,
+        "message": "Already imported (same file, same decoder version)",
+    }
+
+
+def import_trp_file(
+    trp_path: str,
+    db_path: Optional[str] = None,
+    upload_dir: Optional[str] = None,
+    content_sha256: Optional[str] = None,
+    force: bool = False,
+    progress: Optional[Any] = None,
+    filename: Optional[str] = None,
+) -> Dict[str, Any]:
     """
-    Decode TRP and store in memory.
+    Decode TRP and store in memory; with persistence enabled (see trp_run_store.persist_enabled)
+    the run is also written to the run store at db_path. filename is the name the run is listed
+    under (default: the basename of trp_path, which for uploads is a content-addressed name).
+
+    content_sha256 (the uploaded file's digest) enables the import cache: when a run was
+    already imported from identical content by the same DECODER_VERSION its id is returned
+    without decoding, unless force is set.
 
-    db_path is ignored (kept for compatibility with previous sqlite/turso variants).
+    progress, when given, is called as progress(phase, done=None, total=None, unit=None) at
+    every phase boundary (extract, cdf_decode, per_decode, index_build, track, store) and
+    with record/payload counts inside the long phases; see start_import_job.
     """
     global _NEXT_ID
 
     t0 = time.time()
-    run_id = _NEXT_ID
-    _NEXT_ID += 1
-
-    filename = os.path.basename(trp_path)
+    if progress is None:
+        progress = _no_progress
+    if content_sha256 and not force:
+        cached = _cached_import_result(db_path, content_sha256)
+        if cached is not None:
+            print(f"[TRP_IMPORT] {trp_path} matches run {cached['runId']} (sha256 {content_sha256[:12]}), decode skipped")
+            return cached
+
+    persist = persist_enabled(db_path)
+    with _RUNS_LOCK:
+        if persist:
+            try:
+                _NEXT_ID = max(_NEXT_ID, max_stored_run_id(db_path) + 1)
+            except Exception as exc:
+                print(f"[TRP_IMPORT] run store unavailable, run ids may collide: {exc}")
+        run_id = _NEXT_ID
+        _NEXT_ID += 1
+
+    filename = os.path.basename(filename or trp_path)
 
     print(f"[TRP_IMPORT] ENTER {trp_path}")
-    extract_dir = tempfile.mkdtemp(prefix="trp_extract_")
-    try:
-        print(f"[TRP_IMPORT] extracting -> {extract_dir}")
-        with zipfile.ZipFile(trp_path, "r") as zf:
-            zf.extractall(extract_dir)
-
-        extracted_root = extract_dir  # decoder expects extracted root dir
-
+    # Members are streamed straight out of the zip; nothing is extracted to disk.
+    with zipfile.ZipFile(trp_path, "r") as zf:
         # CDF declarations/lookups
-        decls, unknown_decl_records = parse_declarations_cdf(os.path.join(extracted_root, "trp/providers/sp1/cdf/declarations.cdf"))
-        lookups = parse_lookup_tables_cdf(os.path.join(extracted_root, "trp/providers/sp1/cdf/lookuptables.cdf"))
+        progress("extract")
+        decls, unknown_decl_records = parse_declarations_cdf(read_cdf_member(zf, "trp/providers/sp1/cdf/declarations.cdf"))
+        lookups = parse_lookup_tables_cdf(read_cdf_member(zf, "trp/providers/sp1/cdf/lookuptables.cdf"))
         print(f"[TRP_IMPORT] parsed CDF declarations: {len(decls)}  lookups: {len(lookups)}  unknown_decl_records: {len(unknown_decl_records)}  ({time.time()-t0:.2f}s)")
 
         # Decode KPI samples from data.cdf (this gives the big KPI set)
         dec0 = time.time()
-        decoded = decode_cdf_data_variant(extracted_root, decls, lookups, base_time_iso=None)
-        kpi_samples = decoded.get("kpiSamples") or []
-        events = decoded.get("events") or []
-        frames = decoded.get("frames")
-        print(f"[TRP_IMPORT] decoded from data.cdf kpis={len(kpi_samples)} events={len(events)} frames={frames} ({time.time()-dec0:.2f}s)")
+        decoded = _decode_cdf_providers(trp_path, zf, decls, lookups, progress=progress)
+        samples = decoded["samples"]
+        events = decoded["events"]
+        frames = decoded["frames"]
+        print(f"[TRP_IMPORT] decoded from data.cdf kpis={len(samples)} events={len(events)} frames={frames} ({time.time()-dec0:.2f}s)")
 
         per0 = time.time()
-        per_stats = _decode_lte_rrc_payloads_in_place(kpi_samples, events)
+        per_rows = _materialize_per_rows(samples)
+        progress("per_decode", done=0, total=len(per_rows), unit="payloads")
+        rrc_messages = RrcMessageTable(compress=_rrc_compress_enabled())
+        per_stats = _decode_lte_rrc_payloads_in_place(
+            per_rows, events, progress=progress, deferred=_per_decode_mode() == "deferred", messages=rrc_messages,
+        )
+        per_stats["rrc_messages"] = rrc_messages.memory_report()
+        _store_per_patches(samples, per_rows)
+        del per_rows
         print(
             "[TRP_IMPORT] PER decode "
             f"MR {per_stats.get('measurement_reports_decoded', 0)}/{per_stats.get('measurement_reports_seen', 0)} "
             f"Recfg {per_stats.get('reconfig_decoded', 0)}/{per_stats.get('reconfig_seen', 0)} "
             f"Extra {per_stats.get('rrc_extra_decoded', 0)}/{per_stats.get('rrc_extra_seen', 0)} "
+            f"(deferred {per_stats.get('rrc_extra_deferred', 0)}) "
             f"({time.time()-per0:.2f}s)"
         )
+        progress("index_build")
         sn0 = time.time()
-        serving_neighbors_index = build_serving_neighbors_index(events)
+        serving_neighbors_index = build_serving_neighbors_index(events, _rrc_decoded_lookup(rrc_messages))
         print(
             "[TRP_IMPORT] serving-neighbor index "
             f"built warnings={len(serving_neighbors_index.warnings)} ({time.time()-sn0:.2f}s)"
         )
 
-        sidebar_info = _extract_sidebar_info(kpi_samples, events)
-        l1l2_scheduler_index = build_l1l2_scheduler_index(kpi_samples, events)
+        sidebar_info = _extract_sidebar_info(samples, events, rrc_messages)
+        l1l2_scheduler_index = build_l1l2_scheduler_index(samples, events)
+        series_pyramids = {name: build_series_pyramid(col) for name, col in samples.items()}
 
         # Track points
+        progress("track")
         tr0 = time.time()
-        track_path = os.path.join(extracted_root, "trp/positions/wptrack.xml")
         track_points = []
-        if os.path.exists(track_path):
-            track_points = parse_track_xml(track_path) or []
+        try:
+            with zf.open("trp/positions/wptrack.xml") as track_fh:
+                track_points = parse_track_xml(track_fh) or []
+        except KeyError:
+            pass
         print(f"[TRP_IMPORT] parsed track_points={len(track_points)} ({time.time()-tr0:.2f}s)")
 
         # Catalog + sidebar
-        signals, kpis = _build_catalog(kpi_samples, decls)
+        signals, kpis = _build_catalog(samples, decls)
         sidebar_groups = _build_sidebar_groups(kpis)
+        t_lo, t_hi = samples.time_bounds()
 
         run = {
             "id": run_id,
             "filename": filename,
             "imported_at": _now_iso(),
-            "start_time": decoded.get("start_time") or "",
-            "end_time": decoded.get("end_time") or "",
+            "start_time": decoded.get("start_time") or _epoch_ms_to_iso(t_lo) or "",
+            "end_time": decoded.get("end_time") or _epoch_ms_to_iso(t_hi) or "",
             "metadata": {
-                "decoded_kpis": len(kpi_samples),
+                "decoded_kpis": len(samples),
+                "sample_store": samples.memory_report(),
                 "decoded_events": len(events),
                 "decoded_frames": frames,
+                "cdf_decode": decoded["stats"],
                 "track_points": len(track_points),
                 "per_decode": per_stats,
                 "serving_neighbors_index_warnings": len(serving_neighbors_index.warnings),
                 "sidebar_info_fields": sorted(list(sidebar_info.keys())),
                 "l1l2_fields_available": sorted(list((l1l2_scheduler_index.get("fields") or {}).keys())),
+                "series_pyramids": pyramid_memory_report(series_pyramids),
+                "decoder_version": DECODER_VERSION,
+                "source_sha256": content_sha256,
             },
         }
 
         # Store
-        _RUNS[run_id] = {
+        _set_run_entry(run_id, {
             "run": run,
-            "kpi_samples": kpi_samples,
+            "samples": samples,
             "events": events,
+            "rrc_messages": rrc_messages,
             "track_points": track_points,
             "catalog": {
                 "signals": signals,
@@ -1816,51 +2545,236 @@ def import_trp_file(trp_path: str, db_path: Optional[str] = None, upload_dir: Op
             },
             "serving_neighbors_index": serving_neighbors_index,
             "l1l2_scheduler_index": l1l2_scheduler_index,
-        }
+            "series_pyramids": series_pyramids,
+        })
+
+        # Neighbor frames for the UI's default bucketMs, so the first scrub is a lookup too.
+        nt0 = time.time()
+        neighbor_timeline = _get_neighbor_timeline(_RUNS[run_id], NEIGHBOR_TIMELINE_DEFAULT_MS)
+        print(f"[TRP_IMPORT] neighbor timeline frames={len(neighbor_timeline.centers)} ({time.time()-nt0:.2f}s)")
+
+        if content_sha256:
+            _RUNS_BY_DIGEST[(content_sha256, DECODER_VERSION)] = run_id
+
+        message = "Decode completed (in-memory data.cdf)"
+        if persist:
+            progress("store")
+            st0 = time.time()
+            try:
+                save_run(db_path, run_id, _RUNS[run_id])
+                message = "Decode completed (stored)"
+                print(f"[TRP_IMPORT] run {run_id} stored ({time.time()-st0:.2f}s)")
+            except Exception as exc:
+                print(f"[TRP_IMPORT] run {run_id} not stored: {exc}")
 
         return {
             "runId": run_id,
-            "kpi_count": len(kpi_samples),
+            "kpi_count": len(samples),
             "event_count": len(events),
             "track_count": len(track_points),
-            "message": "Decode completed (in-memory data.cdf)",
+            "cached": False,
+            "message": message,
         }
-    finally:
-        # Keep extracted dir? no, remove to avoid /var/folders bloat
+
+
+# ----------------------------
+# Background import jobs
+# ----------------------------
+
+IMPORT_PHASES = ("extract", "cdf_decode", "per_decode", "index_build", "track", "store")
+
+_JOBS: Dict[str, Dict[str, Any]] = {}
+_JOBS_LOCK = threading.Lock()
+_JOB_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_MAX_JOBS_KEPT = 200
+
+
+class _ImportJobProgress:
+    """progress callback for import_trp_file that records phase, counts, rate and ETA on a job dict."""
+
+    def __init__(self, job: Dict[str, Any]) -> None:
+        self.job = job
+        self.phase_t0 = time.time()
+
+    def __call__(self, phase: str, done: Optional[int] = None, total: Optional[int] = None, unit: Optional[str] = None) -> None:
+        now = time.time()
+        with _JOBS_LOCK:
+            job = self.job
+            if phase != job["phase"]:
+                if job["phase"] in IMPORT_PHASES:
+                    job["phases"].append({"phase": job["phase"], "seconds": round(now - self.phase_t0, 3)})
+                job["phase"] = phase
+                job["progress"] = {}
+                self.phase_t0 = now
+            prog = job["progress"]
+            if unit is not None:
+                prog["unit"] = unit
+            if total is not None:
+                prog["total"] = int(total)
+            if done is not None:
+                prog["done"] = int(done)
+                elapsed = now - self.phase_t0
+                rate = (done / elapsed) if elapsed > 0 else None
+                prog["rate_per_s"] = round(rate, 1) if rate else None
+                remaining = (prog["total"] - done) if prog.get("total") is not None else None
+                prog["eta_s"] = round(remaining / rate, 1) if (rate and remaining is not None) else None
+            job["updated_at"] = _now_iso()
+
+    def finish(self, status: str, **fields: Any) -> None:
+        now = time.time()
+        with _JOBS_LOCK:
+            job = self.job
+            if job["phase"] in IMPORT_PHASES:
+                job["phases"].append({"phase": job["phase"], "seconds": round(now - self.phase_t0, 3)})
+            job["phase"] = status
+            job["status"] = status
+            job["progress"] = {}
+            job["elapsed_s"] = round(now - job["_t0"], 3)
+            job["updated_at"] = _now_iso()
+            job.update(fields)
+
+
+def _import_job_workers() -> int:
+    """Concurrent background imports (OPTIM_TRP_IMPORT_JOBS, default 1; each decode already uses a process pool)."""
+    return max(1, _safe_int(os.environ.get("OPTIM_TRP_IMPORT_JOBS", "").strip() or None) or 1)
+
+
+def _run_import_job(job: Dict[str, Any], tracker: _ImportJobProgress, kwargs: Dict[str, Any]) -> None:
+    with _JOBS_LOCK:
+        job["status"] = "running"
+        job["_t0"] = time.time()
+    try:
+        result = import_trp_file(progress=tracker, **kwargs)
+    except Exception as exc:
+        print(f"[TRP_IMPORT] job {job['jobId']} failed: {exc}")
+        tracker.finish("error", message=str(exc))
+        return
+    tracker.finish("done", runId=result.get("runId"), result=result)
+
+
+def start_import_job(
+    trp_path: str,
+    db_path: Optional[str] = None,
+    upload_dir: Optional[str] = None,
+    content_sha256: Optional[str] = None,
+    force: bool = False,
+    filename: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Queue import_trp_file on a background worker and return the job status
+    immediately; poll it with fetch_import_job(jobId).
+    """
+    global _JOB_EXECUTOR
+
+    job_id = os.urandom(8).hex()
+    job: Dict[str, Any] = {
+        "jobId": job_id,
+        "status": "queued",
+        "phase": "queued",
+        "phases": [],
+        "progress": {},
+        "filename": os.path.basename(filename or trp_path),
+        "created_at": _now_iso(),
+        "updated_at": _now_iso(),
+        "_t0": time.time(),
+    }
+    tracker = _ImportJobProgress(job)
+    kwargs = {
+        "trp_path": trp_path,
+        "db_path": db_path,
+        "upload_dir": upload_dir,
+        "content_sha256": content_sha256,
+        "force": force,
+        "filename": filename,
+    }
+    with _JOBS_LOCK:
+        _JOBS[job_id] = job
+        for old_id in list(_JOBS)[:-_MAX_JOBS_KEPT]:
+            if _JOBS[old_id]["status"] in ("done", "error"):
+                del _JOBS[old_id]
+        if _JOB_EXECUTOR is None:
+            _JOB_EXECUTOR = ThreadPoolExecutor(max_workers=_import_job_workers(), thread_name_prefix="trp-import")
+        executor = _JOB_EXECUTOR
+    executor.submit(_run_import_job, job, tracker, kwargs)
+    return fetch_import_job(job_id)
+
+
+def fetch_import_job(job_id: str) -> Dict[str, Any]:
+    with _JOBS_LOCK:
+        job = _JOBS.get(str(job_id))
+        if job is None:
+            return {"status": "error", "message": "Job not found"}
+        out = {k: v for k, v in job.items() if not k.startswith("_")}
+        out["phases"] = list(job["phases"])
+        out["progress"] = dict(job["progress"])
+        if job["status"] in ("queued", "running"):
+            out["elapsed_s"] = round(time.time() - job["_t0"], 3)
+    out["state"] = out.pop("status")
+    out["status"] = "error" if out["state"] == "error" else "success"
+    return out
+
+
+def _get_run_entry(db_path: Optional[str], run_id: int) -> Optional[Dict[str, Any]]:
+    """In-memory run entry, rehydrated from the run store on first access when persistence is enabled."""
+    rid = int(run_id)
+    entry = _RUNS.get(rid)
+    if entry is not None or not persist_enabled(db_path):
+        return entry
+    with _RUNS_LOCK:
+        entry = _RUNS.get(rid)
+        if entry is not None:
+            return entry
+        t0 = time.time()
         try:
-            import shutil
-            shutil.rmtree(extract_dir, ignore_errors=True)
-        except Exception:
-            pass
+            entry = load_run(db_path, rid, spill_dir=_segment_dir(), compress_messages=_rrc_compress_enabled())
+        except Exception as exc:
+            print(f"[TRP_IMPORT] run {rid} could not be loaded from the run store: {exc}")
+            return None
+        if entry is None:
+            return None
+        entry["samples"].set_string_slot_fn(_slot_index_from_text)
+        _apply_stored_event_decodes(entry)
+        _set_run_entry(rid, entry)
+        print(f"[TRP_IMPORT] run {rid} rehydrated from the run store ({time.time()-t0:.2f}s)")
+        return entry
 
 
 def list_runs(db_path: Optional[str] = None) -> List[Dict[str, Any]]:
-    return [v["run"] for k, v in sorted(_RUNS.items(), key=lambda kv: kv[0])]
+    runs = {k: v["run"] for k, v in _RUNS.items()}
+    if persist_enabled(db_path):
+        try:
+            for run in list_stored_runs(db_path):
+                runs.setdefault(int(run.get("id") or 0), run)
+        except Exception as exc:
+            print(f"[TRP_IMPORT] run store unavailable: {exc}")
+    return [runs[k] for k in sorted(runs)]
 
 
 def fetch_run_detail(db_path: Optional[str], run_id: int) -> Tuple[Dict[str, Any], List[Dict[str, Any]], List[Dict[str, Any]]]:
     rid = int(run_id)
-    if rid not in _RUNS:
+    entry = _get_run_entry(db_path, rid)
+    if entry is None:
         raise KeyError("Run not found")
-    entry = _RUNS[rid]
     run = entry["run"]
     track = entry.get("track_points") or []
-    events = entry.get("events") or []
+    messages = entry.get("rrc_messages")
+    events = [_event_for_api(ev, messages) for ev in entry.get("events") or []]
     return run, track, events
 
 
 def fetch_run_catalog(db_path: Optional[str], run_id: int) -> Dict[str, Any]:
     rid = int(run_id)
-    if rid not in _RUNS:
+    entry = _get_run_entry(db_path, rid)
+    if entry is None:
         return {"status": "error", "message": "Run not found"}
-    return _build_catalog_payload(_RUNS[rid])
+    return _build_catalog_payload(entry)
 
 
 def fetch_run_sidebar(db_path: Optional[str], run_id: int) -> Dict[str, Any]:
     rid = int(run_id)
-    if rid not in _RUNS:
+    entry = _get_run_entry(db_path, rid)
+    if entry is None:
         return {"status": "error", "message": "Run not found"}
-    entry = _RUNS[rid]
     sidebar = entry.get("sidebar") or {}
     info = sidebar.get("info")
     refresh_info = (not isinstance(info, dict) or not info)
@@ -1871,7 +2785,7 @@ def fetch_run_sidebar(db_path: Optional[str], run_id: int) -> Dict[str, Any]:
         if (not has_combo_txt) and (not has_combo_list):
             refresh_info = True
     if refresh_info:
-        rebuilt = _extract_sidebar_info(entry.get("kpi_samples") or [], entry.get("events") or [])
+        rebuilt = _extract_sidebar_info(_entry_samples(entry), entry.get("events") or [], entry.get("rrc_messages"))
         if rebuilt:
             info = rebuilt
             sidebar["info"] = info
@@ -1879,7 +2793,7 @@ def fetch_run_sidebar(db_path: Optional[str], run_id: int) -> Dict[str, Any]:
 
     catalog = _build_catalog_payload(entry)
     metrics_flat = catalog.get("metricsFlat") or []
-    neighbor_metrics = _extract_neighbor_metrics_from_samples(entry.get("kpi_samples") or [])
+    neighbor_metrics = _extract_neighbor_metrics_from_samples(_entry_samples(entry))
     kpis = []
     for m in metrics_flat:
         stats = m.get("stats") or {}
@@ -1906,23 +2820,231 @@ def fetch_run_sidebar(db_path: Optional[str], run_id: int) -> Dict[str, Any]:
 
 def fetch_run_signals(db_path: Optional[str], run_id: int) -> Dict[str, Any]:
     rid = int(run_id)
-    if rid not in _RUNS:
+    entry = _get_run_entry(db_path, rid)
+    if entry is None:
         return {"status": "error", "message": "Run not found"}
-    return {"status": "success", "signals": _RUNS[rid]["catalog"].get("signals", [])}
+    return {"status": "success", "signals": entry["catalog"].get("signals", [])}
 
 
 def fetch_run_track(db_path: Optional[str], run_id: int) -> Dict[str, Any]:
     rid = int(run_id)
-    if rid not in _RUNS:
+    entry = _get_run_entry(db_path, rid)
+    if entry is None:
         return {"status": "error", "message": "Run not found"}
-    return {"status": "success", "track": _RUNS[rid].get("track_points", [])}
+    return {"status": "success", "track": entry.get("track_points", [])}
 
 
 def fetch_run_events(db_path: Optional[str], run_id: int) -> Dict[str, Any]:
     rid = int(run_id)
-    if rid not in _RUNS:
+    entry = _get_run_entry(db_path, rid)
+    if entry is None:
         return {"status": "error", "message": "Run not found"}
-    return {"status": "success", "events": _RUNS[rid].get("events", [])}
+    messages = entry.get("rrc_messages")
+    return {"status": "success", "events": [_event_for_api(ev, messages) for ev in entry.get("events") or []]}
+
+
+def _deferred_event_payload(entry: Dict[str, Any], ev: Dict[str, Any]) -> bytes:
+    """PER payload of a deferred event: its sample (per_sample_ref) or the per_payload_hex copy."""
+    ref = ev.get("per_sample_ref")
+    if isinstance(ref, int):
+        store = _entry_samples(entry)
+        col = store.get(str(ev.get("event_name") or ""))
+        if col is None or not 0 <= ref < len(col):
+            return b""
+        return _sample_payload_bytes({"value_str": store.value_str(col, ref)}) or b""
+    try:
+        return bytes.fromhex(str(ev.get("per_payload_hex") or ""))
+    except ValueError:
+        return b""
+
+
+def _apply_deferred_decode(entry: Dict[str, Any], ev: Dict[str, Any], payload: bytes, dec: Dict[str, Any]) -> None:
+    patch, params_patch = _per_result_patches(str(ev.get("event_name") or ""), payload, dec, entry.get("rrc_messages"))
+    for key in ("per_deferred", "per_sample_ref", "per_payload_hex"):
+        ev.pop(key, None)
+    _attach_patch_to_event(ev, patch, params_patch)
+
+
+def _apply_stored_event_decodes(entry: Dict[str, Any]) -> None:
+    """Re-apply the on-demand decodes load_run returned (entry["event_decodes"]) to their deferred events."""
+    events = entry.get("events") or []
+    for idx, dec in (entry.pop("event_decodes", None) or {}).items():
+        if 0 <= idx < len(events) and isinstance(events[idx], dict) and events[idx].get("per_deferred"):
+            ev = events[idx]
+            _apply_deferred_decode(entry, ev, _deferred_event_payload(entry, ev), dec)
+
+
+def fetch_event_decode(db_path: Optional[str], run_id: int, event_index: int) -> Dict[str, Any]:
+    """
+    One event of the run, PER-decoding it first when the import deferred it
+    (OPTIM_TRP_PER_MODE=deferred). The decode is applied to the in-memory event, so later
+    calls and event listings return it without decoding again, and, when runs are persisted,
+    recorded in the run store so a rehydrated run comes back with it applied.
+    """
+    rid = int(run_id)
+    entry = _get_run_entry(db_path, rid)
+    if entry is None:
+        return {"status": "error", "message": "Run not found"}
+    events = entry.get("events") or []
+    idx = int(event_index)
+    if idx < 0 or idx >= len(events) or not isinstance(events[idx], dict):
+        return {"status": "error", "message": "Event not found"}
+    ev = events[idx]
+    decoded_now = False
+    if ev.get("per_deferred"):
+        payload = _deferred_event_payload(entry, ev)
+        dec = _decode_per_payload(str(ev.get("event_name") or ""), payload) if payload else {"ok": False, "message": "empty payload"}
+        _apply_deferred_decode(entry, ev, payload, dec)
+        decoded_now = True
+        if persist_enabled(db_path):
+            try:
+                save_event_decode(db_path, rid, idx, dec)
+            except Exception as exc:
+                print(f"[TRP_IMPORT] run {rid} event {idx} decode could not be stored: {exc}")
+    return {
+        "status": "success",
+        "eventIndex": idx,
+        "decodedNow": decoded_now,
+        "perDecoded": bool(ev.get("per_decoded")),
+        "event": _event_for_api(ev, entry.get("rrc_messages")),
+    }
+
+
+def _series_pyramid(entry: Dict[str, Any], col: MetricColumns) -> Optional[SeriesPyramid]:
+    """Min/max pyramid of a metric column, built on first use for runs loaded from the store."""
+    pyramids = entry.setdefault("series_pyramids", {})
+    if col.name not in pyramids:
+        pyramids[col.name] = build_series_pyramid(col)
+    return pyramids[col.name]
+
+
+def _series_budget(max_points: int, width: Optional[int]) -> Tuple[Optional[int], Optional[int]]:
+    """(point budget, M4 buckets) of a series query; None budget means unlimited."""
+    budget = max_points if max_points > 0 else None
+    buckets = None
+    if width is not None and width > 0:
+        buckets = max(1, min(int(width), (budget or 4 * int(width)) // 4 or 1))
+        budget = min(budget or 4 * buckets, 4 * buckets)
+    return budget, buckets
+
+
+def _series_range(t_from: Any, t_to: Any) -> Optional[Tuple[Optional[int], Optional[int]]]:
+    """Epoch ms bounds of a series query, or None when a given bound does not parse."""
+    lo = _to_epoch_ms(t_from) if _has_value(t_from) else None
+    hi = _to_epoch_ms(t_to) if _has_value(t_to) else None
+    if (_has_value(t_from) and lo is None) or (_has_value(t_to) and hi is None):
+        return None
+    return lo, hi
+
+
+def _pyramid_series(
+    entry: Dict[str, Any],
+    col: MetricColumns,
+    lo: Optional[int],
+    hi: Optional[int],
+    budget: Optional[int],
+    buckets: Optional[int],
+) -> Optional[Tuple[array, array, Any, Dict[str, Any]]]:
+    """(times, values, kept positions, reduction) drawn from the column's pyramid, or None to read the samples."""
+    if not budget or budget < 4:
+        return None
+    pyramid = _series_pyramid(entry, col)
+    if pyramid is None:
+        return None
+    source_points = pyramid.source_points(lo, hi)
+    buckets = buckets or budget // 4
+    picked = pyramid.choose(lo, hi, buckets) if source_points > budget else None
+    if picked is None:
+        return None
+    level, i0, i1 = picked
+    times, values = pyramid.points(level, i0, i1, lo, hi)
+    keep: Any = range(len(times))
+    if len(times) > budget:
+        keep = _m4_select(times, values, buckets, times[0] if lo is None else lo, times[-1] if hi is None else hi)
+    reduction = {"method": "pyramid", "level_ms": level.bucket_ms, "buckets": buckets, "source_points": source_points}
+    return times, values, keep, reduction
+
+
+def _select_series(
+    store: SampleStore,
+    col: Optional[MetricColumns],
+    lo: Optional[int],
+    hi: Optional[int],
+    idxs: Any,
+) -> Dict[Optional[int], Tuple[array, array, array, Dict[int, str]]]:
+    """
+    Samples of one column in [lo, hi] for each requested slot index (None: every sample), in a
+    single pass. Each selection is (times, values, offsets, texts) with text rows in `texts` by
+    position; the response rows are only built for the points that are returned.
+    """
+    out = {i: (array("q"), array("d"), array("q"), {}) for i in idxs}
+    if col is None:
+        return out
+    every = out.get(None)
+    slots = {i: sel for i, sel in out.items() if i is not None}
+    for chunk, j_lo, j_hi in _column_slices(col, lo, hi):
+        codes = chunk.str_codes
+        numeric = col.dtype != "str" and (codes is None or col.dtype)
+        if every is not None and numeric:
+            # Numeric samples only: keep every non-NaN value without a per-sample loop.
+            times, values, offsets, _ = every
+            part = chunk.values[j_lo:j_hi]
+            mask = [v == v for v in part]
+            span = range(chunk.base + j_lo, chunk.base + j_hi)
+            if all(mask):
+                times.extend(chunk.times[j_lo:j_hi])
+                values.extend(part)
+                offsets.extend(array("q", span))
+            else:
+                times.extend(compress(chunk.times[j_lo:j_hi], mask))
+                values.extend(compress(part, mask))
+                offsets.extend(compress(span, mask))
+            if not slots:
+                continue
+        for j in range(j_lo, j_hi):
+            targets = []
+            if every is not None and not numeric:
+                targets.append(every)
+            if slots:
+                sel = slots.get(store.chunk_sample_index(chunk, j))
+                if sel is not None:
+                    targets.append(sel)
+            if not targets:
+                continue
+            val = chunk.values[j]
+            val_str = store.string(codes[j]) if codes is not None else None
+            dtype = col.dtype or ("str" if val_str is not None else "num")
+            if val != val and (val_str is None or dtype != "str"):
+                continue
+            for times, values, offsets, texts in targets:
+                if dtype == "str":
+                    texts[len(times)] = str(val_str)
+                times.append(chunk.times[j])
+                values.append(val)
+                offsets.append(chunk.base + j)
+    return out
+
+
+def _reduce_selection(
+    times: array,
+    values: array,
+    texts: Dict[int, str],
+    lo: Optional[int],
+    hi: Optional[int],
+    budget: Optional[int],
+    buckets: Optional[int],
+) -> Tuple[Any, Optional[Dict[str, Any]]]:
+    """Positions of a selection to return and the reduction applied (None when all are kept)."""
+    n = len(times)
+    budget = budget or n
+    if n <= budget:
+        return range(n), None
+    if texts or budget < 4:
+        # M4 keeps up to 4 points per bucket; text series (and budgets under 4) are thinned evenly.
+        return _downsample(list(range(n)), budget), None
+    buckets = buckets or max(1, budget // 4)
+    keep = _m4_select(times, values, buckets, times[0] if lo is None else lo, times[-1] if hi is None else hi)
+    return keep, {"method": "m4", "buckets": buckets, "source_points": n}
 
 
 def fetch_timeseries_by_signal(
@@ -1931,38 +3053,149 @@ def fetch_timeseries_by_signal(
     signal: str,
     max_points: int = 50000,
     idx: Optional[int] = None,
+    t_from: Any = None,
+    t_to: Any = None,
+    width: Optional[int] = None,
 ) -> Dict[str, Any]:
+    """
+    One signal's samples, optionally limited to [t_from, t_to] (ISO or epoch ms) and
+    reduced for a chart `width` pixels wide. Numeric series over the budget (max_points,
+    and 4 * width when given) are drawn from the signal's pyramid when a level has
+    enough buckets in the range, otherwise M4-reduced over the requested range only;
+    text series are evenly downsampled.
+    """
     rid = int(run_id)
-    if rid not in _RUNS:
+    entry = _get_run_entry(db_path, rid)
+    if entry is None:
         return {"status": "error", "message": "Run not found"}
     signal = (signal or "").strip()
     if not signal:
         return {"status": "error", "message": "Missing signal"}
-
-    samples = _RUNS[rid].get("kpi_samples", [])
+    bounds = _series_range(t_from, t_to)
+    if bounds is None:
+        return {"status": "error", "message": "Bad time range"}
+    lo, hi = bounds
+
+    store = _entry_samples(entry)
+    col = store.get(signal)
+    budget, buckets = _series_budget(max_points, width)
+    unit = col.unit or "" if col is not None else ""
+    result: Dict[str, Any] = {"status": "success"}
+    if lo is not None or hi is not None:
+        result["range"] = {"from": _epoch_ms_to_iso(lo), "to": _epoch_ms_to_iso(hi)}
+
+    overview = _pyramid_series(entry, col, lo, hi, budget, buckets) if col is not None and idx is None else None
+    if overview is not None:
+        times, values, keep, reduction = overview
+        result["series"] = [{"t": _epoch_ms_to_iso(times[k]), "value": values[k], "unit": unit, "idx": None} for k in keep]
+        result["reduction"] = reduction
+        return result
+
+    times, values, offsets, texts = _select_series(store, col, lo, hi, (idx,))[idx]
+    keep, reduction = _reduce_selection(times, values, texts, lo, hi, budget, buckets)
     out: List[Dict[str, Any]] = []
-    for s in samples:
-        if s.get("name") != signal:
-            continue
-        sample_idx = _extract_neighbor_sample_index(s or {})
-        if idx is not None and sample_idx != idx:
-            continue
-        t = s.get("time") or s.get("t") or s.get("timestamp") or ""
-        val = s.get("value_num")
-        val_str = s.get("value_str")
-        dtype = s.get("dtype") or ("str" if val_str is not None else "num")
-        unit = s.get("unit") or ""
-        if val is None and val_str is None:
+    for k in keep:
+        t = _epoch_ms_to_iso(times[k])
+        sample_idx = store.sample_index(col, offsets[k])
+        if k in texts:
+            out.append({"t": t, "value_str": texts[k], "unit": unit, "idx": sample_idx})
+        else:
+            out.append({"t": t, "value": values[k], "unit": unit, "idx": sample_idx})
+    result["series"] = out
+    if reduction is not None:
+        result["reduction"] = reduction
+    return result
+
+
+def fetch_timeseries_batch(
+    db_path: Optional[str],
+    run_id: int,
+    signals: Any,
+    max_points: int = 50000,
+    t_from: Any = None,
+    t_to: Any = None,
+    width: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Several series of one run in one response. Each item of `signals` is a signal name or
+    {"signal", "idx", "from", "to", "max_points", "width"}; missing keys take the call's
+    defaults. Items on the same signal and range share one read of that column (neighbor
+    slots of a dashboard are split out of a single pass), and each series is returned as
+    columns: "t" (epoch ms), "value", plus "sample_idx" for unfiltered reads of the samples
+    and "value_str" when the series has text rows.
+    """
+    rid = int(run_id)
+    entry = _get_run_entry(db_path, rid)
+    if entry is None:
+        return {"status": "error", "message": "Run not found"}
+    if not isinstance(signals, list) or not signals:
+        return {"status": "error", "message": "signals array is required"}
+
+    store = _entry_samples(entry)
+    queries: List[Dict[str, Any]] = []
+    for item in signals:
+        spec = item if isinstance(item, dict) else {"signal": item}
+        query: Dict[str, Any] = {"signal": str(spec.get("signal") or spec.get("name") or "").strip()}
+        query["idx"] = _safe_int(spec.get("idx"))
+        bounds = _series_range(spec.get("from", t_from), spec.get("to", t_to))
+        if not query["signal"]:
+            query["error"] = "Missing signal"
+        elif bounds is None:
+            query["error"] = "Bad time range"
+        else:
+            query["bounds"] = bounds
+            points = _safe_int(spec.get("max_points", max_points))
+            query["budget"] = _series_budget(max_points if points is None else points, _safe_int(spec.get("width", width)))
+        queries.append(query)
+
+    # One pass per (signal, range) for all the slot indexes asked of it.
+    wanted: Dict[Tuple[str, Any], set] = {}
+    overviews: Dict[int, Any] = {}
+    for pos, query in enumerate(queries):
+        if "error" in query:
             continue
-        if dtype != "str":
-            v = _safe_float(val)
-            if v is None:
+        col = store.get(query["signal"])
+        lo, hi = query["bounds"]
+        if col is not None and query["idx"] is None:
+            overviews[pos] = _pyramid_series(entry, col, lo, hi, *query["budget"])
+            if overviews[pos] is not None:
                 continue
-            out.append({"t": t, "value": v, "unit": unit, "idx": sample_idx})
-        else:
-            out.append({"t": t, "value_str": str(val_str), "unit": unit, "idx": sample_idx})
+        wanted.setdefault((query["signal"], query["bounds"]), set()).add(query["idx"])
+    selections = {
+        key: _select_series(store, store.get(key[0]), key[1][0], key[1][1], idxs) for key, idxs in wanted.items()
+    }
 
-    out = _downsample(out, max_points)
+    out: List[Dict[str, Any]] = []
+    for pos, query in enumerate(queries):
+        series: Dict[str, Any] = {"signal": query["signal"], "idx": query["idx"]}
+        if "error" in query:
+            series.update({"status": "error", "message": query["error"]})
+            out.append(series)
+            continue
+        col = store.get(query["signal"])
+        lo, hi = query["bounds"]
+        series["unit"] = col.unit or "" if col is not None else ""
+        if lo is not None or hi is not None:
+            series["range"] = {"from": _epoch_ms_to_iso(lo), "to": _epoch_ms_to_iso(hi)}
+        overview = overviews.get(pos)
+        if overview is not None:
+            times, values, keep, reduction = overview
+            series["t"] = [times[k] for k in keep]
+            series["value"] = [values[k] for k in keep]
+            series["reduction"] = reduction
+            out.append(series)
+            continue
+        times, values, offsets, texts = selections[(query["signal"], query["bounds"])][query["idx"]]
+        keep, reduction = _reduce_selection(times, values, texts, lo, hi, *query["budget"])
+        series["t"] = [times[k] for k in keep]
+        series["value"] = [None if k in texts else values[k] for k in keep]
+        if query["idx"] is None:
+            series["sample_idx"] = [store.sample_index(col, offsets[k]) for k in keep]
+        if texts:
+            series["value_str"] = [texts.get(k) for k in keep]
+        if reduction is not None:
+            series["reduction"] = reduction
+        out.append(series)
     return {"status": "success", "series": out}
 
 
@@ -1972,9 +3205,14 @@ def fetch_kpi_series(
     name: str,
     max_points: int = 50000,
     idx: Optional[int] = None,
+    t_from: Any = None,
+    t_to: Any = None,
+    width: Optional[int] = None,
 ) -> Dict[str, Any]:
     # Backward-compatible route payload used by trp_import_ui.js
-    series = fetch_timeseries_by_signal(db_path, run_id, name, max_points=max_points, idx=idx)
+    series = fetch_timeseries_by_signal(
+        db_path, run_id, name, max_points=max_points, idx=idx, t_from=t_from, t_to=t_to, width=width,
+    )
     if series.get("status") != "success":
         return series
     rows = []
@@ -1986,7 +3224,11 @@ def fetch_kpi_series(
             "idx": r.get("idx"),
             "index": r.get("idx"),
         })
-    return {"status": "success", "series": rows}
+    out = {"status": "success", "series": rows}
+    for key in ("range", "reduction"):
+        if key in series:
+            out[key] = series[key]
+    return out
 
 
 def fetch_samples_in_window(
@@ -1997,7 +3239,8 @@ def fetch_samples_in_window(
     tol_ms: int,
 ) -> List[Dict[str, Any]]:
     rid = int(run_id)
-    if rid not in _RUNS:
+    entry = _get_run_entry(db_path, rid)
+    if entry is None:
         return []
     center_ms = _to_epoch_ms(center_iso)
     if center_ms is None:
@@ -2008,24 +3251,28 @@ def fetch_samples_in_window(
         return []
 
     out: List[Dict[str, Any]] = []
-    for s in _RUNS[rid].get("kpi_samples") or []:
-        if str((s or {}).get("name") or "") != metric:
-            continue
-        t_ms = _sample_time_ms(s or {})
-        if t_ms is None:
-            continue
-        if abs(t_ms - center_ms) > tol:
-            continue
-        out.append({
-            "time": (s or {}).get("time") or _epoch_ms_to_iso(t_ms),
-            "t_ms": t_ms,
-            "name": metric,
-            "value_num": _safe_float((s or {}).get("value_num")),
-            "value_str": (s or {}).get("value_str"),
-            "dtype": (s or {}).get("dtype") or "num",
-            "unit": (s or {}).get("unit") or "",
-            "idx": _extract_neighbor_sample_index(s or {}),
-        })
+    store = _entry_samples(entry)
+    col = store.get(metric)
+    if col is None:
+        return out
+    dtype = col.dtype or "num"
+    unit = col.unit or ""
+    # Binary searches over the time-sorted column: only the window's samples are touched.
+    for chunk, j_lo, j_hi in col.window(center_ms - tol, center_ms + tol):
+        times, values, codes = chunk.times, chunk.values, chunk.str_codes
+        for j in range(j_lo, j_hi):
+            t_ms = times[j]
+            val = values[j]
+            out.append({
+                "time": _epoch_ms_to_iso(t_ms),
+                "t_ms": int(t_ms),
+                "name": metric,
+                "value_num": None if val != val else val,
+                "value_str": store.string(codes[j]) if codes is not None else None,
+                "dtype": dtype,
+                "unit": unit,
+                "idx": store.chunk_sample_index(chunk, j),
+            })
 
     out.sort(key=lambda r: (_safe_int(r.get("t_ms")) or 0, _safe_int(r.get("idx")) or 0))
     return out
@@ -2121,7 +3368,7 @@ def _get_serving_neighbors_index(entry: Dict[str, Any]):
     if idx is not None:
         return idx
     try:
-        idx = build_serving_neighbors_index(entry.get("events") or [])
+        idx = build_serving_neighbors_index(entry.get("events") or [], _rrc_decoded_lookup(entry.get("rrc_messages")))
     except Exception:
         idx = None
     entry["serving_neighbors_index"] = idx
@@ -2135,9 +3382,9 @@ def build_serving_at_time(
     tol_ms: int = 200,
 ) -> Dict[str, Any]:
     rid = int(run_id)
-    if rid not in _RUNS:
+    entry = _get_run_entry(db_path, rid)
+    if entry is None:
         return {}
-    entry = _RUNS[rid]
     center_ms = _to_epoch_ms(center_iso)
     if center_ms is None:
         return {}
@@ -2218,62 +3465,95 @@ def build_serving_at_time(
     }
 
 
-def build_neighbors_at_time(
-    db_path: Optional[str],
-    run_id: int,
-    center_iso: str,
-    tol_ms: int = 200,
-    bucket_ms: int = 80,
-) -> Dict[str, Any]:
-    rid = int(run_id)
-    if rid not in _RUNS:
-        return {
-            "time": center_iso,
-            "tolMs": int(tol_ms),
-            "bucketMs": int(bucket_ms),
-            "neighbors": [],
-            "debug": {"message": "Run not found"},
-        }
-
-    entry = _RUNS[rid]
-    tol = int(max(20, _safe_int(tol_ms) or 200))
-    align = int(max(20, _safe_int(bucket_ms) or 80))
-
-    pci_s = fetch_samples_in_window(db_path, rid, LTE_NEIGHBOR_PCI_METRIC, center_iso, tol)
-    rsrp_s = fetch_samples_in_window(db_path, rid, LTE_NEIGHBOR_RSRP_METRIC, center_iso, tol)
-    rsrq_s = fetch_samples_in_window(db_path, rid, LTE_NEIGHBOR_RSRQ_METRIC, center_iso, tol)
+class NeighborTimeline:
+    """
+    Neighbor[64] frames of one run for one bucket width: every PCI bucket of the run with
+    its RSRP/RSRQ/CINR/EARFCN pairing, EARFCN scale fix and best row per PCI already done.
+    Frames are ordered by bucket center, so a neighbors_at_time query is a binary search.
+    """
 
+    __slots__ = ("bucket_ms", "centers", "frames", "paired", "scale_div", "cinr_metric", "earfcn_metric")
+
+    def __init__(self, bucket_ms: int, scale_div: int, cinr_metric: str, earfcn_metric: str) -> None:
+        self.bucket_ms = bucket_ms
+        self.centers = array("q")
+        self.frames: List[List[Dict[str, Any]]] = []
+        self.paired = array("i")
+        self.scale_div = scale_div
+        self.cinr_metric = cinr_metric
+        self.earfcn_metric = earfcn_metric
+
+    def span(self, t_lo: int, t_hi: int) -> Tuple[int, int]:
+        """[i0, i1) of the frames centered in [t_lo, t_hi]."""
+        return bisect.bisect_left(self.centers, t_lo), bisect.bisect_right(self.centers, t_hi)
+
+
+def _column_buckets(store: SampleStore, col: Optional[MetricColumns], span: int) -> Tuple[List[int], List[List[float]]]:
+    """bucket_by_time over a whole column: bucket centers and each bucket's numeric values in (time, slot) order."""
+    if col is None:
+        return [], []
+    rows: List[Tuple[int, int, float]] = []
+    for chunk in col.chunks():
+        if chunk.str_codes is None and chunk.idx is not None:
+            slots: Any = [v if v > 0 else 0 for v in chunk.idx]
+        elif chunk.str_codes is None:
+            slots = repeat(0, len(chunk))
+        else:
+            slots = [slot or 0 for slot in store.chunk_sample_indexes(chunk)]
+        rows.extend(zip(chunk.times, slots, chunk.values))
+    rows.sort(key=itemgetter(0, 1))
+    times = [r[0] for r in rows]
+
+    centers: List[int] = []
+    items: List[List[float]] = []
+    a, n = 0, len(rows)
+    while a < n:
+        b = bisect.bisect_right(times, times[a] + span, a)
+        centers.append(int(round(sum(times[a:b]) / (b - a))))
+        items.append([r[2] for r in rows[a:b] if r[2] == r[2]])
+        a = b
+    return centers, items
+
+
+def _nearest_bucket_values(centers: List[int], items: List[List[float]], target_center_ms: int, tol_ms: int) -> List[float]:
+    """_nearest_bucket over sorted centers: values of the closest bucket within tol_ms (the earlier one on ties)."""
+    k = bisect.bisect_left(centers, target_center_ms)
+    best = None
+    for i in (k - 1, k):
+        if 0 <= i < len(centers):
+            dt = abs(centers[i] - target_center_ms)
+            if dt <= tol_ms and (best is None or dt < best[0]):
+                best = (dt, i)
+    return items[best[1]] if best is not None else []
+
+
+def build_neighbor_timeline(entry: Dict[str, Any], bucket_ms: int = NEIGHBOR_TIMELINE_DEFAULT_MS) -> NeighborTimeline:
+    """Pair the run's Neighbor[64] samples into per-bucket frames (see NeighborTimeline); bucket_ms is snapped."""
+    align = _neighbor_bucket_ms(bucket_ms)
+    store = _entry_samples(entry)
     cinr_metric = _pick_best_metric_name(entry, LTE_NEIGHBOR_CINR_METRICS) or LTE_NEIGHBOR_CINR_METRICS[0]
     earfcn_metric = _pick_best_metric_name(entry, LTE_NEIGHBOR_EARFCN_METRICS) or LTE_NEIGHBOR_EARFCN_METRICS[0]
-    cinr_s = fetch_samples_in_window(db_path, rid, cinr_metric, center_iso, tol)
-    earfcn_s = fetch_samples_in_window(db_path, rid, earfcn_metric, center_iso, tol)
+    scale_div = _normalize_neighbor_earfcn_div(entry)
+    timeline = NeighborTimeline(align, scale_div, cinr_metric, earfcn_metric)
 
-    pci_b = bucket_by_time(pci_s, align)
-    rsrp_b = bucket_by_time(rsrp_s, align)
-    rsrq_b = bucket_by_time(rsrq_s, align)
-    cinr_b = bucket_by_time(cinr_s, align)
-    earfcn_b = bucket_by_time(earfcn_s, align)
+    pci_b = _column_buckets(store, store.get(LTE_NEIGHBOR_PCI_METRIC), align)
+    rsrp_b = _column_buckets(store, store.get(LTE_NEIGHBOR_RSRP_METRIC), align)
+    rsrq_b = _column_buckets(store, store.get(LTE_NEIGHBOR_RSRQ_METRIC), align)
+    cinr_b = _column_buckets(store, store.get(cinr_metric), align)
+    earfcn_b = _column_buckets(store, store.get(earfcn_metric), align)
 
-    scale_div = _normalize_neighbor_earfcn_div(entry)
-    paired_rows: List[Dict[str, Any]] = []
-    for pb in pci_b:
-        center_ms = _safe_int((pb or {}).get("t_center_ms"))
-        if center_ms is None:
-            continue
-        p_items = _items_to_numeric((pb or {}).get("items") or [])
+    for center_ms, p_items in zip(*pci_b):
         if not p_items:
             continue
-
-        rb = _nearest_bucket(rsrp_b, center_ms, align)
-        qb = _nearest_bucket(rsrq_b, center_ms, align)
-        cb = _nearest_bucket(cinr_b, center_ms, align)
-        eb = _nearest_bucket(earfcn_b, center_ms, align)
-
-        rsrps = _items_to_numeric((rb or {}).get("items") or [])
-        rsrqs = _items_to_numeric((qb or {}).get("items") or [])
-        cinrs = _items_to_numeric((cb or {}).get("items") or [])
-        earfcns_raw = _items_to_numeric((eb or {}).get("items") or [])
-
+        rsrps = _nearest_bucket_values(*rsrp_b, center_ms, align)
+        rsrqs = _nearest_bucket_values(*rsrq_b, center_ms, align)
+        cinrs = _nearest_bucket_values(*cinr_b, center_ms, align)
+        earfcns_raw = _nearest_bucket_values(*earfcn_b, center_ms, align)
+
+        source_bucket = _epoch_ms_to_iso(center_ms)
+        # Best row per PCI as _best_row_by_signal picks it; rows of one frame share their time.
+        best: Dict[int, Tuple[Tuple[int, float, float], Dict[str, Any]]] = {}
+        paired = 0
         for i, pci_raw in enumerate(p_items):
             pci = _safe_int(round(pci_raw))
             if pci is None:
@@ -2281,29 +3561,86 @@ def build_neighbors_at_time(
             earfcn_raw = _safe_int(round(earfcns_raw[i])) if i < len(earfcns_raw) else None
             if earfcn_raw is not None and scale_div == 2 and earfcn_raw % 2 == 0:
                 earfcn_raw = earfcn_raw // 2
-            paired_rows.append({
+            rsrp = rsrps[i] if i < len(rsrps) else None
+            cinr = cinrs[i] if i < len(cinrs) else None
+            score = (
+                1 if rsrp is not None else 0,
+                rsrp if rsrp is not None else float("-inf"),
+                cinr if cinr is not None else float("-inf"),
+            )
+            paired += 1
+            if pci in best and best[pci][0] >= score:
+                continue
+            best[pci] = (score, {
                 "pci": pci,
-                "rsrp": _safe_float(rsrps[i]) if i < len(rsrps) else None,
-                "rsrq": _safe_float(rsrqs[i]) if i < len(rsrqs) else None,
-                "cinr": _safe_float(cinrs[i]) if i < len(cinrs) else None,
+                "rsrp": rsrp,
+                "rsrq": rsrqs[i] if i < len(rsrqs) else None,
+                "cinr": cinr,
                 "earfcn": earfcn_raw,
-                "sourceBucket": _epoch_ms_to_iso(center_ms),
+                "sourceBucket": source_bucket,
                 "pair_index": i,
             })
+        timeline.centers.append(center_ms)
+        timeline.frames.append([row for _, row in best.values()])
+        timeline.paired.append(paired)
+    return timeline
 
-    by_pci: Dict[int, List[Dict[str, Any]]] = {}
-    for row in paired_rows:
-        pci = _safe_int(row.get("pci"))
-        if pci is None:
-            continue
-        by_pci.setdefault(pci, []).append(row)
 
-    stable_rows: List[Dict[str, Any]] = []
-    for pci, rows in by_pci.items():
-        best = _best_row_by_signal(rows)
-        if not best:
-            continue
-        stable_rows.append(best)
+def _neighbor_bucket_ms(bucket_ms: Any) -> int:
+    """The NEIGHBOR_TIMELINE_BUCKETS_MS width closest to a requested bucketMs (the smaller one on ties)."""
+    want = _safe_int(bucket_ms) or NEIGHBOR_TIMELINE_DEFAULT_MS
+    return min(NEIGHBOR_TIMELINE_BUCKETS_MS, key=lambda b: (abs(b - want), b))
+
+
+def _get_neighbor_timeline(entry: Dict[str, Any], bucket_ms: int) -> NeighborTimeline:
+    """Cached timeline for a snapped width: the default one plus NEIGHBOR_TIMELINE_LRU recently used others."""
+    bucket_ms = _neighbor_bucket_ms(bucket_ms)
+    timelines = entry.setdefault("neighbor_timelines", {})
+    timeline = timelines.pop(bucket_ms, None)
+    if timeline is None:
+        timeline = build_neighbor_timeline(entry, bucket_ms)
+    timelines[bucket_ms] = timeline  # dicts keep insertion order: most recently used last
+    others = [b for b in timelines if b != NEIGHBOR_TIMELINE_DEFAULT_MS]
+    for b in others[:max(0, len(others) - NEIGHBOR_TIMELINE_LRU)]:
+        del timelines[b]
+    return timeline
+
+
+def _window_count(col: Optional[MetricColumns], t_lo: int, t_hi: int) -> int:
+    if col is None:
+        return 0
+    return sum(j_hi - j_lo for _, j_lo, j_hi in col.window(t_lo, t_hi))
+
+
+def build_neighbors_at_time(
+    db_path: Optional[str],
+    run_id: int,
+    center_iso: str,
+    tol_ms: int = 200,
+    bucket_ms: int = 80,
+) -> Dict[str, Any]:
+    rid = int(run_id)
+    entry = _get_run_entry(db_path, rid)
+    if entry is None:
+        return {
+            "time": center_iso,
+            "tolMs": int(tol_ms),
+            "bucketMs": int(bucket_ms),
+            "neighbors": [],
+            "debug": {"message": "Run not found"},
+        }
+
+    tol = int(max(20, _safe_int(tol_ms) or 200))
+    align = _neighbor_bucket_ms(bucket_ms)
+    center_ms = _to_epoch_ms(center_iso)
+    timeline = _get_neighbor_timeline(entry, align)
+    i0, i1 = (0, 0) if center_ms is None else timeline.span(center_ms - tol, center_ms + tol)
+
+    by_pci: Dict[int, List[Dict[str, Any]]] = {}
+    for frame in timeline.frames[i0:i1]:
+        for row in frame:
+            by_pci.setdefault(row["pci"], []).append(row)
+    stable_rows = [_best_row_by_signal(rows) for rows in by_pci.values()]
 
     stable_rows.sort(key=lambda r: (
         -(_safe_float(r.get("rsrp")) if _safe_float(r.get("rsrp")) is not None else -9999),
@@ -2324,6 +3661,11 @@ def build_neighbors_at_time(
             "pair_index": _safe_int(row.get("pair_index")),
         })
 
+    store = _entry_samples(entry)
+
+    def samples(metric: str) -> int:
+        return 0 if center_ms is None else _window_count(store.get(metric), center_ms - tol, center_ms + tol)
+
     distinct_pci = sorted({int(n["pci"]) for n in neighbors if _safe_int(n.get("pci")) is not None})
     return {
         "time": center_iso,
@@ -2331,18 +3673,18 @@ def build_neighbors_at_time(
         "bucketMs": align,
         "neighbors": neighbors,
         "debug": {
-            "pciSamples": len(pci_s),
-            "rsrpSamples": len(rsrp_s),
-            "rsrqSamples": len(rsrq_s),
-            "cinrSamples": len(cinr_s),
-            "earfcnSamples": len(earfcn_s),
-            "pciBuckets": len(pci_b),
+            "pciSamples": samples(LTE_NEIGHBOR_PCI_METRIC),
+            "rsrpSamples": samples(LTE_NEIGHBOR_RSRP_METRIC),
+            "rsrqSamples": samples(LTE_NEIGHBOR_RSRQ_METRIC),
+            "cinrSamples": samples(timeline.cinr_metric),
+            "earfcnSamples": samples(timeline.earfcn_metric),
+            "pciBuckets": i1 - i0,
             "distinctPci": len(distinct_pci),
             "distinctPciList": distinct_pci,
-            "pairedRows": len(paired_rows),
-            "earfcnScaleDiv": scale_div,
-            "cinrMetric": cinr_metric,
-            "earfcnMetric": earfcn_metric,
+            "pairedRows": sum(timeline.paired[i0:i1]),
+            "earfcnScaleDiv": timeline.scale_div,
+            "cinrMetric": timeline.cinr_metric,
+            "earfcnMetric": timeline.earfcn_metric,
         },
     }
 
@@ -2355,14 +3697,14 @@ def fetch_neighbors_at_time(
     bucket_ms: int = 80,
 ) -> Dict[str, Any]:
     rid = int(run_id)
-    if rid not in _RUNS:
+    entry = _get_run_entry(db_path, rid)
+    if entry is None:
         return {"status": "error", "message": "Run not found"}
     if _to_epoch_ms(center_iso) is None:
         return {"status": "error", "message": "Invalid time"}
 
-    entry = _RUNS[rid]
     tol_i = int(max(20, _safe_int(tol_ms) or 200))
-    bucket_i = int(max(20, _safe_int(bucket_ms) or 80))
+    bucket_i = _neighbor_bucket_ms(bucket_ms)
     earfcn_scale_div = _normalize_neighbor_earfcn_div(entry)
 
     estimated_payload = build_neighbors_at_time(db_path, rid, center_iso, tol_ms=tol_i, bucket_ms=bucket_i)
@@ -1,6 +1,11 @@
+import mmap
 import os
 import re
+import struct
+import time
+import zipfile
 import zlib
+from array import array
 from datetime import datetime, timezone
 from xml.etree import ElementTree as ET
 
@@ -8,6 +13,9 @@ from xml.etree import ElementTree as ET
 MAX_FRAME_SCAN = 2_000_000
 MAX_RECORD_LEN = 262144
 
+_F32_LE = struct.Struct('<f')
+_F64_LE = struct.Struct('<d')
+
 
 def utc_iso_from_epoch_seconds(epoch_s):
     try:
@@ -88,17 +96,15 @@ def decode_zigzag(n):
 
 
 def _decode_float32_le(b):
-    import struct
     try:
-        return float(struct.unpack('<f', b)[0])
+        return float(_F32_LE.unpack(b)[0])
     except Exception:
         return None
 
 
 def _decode_float64_le(b):
-    import struct
     try:
-        return float(struct.unpack('<d', b)[0])
+        return float(_F64_LE.unpack(b)[0])
     except Exception:
         return None
 
@@ -142,6 +148,94 @@ def iter_fields(data, max_fields=100000):
         count += 1
 
 
+def _read_varint_to(data, pos, end):
+    # read_varint bounded by end (a varint never runs past its enclosing field).
+    shift = 0
+    result = 0
+    start = pos
+    while pos < end:
+        b = data[pos]
+        pos += 1
+        result |= (b & 0x7F) << shift
+        if not (b & 0x80):
+            return result, pos
+        shift += 7
+        if shift > 70:
+            break
+    return None, start
+
+
+def iter_field_spans(data, start=0, end=None, max_fields=100000):
+    """
+    Zero-copy counterpart of iter_fields over data[start:end] (bytes, memoryview
+    or mmap). Yields (field_no, wire, a, b): for varints a is the value and b the
+    offset after it; for fixed32/fixed64/length-delimited fields data[a:b] is the
+    payload. Nothing is sliced, so nested messages are scanned by passing their
+    (a, b) span back in.
+    """
+    if end is None:
+        end = len(data)
+    pos = start
+    count = 0
+    while pos < end and count < max_fields:
+        key = data[pos]
+        if key < 0x80:
+            pos += 1
+        else:
+            key, pos2 = _read_varint_to(data, pos, end)
+            if key is None:
+                break
+            pos = pos2
+        wire = key & 0x07
+        if wire == 0:
+            val, pos3 = _read_varint_to(data, pos, end)
+            if val is None:
+                break
+            yield key >> 3, 0, val, pos3
+            pos = pos3
+        elif wire == 2:
+            if pos < end and data[pos] < 0x80:
+                length = data[pos]
+                pos3 = pos + 1
+            else:
+                length, pos3 = _read_varint_to(data, pos, end)
+                if length is None:
+                    break
+            if pos3 + length > end:
+                break
+            pos = pos3 + length
+            yield key >> 3, 2, pos3, pos
+        elif wire == 1:
+            if pos + 8 > end:
+                break
+            yield key >> 3, 1, pos, pos + 8
+            pos += 8
+        elif wire == 5:
+            if pos + 4 > end:
+                break
+            yield key >> 3, 5, pos, pos + 4
+            pos += 4
+        else:
+            break
+        count += 1
+
+
+def try_decode_text_span(data, start, end):
+    """try_decode_text(data[start:end]) without copying when data is a memoryview."""
+    if start >= end:
+        return None
+    view = data[start:end]
+    for enc in ('utf-8', 'latin1'):
+        try:
+            s = str(view, enc)
+            s = s.strip('\x00').strip()
+            if s:
+                return s
+        except Exception:
+            continue
+    return None
+
+
 def try_decode_text(b):
     if not b:
         return None
@@ -157,8 +251,9 @@ def try_decode_text(b):
 
 
 def parse_track_xml(path):
+    # path may also be an open file object (e.g. a zip member).
     points = []
-    if not os.path.exists(path):
+    if isinstance(path, str) and not os.path.exists(path):
         return points
     try:
         root = ET.parse(path).getroot()
@@ -201,25 +296,26 @@ def parse_track_xml(path):
 
 def parse_lookup_tables(buf):
     out = {}
-    for _, wire, payload in iter_fields(buf, max_fields=300000):
+    mv = memoryview(buf)
+    for _, wire, a, b in iter_field_spans(mv, max_fields=300000):
         if wire != 2:
             continue
         table_name = None
         table = {}
-        for _, w2, v2 in iter_fields(payload, max_fields=500):
+        for _, w2, a2, b2 in iter_field_spans(mv, a, b, max_fields=500):
             if w2 == 2:
-                s = try_decode_text(v2)
+                s = try_decode_text_span(mv, a2, b2)
                 if s and table_name is None and len(s) < 120:
                     table_name = s
                 # nested enum entries
-                if v2:
+                if b2 > a2:
                     enum_val = None
                     enum_name = None
-                    for _, w3, v3 in iter_fields(v2, max_fields=50):
-                        if w3 == 0 and enum_val is None and isinstance(v3, int):
-                            enum_val = int(v3)
+                    for _, w3, a3, b3 in iter_field_spans(mv, a2, b2, max_fields=50):
+                        if w3 == 0 and enum_val is None:
+                            enum_val = int(a3)
                         elif w3 == 2 and enum_name is None:
-                            s3 = try_decode_text(v3)
+                            s3 = try_decode_text_span(mv, a3, b3)
                             if s3:
                                 enum_name = s3
                     if enum_val is not None and enum_name:
@@ -232,8 +328,9 @@ def parse_lookup_tables(buf):
 def parse_declarations(buf):
     metric_map = {}
     unknown_records = []
+    mv = memoryview(buf)
     # try record-wise parse first
-    for _, wire, payload in iter_fields(buf, max_fields=400000):
+    for _, wire, a, b in iter_field_spans(mv, max_fields=400000):
         if wire != 2:
             continue
         name = None
@@ -242,13 +339,13 @@ def parse_declarations(buf):
         lookup = None
         strings = []
         ints = []
-        for f2, w2, v2 in iter_fields(payload, max_fields=500):
+        for _, w2, a2, b2 in iter_field_spans(mv, a, b, max_fields=500):
             if w2 == 2:
-                s = try_decode_text(v2)
+                s = try_decode_text_span(mv, a2, b2)
                 if s:
                     strings.append(s)
-            elif w2 == 0 and isinstance(v2, int):
-                ints.append(int(v2))
+            elif w2 == 0:
+                ints.append(int(a2))
         for s in strings:
             if '.' in s and len(s) < 220:
                 name = s
@@ -265,8 +362,8 @@ def parse_declarations(buf):
                 'lookup': lookup,
                 'kind': 'event' if any(x in name.lower() for x in ('event', 'call', 'ims', 'sip', 'rtp', 'state')) else 'metric'
             }
-        elif payload and len(payload) <= 512:
-            unknown_records.append(payload[:64].hex())
+        elif 0 < b - a <= 512:
+            unknown_records.append(mv[a:min(b, a + 64)].hex())
 
     if metric_map:
         return metric_map, unknown_records
@@ -871,56 +968,265 @@ def decode_provider_channels_variant(extracted_root, metric_map, lookups, base_t
     }
 
 
-def decode_cdf_data_variant(extracted_root, metric_map, lookups, base_time_iso=None):
-    def iter_len_prefixed_records(buf, max_records=5_000_000):
-        if not buf:
-            return
-        pos = 0
-        count = 0
-        while pos < len(buf) and count < max_records:
+# Row caps of the in-memory decode entry points (decode_cdf_data_variant /
+# decode_cdf_data_from_zip). The per-member/per-range entry points take an
+# explicit kpi_limit (None = unlimited) for callers with a disk-backed store.
+MAX_KPI_ROWS = 500000
+MAX_EVENT_ROWS = 200000
+STREAM_CHUNK_SIZE = 256 * 1024
+EVENT_NAME_TOKENS = ('volte', 'call', 'ims', 'rrc', 'sip', 'voice', 'event', 'state')
+
+
+def iter_len_prefixed_records(buf, max_records=5_000_000):
+    if not buf:
+        return
+    pos = 0
+    count = 0
+    while pos < len(buf) and count < max_records:
+        ln, p = read_varint(buf, pos)
+        if ln is None or p <= pos or ln <= 0:
+            break
+        end = p + ln
+        if end > len(buf):
+            break
+        rec = buf[p:end]
+        if rec:
+            yield rec
+            count += 1
+        pos = end
+
+
+def iter_cdf_stream_chunks(fileobj, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Incrementally inflate a CDF stream (small header + zlib payload) read from a
+    file object such as zipfile.ZipFile.open(). Mirrors decode_maybe_compressed:
+    zlib when a zlib header is found in the first 64 bytes, raw deflate as a
+    fallback, otherwise the bytes are passed through unchanged.
+    """
+    head = fileobj.read(max(chunk_size, 64))
+    if not head:
+        return
+    start = -1
+    for i in range(min(len(head) - 2, 64)):
+        if head[i] == 0x78 and head[i + 1] in (0x01, 0x9C, 0xDA):
+            start = i
+            break
+    payload = head[start:] if start >= 0 else head
+
+    inflater = None
+    first = None
+    for wbits in (zlib.MAX_WBITS, -zlib.MAX_WBITS):
+        d = zlib.decompressobj(wbits)
+        try:
+            first = d.decompress(payload)
+        except zlib.error:
+            continue
+        if wbits < 0 and start < 0 and len(first) < max(8, int(len(payload) * 0.2)):
+            continue  # same "output too small" guard as decode_maybe_compressed
+        inflater = d
+        break
+
+    if inflater is None:
+        if start >= 0:
+            raise ValueError('Found zlib header but decompression failed')
+        yield head
+        while True:
+            chunk = fileobj.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+    if first:
+        yield first
+    while not inflater.eof:
+        chunk = fileobj.read(chunk_size)
+        if not chunk:
+            break
+        out = inflater.decompress(chunk)
+        if out:
+            yield out
+    tail = inflater.flush()
+    if tail:
+        yield tail
+
+
+def iter_len_prefixed_records_stream(chunks, max_records=5_000_000):
+    """Yield varint length-prefixed records from an iterable of byte chunks, buffering only partial records."""
+    buf = bytearray()
+    pos = 0
+    count = 0
+    for chunk in chunks:
+        if pos:
+            del buf[:pos]
+            pos = 0
+        buf += chunk
+        ln_buf = len(buf)
+        while pos < ln_buf:
             ln, p = read_varint(buf, pos)
-            if ln is None or p <= pos or ln <= 0:
-                break
+            if ln is None:
+                break  # length prefix split across chunks
+            if p <= pos or ln <= 0:
+                return
             end = p + ln
-            if end > len(buf):
+            if end > ln_buf:
                 break
-            rec = buf[p:end]
-            if rec:
-                yield rec
-                count += 1
+            yield bytes(buf[p:end])
+            count += 1
+            if count >= max_records:
+                return
             pos = end
 
-    def parse_metric_sample(msg_bytes):
-        metric_id = None
-        value_num = None
-        value_str = None
-        varints = []
-        for f, w, v in iter_fields(msg_bytes, max_fields=200):
-            if w == 0 and isinstance(v, int):
-                if f == 1 and metric_id is None and v > 0:
-                    metric_id = int(v)
+
+def _parse_cdf_metric_sample(data, start=0, end=None):
+    # data[start:end] is the metric sample submessage; data should be a memoryview.
+    metric_id = None
+    value_num = None
+    value_str = None
+    varints = []
+    for f, w, a, b in iter_field_spans(data, start, end, max_fields=200):
+        if w == 0:
+            if f == 1 and metric_id is None and a > 0:
+                metric_id = int(a)
+            else:
+                varints.append((f, int(a)))
+        elif w == 5 and value_num is None:
+            value_num = _F32_LE.unpack_from(data, a)[0]
+        elif w == 1 and value_num is None:
+            value_num = _F64_LE.unpack_from(data, a)[0]
+        elif w == 2 and value_str is None:
+            s = try_decode_text_span(data, a, b)
+            if s is not None:
+                value_str = s
+
+    if metric_id is None:
+        for _, vv in varints:
+            if vv > 1000:
+                metric_id = vv
+                break
+    if value_num is None and value_str is None and varints:
+        vv = varints[0][1]
+        if -10_000_000_000 < vv < 10_000_000_000:
+            value_num = float(vv)
+    return metric_id, value_num, value_str
+
+
+# Records between two progress callbacks of an in-process decode.
+PROGRESS_RECORDS = 8192
+
+
+def _new_cdf_decode_state(kpi_limit=None, progress=None):
+    # kpi_limit: stop after this many KPI samples (None = unlimited).
+    # progress: optional callable(records_decoded), called every PROGRESS_RECORDS records.
+    return {'kpis': [], 'events': [], 'frames': 0, 'kpi_count': 0, 'kpi_limit': kpi_limit, 'progress': progress, 'warnings': []}
+
+
+def _decode_cdf_records(records, metric_map, lookups, state, sample_store=None):
+    """Decode data.cdf records into state; returns True once state['kpi_limit'] is reached."""
+    kpis = state['kpis']
+    events = state['events']
+    kpi_limit = state.get('kpi_limit')
+    progress = state.get('progress')
+    for rec in records:
+        state['frames'] += 1
+        if progress is not None and state['frames'] % PROGRESS_RECORDS == 0:
+            progress(state['frames'])
+        ts_epoch = None
+        t_ms = None
+        samples = []
+
+        mv = memoryview(rec)
+        for f, w, a, b in iter_field_spans(mv, max_fields=200):
+            if w != 2 or b <= a:
+                continue
+            if f == 1:
+                sec = None
+                nanos = 0
+                for f2, w2, v2, _ in iter_field_spans(mv, a, b, max_fields=20):
+                    if f2 == 1 and w2 == 0:
+                        sec = int(v2)
+                    elif f2 == 2 and w2 == 0:
+                        nanos = int(v2)
+                if sec is not None and 946684800 <= sec <= 4102444800:
+                    t_ms = sec * 1000 + nanos // 1_000_000
+                    ts_epoch = sec + (nanos / 1e9 if nanos else 0)
+            else:
+                mid, vn, vs = _parse_cdf_metric_sample(mv, a, b)
+                if mid:
+                    samples.append((mid, vn, vs))
+
+        if t_ms is None or not samples:
+            continue
+        # The columnar path keeps integer epoch ms only; ISO is rendered at the API edge.
+        ts_iso = utc_iso_from_epoch_seconds(ts_epoch) if sample_store is None else None
+
+        for metric_id, value_num, value_str in samples:
+            meta = metric_map.get(metric_id, {})
+            name = meta.get('name') or f'Metric.{metric_id}'
+            dtype = meta.get('dtype') or 'unknown'
+            lookup_name = meta.get('lookup')
+            mapped_str = value_str
+            if mapped_str is None and value_num is not None and lookup_name and lookup_name in lookups:
+                mapped = lookups[lookup_name].get(int(value_num))
+                if mapped is not None:
+                    mapped_str = str(mapped)
+
+            if sample_store is not None:
+                sample_store.append(
+                    name, t_ms, value_num, mapped_str,
+                    metric_id=int(metric_id), dtype=dtype, lookup=lookup_name
+                )
+            else:
+                kpis.append({
+                    'time': ts_iso,
+                    'metric_id': int(metric_id),
+                    'name': name,
+                    'value_num': value_num,
+                    'value_str': mapped_str,
+                    'dtype': dtype,
+                    'lookup': lookup_name
+                })
+            state['kpi_count'] += 1
+
+            lname = name.lower()
+            if any(t in lname for t in EVENT_NAME_TOKENS):
+                ev = {
+                    'event_name': name,
+                    'metric_id': int(metric_id),
+                    'params': [
+                        {'param_id': 'value_num', 'param_value': value_num, 'param_type': 'float'},
+                        {'param_id': 'value_str', 'param_value': mapped_str, 'param_type': 'string'}
+                    ]
+                }
+                if sample_store is not None:
+                    ev['t_ms'] = t_ms
                 else:
-                    varints.append((f, int(v)))
-            elif w == 5 and value_num is None:
-                value_num = _decode_float32_le(v)
-            elif w == 1 and value_num is None:
-                value_num = _decode_float64_le(v)
-            elif w == 2 and value_str is None:
-                s = try_decode_text(v)
-                if s is not None:
-                    value_str = s
-
-        if metric_id is None:
-            for _, vv in varints:
-                if vv > 1000:
-                    metric_id = vv
-                    break
-        if value_num is None and value_str is None and varints:
-            vv = varints[0][1]
-            if -10_000_000_000 < vv < 10_000_000_000:
-                value_num = float(vv)
-        return metric_id, value_num, value_str
+                    ev = {'time': ts_iso, **ev}
+                events.append(ev)
+            if kpi_limit is not None and state['kpi_count'] >= kpi_limit:
+                return True
+    return False
+
 
+def _finish_cdf_decode(state):
+    events = state['events']
+    if len(events) > MAX_EVENT_ROWS:
+        events = events[:MAX_EVENT_ROWS]
+    return {
+        'kpiSamples': state['kpis'],
+        'events': events,
+        'frames': state['frames'],
+        'report': {
+            'decodedSamples': state['kpi_count'],
+            'decodedEvents': len(events),
+            'warnings': state['warnings']
+        }
+    }
+
+
+def decode_cdf_data_variant(extracted_root, metric_map, lookups, base_time_iso=None, sample_store=None):
+    # When sample_store (trp_sample_store.SampleStore) is given, KPI samples are
+    # appended to it column-wise instead of being returned as dicts, and events
+    # additionally carry an integer 't_ms'.
     trp_root = os.path.join(extracted_root, 'trp')
     providers_root = os.path.join(trp_root, 'providers')
     if not os.path.isdir(providers_root):
@@ -935,88 +1241,167 @@ def decode_cdf_data_variant(extracted_root, metric_map, lookups, base_time_iso=N
     if not data_paths:
         return {'kpiSamples': [], 'events': [], 'frames': 0, 'report': {'decodedSamples': 0, 'decodedEvents': 0, 'warnings': ['data.cdf not found']}}
 
-    MAX_KPI_ROWS = 500000
-    MAX_EVENT_ROWS = 200000
-    kpis = []
-    events = []
-    warnings = []
-    total_frames = 0
-
+    state = _new_cdf_decode_state(MAX_KPI_ROWS)
     for path in data_paths:
         try:
-            data_bytes = _read_cdf_input(path)
-            for rec in iter_len_prefixed_records(data_bytes):
-                total_frames += 1
-                ts_iso = None
-                samples = []
-
-                for f, w, v in iter_fields(rec, max_fields=200):
-                    if f == 1 and w == 2 and v:
-                        sec = None
-                        nanos = 0
-                        for f2, w2, v2 in iter_fields(v, max_fields=20):
-                            if f2 == 1 and w2 == 0 and isinstance(v2, int):
-                                sec = int(v2)
-                            elif f2 == 2 and w2 == 0 and isinstance(v2, int):
-                                nanos = int(v2)
-                        if sec is not None and 946684800 <= sec <= 4102444800:
-                            ts_iso = utc_iso_from_epoch_seconds(sec + (nanos / 1e9 if nanos else 0))
-                    elif w == 2 and v:
-                        mid, vn, vs = parse_metric_sample(v)
-                        if mid:
-                            samples.append((mid, vn, vs))
-
-                if not ts_iso or not samples:
-                    continue
-
-                for metric_id, value_num, value_str in samples:
-                    meta = metric_map.get(metric_id, {})
-                    name = meta.get('name') or f'Metric.{metric_id}'
-                    dtype = meta.get('dtype') or 'unknown'
-                    lookup_name = meta.get('lookup')
-                    mapped_str = value_str
-                    if mapped_str is None and value_num is not None and lookup_name and lookup_name in lookups:
-                        mapped = lookups[lookup_name].get(int(value_num))
-                        if mapped is not None:
-                            mapped_str = str(mapped)
+            records = iter_len_prefixed_records(_read_cdf_input(path))
+            if _decode_cdf_records(records, metric_map, lookups, state, sample_store=sample_store):
+                break
+        except Exception as e:
+            state['warnings'].append(f'data.cdf parse failed {os.path.basename(path)}: {e}')
+    return _finish_cdf_decode(state)
 
-                    kpis.append({
-                        'time': ts_iso,
-                        'metric_id': int(metric_id),
-                        'name': name,
-                        'value_num': value_num,
-                        'value_str': mapped_str,
-                        'dtype': dtype,
-                        'lookup': lookup_name
-                    })
 
-                    lname = name.lower()
-                    if any(t in lname for t in ('volte', 'call', 'ims', 'rrc', 'sip', 'voice', 'event', 'state')):
-                        events.append({
-                            'time': ts_iso,
-                            'event_name': name,
-                            'metric_id': int(metric_id),
-                            'params': [
-                                {'param_id': 'value_num', 'param_value': value_num, 'param_type': 'float'},
-                                {'param_id': 'value_str', 'param_value': mapped_str, 'param_type': 'string'}
-                            ]
-                        })
-                    if len(kpis) >= MAX_KPI_ROWS:
-                        break
-                if len(kpis) >= MAX_KPI_ROWS:
-                    break
-        except Exception as e:
-            warnings.append(f'data.cdf parse failed {os.path.basename(path)}: {e}')
+def list_cdf_data_members(zf):
+    """Sorted data.cdf member names under trp/providers/ of an open zipfile.ZipFile."""
+    names = []
+    for info in zf.infolist():
+        if info.is_dir():
+            continue
+        name = info.filename
+        if name.startswith('trp/providers/') and name.rsplit('/', 1)[-1].lower() == 'data.cdf':
+            names.append(name)
+    names.sort()
+    return names
 
-    if len(events) > MAX_EVENT_ROWS:
-        events = events[:MAX_EVENT_ROWS]
-    return {
-        'kpiSamples': kpis,
-        'events': events,
-        'frames': total_frames,
-        'report': {
-            'decodedSamples': len(kpis),
-            'decodedEvents': len(events),
-            'warnings': warnings
-        }
+
+def read_cdf_member(zf, name):
+    """Read and decompress a small CDF member (declarations/lookups); b'' when missing."""
+    try:
+        raw = zf.read(name)
+    except KeyError:
+        return b''
+    return decode_maybe_compressed(raw).get('dataBuf') or b''
+
+
+def decode_cdf_data_from_zip(zf, metric_map, lookups, sample_store=None):
+    """
+    Streaming counterpart of decode_cdf_data_variant: data.cdf members are read
+    straight from the open TRP zip and inflated chunk by chunk, so memory stays
+    bounded by the record size and nothing is extracted to disk.
+    """
+    data_members = list_cdf_data_members(zf)
+    if not data_members:
+        return {'kpiSamples': [], 'events': [], 'frames': 0, 'report': {'decodedSamples': 0, 'decodedEvents': 0, 'warnings': ['data.cdf not found']}}
+
+    state = _new_cdf_decode_state(MAX_KPI_ROWS)
+    for name in data_members:
+        if _decode_cdf_member_from_zip(zf, name, metric_map, lookups, state, sample_store=sample_store):
+            break
+    return _finish_cdf_decode(state)
+
+
+def _decode_cdf_member_from_zip(zf, member, metric_map, lookups, state, sample_store=None):
+    try:
+        with zf.open(member) as fh:
+            records = iter_len_prefixed_records_stream(iter_cdf_stream_chunks(fh))
+            return _decode_cdf_records(records, metric_map, lookups, state, sample_store=sample_store)
+    except Exception as e:
+        state['warnings'].append(f'data.cdf parse failed {member}: {e}')
+        return False
+
+
+def _cdf_partial_result(state, sample_store, kpi_offset, capped, t0, **extra):
+    out = {
+        'store': sample_store,
+        'kpiSamples': state['kpis'],
+        'events': state['events'],
+        'frames': state['frames'],
+        'kpiCount': state['kpi_count'] - int(kpi_offset),
+        'capped': capped,
+        'warnings': state['warnings'],
+        'elapsed': time.time() - t0,
     }
+    out.update(extra)
+    return out
+
+
+def decode_cdf_member(trp_path, member, metric_map, lookups, store_factory=None, kpi_offset=0, kpi_limit=None, progress=None):
+    """
+    Decode a single data.cdf member of a TRP file into its own result.
+
+    Self-contained (opens the zip itself) so it can run as a process-pool task.
+    store_factory, when given, is called to create the sample store the samples
+    are appended to. kpi_offset counts samples already decoded from earlier
+    members, so kpi_limit (None = unlimited) applies exactly as in a serial
+    decode. progress (in-process only) receives the running record count.
+    """
+    t0 = time.time()
+    sample_store = store_factory() if store_factory is not None else None
+    state = _new_cdf_decode_state(kpi_limit, progress)
+    state['kpi_count'] = int(kpi_offset)
+    with zipfile.ZipFile(trp_path, 'r') as zf:
+        capped = _decode_cdf_member_from_zip(zf, member, metric_map, lookups, state, sample_store=sample_store)
+    return _cdf_partial_result(state, sample_store, kpi_offset, capped, t0, member=member)
+
+
+def inflate_cdf_member_to_file(zf, member, out_fh):
+    """
+    Inflate a data.cdf member into out_fh (typically a temp file that is then
+    mmapped). Returns (bytes_written, warning); on a decode error the bytes
+    inflated so far are kept, like the streaming decoder which decodes every
+    complete record before the failure.
+    """
+    written = 0
+    try:
+        with zf.open(member) as fh:
+            for chunk in iter_cdf_stream_chunks(fh):
+                out_fh.write(chunk)
+                written += len(chunk)
+    except Exception as e:
+        return written, f'data.cdf parse failed {member}: {e}'
+    return written, None
+
+
+def index_len_prefixed_records(buf, max_records=5_000_000):
+    """
+    Record-boundary index of a varint length-prefixed buffer (bytes or mmap).
+
+    Returns array('q') holding the offset of every record's length prefix plus
+    one trailing end offset, so record i spans offsets[i]:offsets[i + 1]. Stops
+    where iter_len_prefixed_records_stream would.
+    """
+    offsets = array('q')
+    size = len(buf)
+    pos = 0
+    while pos < size and len(offsets) < max_records:
+        ln, p = read_varint(buf, pos)
+        if ln is None or p <= pos or ln <= 0:
+            break
+        end = p + ln
+        if end > size:
+            break
+        offsets.append(pos)
+        pos = end
+    offsets.append(pos)
+    return offsets
+
+
+def iter_len_prefixed_records_range(buf, start, end):
+    """Yield the records of buf[start:end]; start/end must be record boundaries from index_len_prefixed_records."""
+    pos = start
+    while pos < end:
+        ln, p = read_varint(buf, pos)
+        yield buf[p:p + ln]
+        pos = p + ln
+
+
+def decode_cdf_record_range(cdf_path, start, end, metric_map, lookups, store_factory=None, kpi_offset=0, kpi_limit=None, progress=None):
+    """
+    Decode the records between two boundary offsets of an inflated data.cdf file.
+
+    The file is mmapped, so process-pool workers share the page cache instead
+    of receiving the decompressed buffer pickled. Result shape matches
+    decode_cdf_member.
+    """
+    t0 = time.time()
+    sample_store = store_factory() if store_factory is not None else None
+    state = _new_cdf_decode_state(kpi_limit, progress)
+    state['kpi_count'] = int(kpi_offset)
+    capped = False
+    if end > start:
+        with open(cdf_path, 'rb') as fh:
+            with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                records = iter_len_prefixed_records_range(mm, start, end)
+                capped = _decode_cdf_records(records, metric_map, lookups, state, sample_store=sample_store)
+    return _cdf_partial_result(state, sample_store, kpi_offset, capped, t0, range=(start, end))
@@ -0,0 +1,87 @@
+"""
+Per-run table of decoded LTE RRC messages.
+
+A successful PER decode (decoded tree, summary, serving/neighbor rows, ...) is held
+once per run in an RrcMessageTable and addressed by an integer id. The KPI sample and
+the matching events only carry that id as rrc_msg_id (plus per_decoded/payload_len);
+the per-message fields and the *_json text params an API client sees are rendered
+from the record when the event is serialized (trp_importer._with_rrc_message).
+
+Identical payloads of the same message type (repeated SIB1s, unchanged
+reconfigurations, ...) share one record when added with the same key. With
+compress=True records are kept as zlib-compressed compact JSON and inflated on
+access, trading CPU on every read for a much smaller resident table.
+"""
+
+from __future__ import annotations
+
+import json
+import zlib
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+
+def _pack(record: Dict[str, Any]) -> bytes:
+    return zlib.compress(json.dumps(record, separators=(",", ":"), default=str).encode("utf-8"), 6)
+
+
+def _unpack(blob: bytes) -> Dict[str, Any]:
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+
+class RrcMessageTable:
+    """Decoded RRC messages of one run, addressed by rrc_msg_id (0-based insertion order)."""
+
+    def __init__(self, compress: bool = False) -> None:
+        self.compress = bool(compress)
+        self._rows: List[Any] = []
+        self._ids: Dict[Any, int] = {}
+        self._reused = 0
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def add(self, record: Dict[str, Any], key: Any = None) -> int:
+        """Store a decode result and return its id; a record already added under key is reused."""
+        if key is not None:
+            msg_id = self._ids.get(key)
+            if msg_id is not None:
+                self._reused += 1
+                return msg_id
+        msg_id = len(self._rows)
+        self._rows.append(_pack(record) if self.compress else record)
+        if key is not None:
+            self._ids[key] = msg_id
+        return msg_id
+
+    def get(self, msg_id: Any) -> Optional[Dict[str, Any]]:
+        """The record for msg_id, or None when unknown. Uncompressed records are shared: treat as read-only."""
+        if not isinstance(msg_id, int) or isinstance(msg_id, bool) or not 0 <= msg_id < len(self._rows):
+            return None
+        row = self._rows[msg_id]
+        return _unpack(row) if self.compress else row
+
+    def records(self) -> Iterator[Dict[str, Any]]:
+        for msg_id in range(len(self._rows)):
+            yield self.get(msg_id)
+
+    @classmethod
+    def from_records(cls, records: Optional[Iterable[Dict[str, Any]]], compress: bool = False) -> "RrcMessageTable":
+        """Rebuild a table from records() output; ids are positions, so they match the stored references."""
+        table = cls(compress=compress)
+        for record in records or []:
+            table.add(record)
+        return table
+
+    def nbytes(self) -> Optional[int]:
+        """Resident size of the compressed records (None for an uncompressed table)."""
+        if not self.compress:
+            return None
+        return sum(len(blob) for blob in self._rows)
+
+    def memory_report(self) -> Dict[str, Any]:
+        return {
+            "messages": len(self._rows),
+            "reused": self._reused,
+            "compressed": self.compress,
+            "bytes": self.nbytes(),
+        }
@@ -0,0 +1,310 @@
+"""
+Persistent storage for imported TRP runs (SQLite locally, same schema on the Turso replica).
+
+A run is written once, at the end of trp_importer.import_trp_file:
+
+    * trp_runs          one row per run: id, filename, imported_at, the upload's sha256 and
+                        decoder version (import cache key) and the run dict as JSON
+    * trp_run_parts     zlib-compressed JSON blobs: events, track points, catalog,
+                        sidebar, l1l2 scheduler index, the sample string table and
+                        the decoded RRC message table (referenced by rrc_msg_id)
+    * trp_run_columns   per-metric metadata (metric_id, dtype, lookup, unit, time_sorted,
+                        PER patches)
+    * trp_run_segments  the metric's samples as the compressed segments produced by
+                        trp_sample_store (delta-encoded times, zlib)
+
+Deferred PER decodes (OPTIM_TRP_PER_MODE=deferred) are decoded on first request after the
+run was written; save_event_decode keeps each result in trp_run_event_decodes so a run
+rehydrated by another process does not decode the event again.
+
+list_stored_runs only reads trp_runs, so listing stays cheap however many runs are
+stored; load_run rehydrates a single run on demand. Derived state that is cheap to
+rebuild from events or samples (the serving/neighbor index, series pyramids, the
+neighbor timeline) is not persisted.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import zlib
+from typing import Any, Dict, List, Optional
+
+from db_client import connect_db, sync_if_needed
+from trp_rrc_messages import RrcMessageTable
+from trp_sample_store import SampleStore
+
+# Entry keys persisted as compressed JSON parts.
+_JSON_PARTS = ("events", "track_points", "catalog", "sidebar", "l1l2_scheduler_index")
+
+# Samples per stored segment for columns still held in memory.
+_SEGMENT_ROWS = 65536
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS trp_runs (
+        id INTEGER PRIMARY KEY,
+        filename TEXT,
+        imported_at TEXT,
+        sha256 TEXT,
+        decoder_version TEXT,
+        run_json TEXT NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS trp_runs_sha256 ON trp_runs (sha256, decoder_version)",
+    """
+    CREATE TABLE IF NOT EXISTS trp_run_parts (
+        run_id INTEGER NOT NULL,
+        name TEXT NOT NULL,
+        data BLOB NOT NULL,
+        PRIMARY KEY (run_id, name)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS trp_run_columns (
+        run_id INTEGER NOT NULL,
+        col INTEGER NOT NULL,
+        meta_json TEXT NOT NULL,
+        PRIMARY KEY (run_id, col)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS trp_run_segments (
+        run_id INTEGER NOT NULL,
+        col INTEGER NOT NULL,
+        seq INTEGER NOT NULL,
+        count INTEGER NOT NULL,
+        t_lo INTEGER NOT NULL,
+        t_hi INTEGER NOT NULL,
+        has_str INTEGER NOT NULL,
+        has_idx INTEGER NOT NULL,
+        data BLOB NOT NULL,
+        PRIMARY KEY (run_id, col, seq)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS trp_run_event_decodes (
+        run_id INTEGER NOT NULL,
+        event_index INTEGER NOT NULL,
+        decode_json TEXT NOT NULL,
+        PRIMARY KEY (run_id, event_index)
+    )
+    """,
+)
+
+_TABLES = ("trp_run_event_decodes", "trp_run_segments", "trp_run_columns", "trp_run_parts", "trp_runs")
+
+
+def persist_enabled(db_path: Optional[str]) -> bool:
+    """Runs are persisted when a db_path is given or OPTIM_TRP_PERSIST=1; OPTIM_TRP_PERSIST=0 always disables it."""
+    flag = (os.getenv("OPTIM_TRP_PERSIST") or "").strip().lower()
+    if flag in ("0", "false", "no", "off"):
+        return False
+    return bool(db_path) or flag in ("1", "true", "yes", "on")
+
+
+def _connect(db_path: Optional[str]):
+    parent = os.path.dirname(db_path or "")
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+    return connect_db(db_path)
+
+
+def _close(conn) -> None:
+    close = getattr(conn, "close", None)
+    if close is not None:
+        close()
+
+
+def ensure_run_store_schema(conn) -> None:
+    cur = conn.cursor()
+    for stmt in _SCHEMA:
+        cur.execute(stmt)
+    conn.commit()
+
+
+def _pack(value: Any) -> bytes:
+    return zlib.compress(json.dumps(value, separators=(",", ":"), default=str).encode("utf-8"), 6)
+
+
+def _unpack(blob: Any) -> Any:
+    return json.loads(zlib.decompress(bytes(blob)).decode("utf-8"))
+
+
+def max_stored_run_id(db_path: Optional[str]) -> int:
+    conn = _connect(db_path)
+    try:
+        ensure_run_store_schema(conn)
+        row = conn.cursor().execute("SELECT MAX(id) FROM trp_runs").fetchone()
+        return int(row[0] or 0) if row else 0
+    finally:
+        _close(conn)
+
+
+def save_run(db_path: Optional[str], run_id: int, entry: Dict[str, Any]) -> None:
+    """Write (or replace) one run entry as built by trp_importer.import_trp_file."""
+    rid = int(run_id)
+    run = entry["run"]
+    store: SampleStore = entry["samples"]
+    conn = _connect(db_path)
+    try:
+        ensure_run_store_schema(conn)
+        cur = conn.cursor()
+        for table in _TABLES:
+            key = "id" if table == "trp_runs" else "run_id"
+            cur.execute(f"DELETE FROM {table} WHERE {key} = ?", (rid,))
+        meta = run.get("metadata") or {}
+        cur.execute(
+            "INSERT INTO trp_runs (id, filename, imported_at, sha256, decoder_version, run_json) VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                rid, run.get("filename"), run.get("imported_at"),
+                meta.get("source_sha256"), meta.get("decoder_version"), json.dumps(run, default=str),
+            ),
+        )
+        parts = [(name, _pack(entry.get(name))) for name in _JSON_PARTS]
+        parts.append(("strings", _pack(store.strings)))
+        messages: Optional[RrcMessageTable] = entry.get("rrc_messages")
+        if messages is not None:
+            parts.append(("rrc_messages", _pack(list(messages.records()))))
+        cur.executemany(
+            "INSERT INTO trp_run_parts (run_id, name, data) VALUES (?, ?, ?)",
+            [(rid, name, blob) for name, blob in parts],
+        )
+        for k, (name, col) in enumerate(store.items()):
+            meta = {
+                "name": name,
+                "metric_id": col.metric_id,
+                "dtype": col.dtype,
+                "lookup": col.lookup,
+                "unit": col.unit,
+                "time_sorted": col.time_sorted,
+                "extras": {str(i): patch for i, patch in (col.extras or {}).items()},
+            }
+            cur.execute(
+                "INSERT INTO trp_run_columns (run_id, col, meta_json) VALUES (?, ?, ?)",
+                (rid, k, json.dumps(meta, default=str)),
+            )
+            cur.executemany(
+                "INSERT INTO trp_run_segments (run_id, col, seq, count, t_lo, t_hi, has_str, has_idx, data) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (rid, k, seq, count, t_lo, t_hi, int(has_str), int(has_idx), bytes(blob))
+                    for seq, (count, t_lo, t_hi, has_str, has_idx, blob) in enumerate(col.export_segments(_SEGMENT_ROWS))
+                ],
+            )
+        conn.commit()
+        sync_if_needed(conn)
+    finally:
+        _close(conn)
+
+
+def save_event_decode(db_path: Optional[str], run_id: int, event_index: int, decode: Dict[str, Any]) -> None:
+    """Record the PER decode of a deferred event (replayed onto the event by the next load_run)."""
+    conn = _connect(db_path)
+    try:
+        ensure_run_store_schema(conn)
+        conn.cursor().execute(
+            "INSERT OR REPLACE INTO trp_run_event_decodes (run_id, event_index, decode_json) VALUES (?, ?, ?)",
+            (int(run_id), int(event_index), json.dumps(decode, default=str)),
+        )
+        conn.commit()
+        sync_if_needed(conn)
+    finally:
+        _close(conn)
+
+
+def find_run_by_digest(db_path: Optional[str], sha256: str, decoder_version: str) -> Optional[int]:
+    """Id of the newest stored run imported from a file with this sha256 by this decoder version."""
+    conn = _connect(db_path)
+    try:
+        ensure_run_store_schema(conn)
+        row = conn.cursor().execute(
+            "SELECT MAX(id) FROM trp_runs WHERE sha256 = ? AND decoder_version = ?",
+            (sha256, str(decoder_version)),
+        ).fetchone()
+    finally:
+        _close(conn)
+    return int(row[0]) if row and row[0] is not None else None
+
+
+def list_stored_runs(db_path: Optional[str]) -> List[Dict[str, Any]]:
+    conn = _connect(db_path)
+    try:
+        ensure_run_store_schema(conn)
+        rows = conn.cursor().execute("SELECT run_json FROM trp_runs ORDER BY id").fetchall()
+    finally:
+        _close(conn)
+    out: List[Dict[str, Any]] = []
+    for (run_json,) in rows:
+        try:
+            out.append(json.loads(run_json))
+        except Exception:
+            continue
+    return out
+
+
+def load_run(
+    db_path: Optional[str], run_id: int, spill_dir: Optional[str] = None, compress_messages: bool = False,
+) -> Optional[Dict[str, Any]]:
+    """
+    Rehydrate one stored run into a trp_importer run entry, or None when it is not stored.
+    Sample segments are copied as is (not decompressed) into spill_dir/run_<id>, replacing the
+    copies an earlier load of the same run left there.
+    Runs stored before the RRC message table keep their decodes inline and load without one.
+    Decodes recorded by save_event_decode are returned as entry["event_decodes"] ({event index:
+    decode}) for the caller to apply to the still-deferred events.
+    """
+    rid = int(run_id)
+    conn = _connect(db_path)
+    try:
+        ensure_run_store_schema(conn)
+        cur = conn.cursor()
+        row = cur.execute("SELECT run_json FROM trp_runs WHERE id = ?", (rid,)).fetchone()
+        if row is None:
+            return None
+        entry: Dict[str, Any] = {"run": json.loads(row[0])}
+        parts = {name: _unpack(blob) for name, blob in cur.execute(
+            "SELECT name, data FROM trp_run_parts WHERE run_id = ?", (rid,)
+        ).fetchall()}
+        for name in _JSON_PARTS:
+            entry[name] = parts.get(name)
+        entry["event_decodes"] = {int(i): json.loads(dec) for i, dec in cur.execute(
+            "SELECT event_index, decode_json FROM trp_run_event_decodes WHERE run_id = ?", (rid,)
+        ).fetchall()}
+        if "rrc_messages" in parts:
+            entry["rrc_messages"] = RrcMessageTable.from_records(parts["rrc_messages"], compress=compress_messages)
+
+        # One folder per run (run_<id>): loading a run again replaces its segment copies instead of adding more.
+        store = SampleStore(spill_dir=spill_dir, dir_name=f"run_{rid}")
+        for s in parts.get("strings") or []:
+            store.intern_string(s)
+        columns = {}
+        sorted_cols = []
+        for k, meta_json in cur.execute(
+            "SELECT col, meta_json FROM trp_run_columns WHERE run_id = ? ORDER BY col", (rid,)
+        ).fetchall():
+            meta = json.loads(meta_json)
+            col = store.column(meta["name"], metric_id=meta.get("metric_id"), dtype=meta.get("dtype"),
+                               lookup=meta.get("lookup"), unit=meta.get("unit") or "")
+            for i, patch in (meta.get("extras") or {}).items():
+                col.set_extra(int(i), patch)
+            columns[int(k)] = col
+            if meta.get("time_sorted"):
+                sorted_cols.append(col)
+        for k, count, t_lo, t_hi, has_str, has_idx, blob in cur.execute(
+            "SELECT col, count, t_lo, t_hi, has_str, has_idx, data FROM trp_run_segments "
+            "WHERE run_id = ? ORDER BY col, seq", (rid,)
+        ).fetchall():
+            store.restore_segment(columns[int(k)], int(count), int(t_lo), int(t_hi), bool(has_str), bool(has_idx), blob)
+        # Saved in time order: window reads can bisect without re-checking the restored column.
+        for col in sorted_cols:
+            col.time_sorted = True
+    finally:
+        _close(conn)
+    entry["samples"] = store
+    entry["events"] = entry.get("events") or []
+    entry["track_points"] = entry.get("track_points") or []
+    entry["catalog"] = entry.get("catalog") or {}
+    entry["sidebar"] = entry.get("sidebar") or {}
+    entry["serving_neighbors_index"] = None
+    return entry
@@ -0,0 +1,877 @@
+"""
+Columnar per-metric sample store for decoded TRP runs.
+
+Instead of one dict per decoded KPI sample, samples are grouped by metric name
+and kept in parallel typed arrays:
+
+    * times      array('q')  epoch milliseconds (int64)
+    * values     array('d')  float64, NaN when the sample has no numeric value
+    * str_codes  array('i')  index into the store-wide string table, -1 = none
+                             (allocated lazily, only for metrics carrying text)
+    * idx        array('h')  neighbor/array slot index, -1 = none (lazy too)
+
+Metric metadata (metric_id, dtype, lookup, unit) is held once per metric, and
+string values are interned in a single table so enum-like values repeated by
+lookup tables cost one code per sample.
+
+When the store is given a spill_dir, a metric whose resident tail reaches
+segment_rows samples is flushed to an append-only segment file (one file per
+metric, each segment a zlib-compressed block with delta-encoded times). Only
+the segment index (offset, size, count, time range) stays in memory; readers
+page segments back in through mmap, and windowed reads skip every segment
+whose time range does not overlap the window.
+
+Columns are time-sorted once built (SampleStore.merge), so MetricColumns.window
+answers a time window with binary searches over the segment index and the time
+arrays instead of a scan: its cost depends on the window, not the run length.
+
+Segment files live in one directory per store, under a per-process parent
+(process_spill_dir) that is removed when the process exits; parents left by
+processes that are no longer running are swept when the next one starts.
+"""
+
+from __future__ import annotations
+
+import atexit
+import bisect
+import heapq
+import itertools
+import mmap
+import os
+import shutil
+import sys
+import tempfile
+import zlib
+from array import array
+from operator import attrgetter
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+_NAN = float("nan")
+
+# Samples per on-disk segment (and resident tail size that triggers a flush).
+SEGMENT_ROWS = 65536
+
+_PROCESS_DIR_PREFIX = "proc_"
+_process_dirs: Dict[str, str] = {}
+
+
+def _pid_running(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+def _remove_process_dir(path: str, owner: int) -> None:
+    # Forked workers inherit atexit handlers; only the owning process cleans up.
+    if os.getpid() == owner:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def process_spill_dir(parent: str) -> str:
+    """
+    This process's spill directory under parent (<parent>/proc_<pid>), created on first
+    use and removed at interpreter exit. Creating it deletes the directories of processes
+    that are no longer running and top-level store directories left by older versions.
+    """
+    path = _process_dirs.get(parent)
+    if path is not None:
+        return path
+    os.makedirs(parent, exist_ok=True)
+    pid = os.getpid()
+    for name in os.listdir(parent):
+        stale = os.path.join(parent, name)
+        if name.startswith(_PROCESS_DIR_PREFIX):
+            other = name[len(_PROCESS_DIR_PREFIX):]
+            # A directory with our own pid is from an earlier process (e.g. a restarted container).
+            if other.isdigit() and (int(other) == pid or not _pid_running(int(other))):
+                shutil.rmtree(stale, ignore_errors=True)
+        elif name.startswith("samples_") and os.path.isdir(stale):
+            shutil.rmtree(stale, ignore_errors=True)
+    path = os.path.join(parent, f"{_PROCESS_DIR_PREFIX}{pid}")
+    os.makedirs(path, exist_ok=True)
+    atexit.register(_remove_process_dir, path, pid)
+    _process_dirs[parent] = path
+    return path
+
+
+def _array_nbytes(arr: Optional[array]) -> int:
+    if arr is None:
+        return 0
+    return arr.buffer_info()[1] * arr.itemsize
+
+
+class ColumnChunk:
+    """A contiguous run of samples of one metric; base is the offset of its first sample in the column."""
+
+    __slots__ = ("base", "times", "values", "str_codes", "idx")
+
+    def __init__(
+        self,
+        base: int,
+        times: array,
+        values: array,
+        str_codes: Optional[array] = None,
+        idx: Optional[array] = None,
+    ) -> None:
+        self.base = base
+        self.times = times
+        self.values = values
+        self.str_codes = str_codes
+        self.idx = idx
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+
+class _Segment:
+    __slots__ = ("offset", "nbytes", "count", "t_lo", "t_hi", "has_str", "has_idx")
+
+    def __init__(self, offset: int, nbytes: int, count: int, t_lo: int, t_hi: int, has_str: bool, has_idx: bool) -> None:
+        self.offset = offset
+        self.nbytes = nbytes
+        self.count = count
+        self.t_lo = t_lo
+        self.t_hi = t_hi
+        self.has_str = has_str
+        self.has_idx = has_idx
+
+
+def _encode_segment(times: array, values: array, str_codes: Optional[array], idx: Optional[array]) -> bytes:
+    deltas = array("q", times)
+    for i in range(len(deltas) - 1, 0, -1):
+        deltas[i] -= deltas[i - 1]
+    parts = [deltas.tobytes(), values.tobytes()]
+    if str_codes is not None:
+        parts.append(str_codes.tobytes())
+    if idx is not None:
+        parts.append(idx.tobytes())
+    return zlib.compress(b"".join(parts), 1)
+
+
+def _array_from(typecode: str, raw: memoryview) -> array:
+    out = array(typecode)
+    out.frombytes(raw)
+    return out
+
+
+def _decode_segment(seg: _Segment, blob: bytes, base: int) -> ColumnChunk:
+    raw = memoryview(zlib.decompress(blob))
+    n = seg.count
+    pos = 8 * n
+    times = array("q", itertools.accumulate(_array_from("q", raw[:pos])))
+    values = _array_from("d", raw[pos:pos + 8 * n])
+    pos += 8 * n
+    str_codes = None
+    if seg.has_str:
+        str_codes = _array_from("i", raw[pos:pos + 4 * n])
+        pos += 4 * n
+    idx = _array_from("h", raw[pos:pos + 2 * n]) if seg.has_idx else None
+    return ColumnChunk(base, times, values, str_codes, idx)
+
+
+class MetricColumns:
+    """Parallel sample arrays for a single metric (on-disk segments followed by the resident tail)."""
+
+    __slots__ = (
+        "name", "metric_id", "dtype", "lookup", "unit",
+        "_t", "_v", "_s", "_i", "extras", "time_sorted",
+        "_segments", "_seg_bases", "_spilled", "_seg_path", "_seg_cache", "_spill_rows",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        metric_id: Optional[int] = None,
+        dtype: Optional[str] = None,
+        lookup: Optional[str] = None,
+        unit: str = "",
+    ) -> None:
+        self.name = sys.intern(str(name))
+        self.metric_id = metric_id
+        self.dtype = dtype
+        self.lookup = lookup
+        self.unit = unit or ""
+        # Resident tail.
+        self._t = array("q")
+        self._v = array("d")
+        self._s: Optional[array] = None
+        self._i: Optional[array] = None
+        # Sparse per-sample attributes (e.g. PER decode patches), keyed by offset.
+        self.extras: Optional[Dict[int, Dict[str, Any]]] = None
+        # Cached is_time_sorted() result; None = unknown (reset by every append).
+        self.time_sorted: Optional[bool] = True
+        # On-disk segments (see SampleStore spill_dir).
+        self._segments: List[_Segment] = []
+        self._seg_bases: List[int] = []
+        self._spilled = 0
+        self._seg_path: Optional[str] = None
+        self._seg_cache: Optional[Tuple[int, ColumnChunk]] = None
+        self._spill_rows = 0
+
+    def __len__(self) -> int:
+        return self._spilled + len(self._t)
+
+    def append(self, t_ms: int, value_num: Optional[float], str_code: int = -1, idx: Optional[int] = None) -> None:
+        n = len(self._t)
+        self.time_sorted = None
+        self._t.append(int(t_ms))
+        self._v.append(_NAN if value_num is None else float(value_num))
+        if str_code >= 0 and self._s is None:
+            self._s = array("i", [-1]) * n
+        if self._s is not None:
+            self._s.append(str_code)
+        if idx is not None and self._i is None:
+            self._i = array("h", [-1]) * n
+        if self._i is not None:
+            self._i.append(-1 if idx is None else int(idx))
+
+    def append_chunk(self, times: array, values: array, str_codes: Optional[array] = None, idx: Optional[array] = None) -> None:
+        n = len(self._t)
+        m = len(times)
+        self.time_sorted = None
+        self._t.extend(times)
+        self._v.extend(values)
+        if str_codes is not None and self._s is None:
+            self._s = array("i", [-1]) * n
+        if self._s is not None:
+            self._s.extend(str_codes if str_codes is not None else array("i", [-1]) * m)
+        if idx is not None and self._i is None:
+            self._i = array("h", [-1]) * n
+        if self._i is not None:
+            self._i.extend(idx if idx is not None else array("h", [-1]) * m)
+
+    # -- segments ---------------------------------------------------------
+
+    @property
+    def segment_count(self) -> int:
+        return len(self._segments)
+
+    def flush_segments(self, path: str, segment_rows: int) -> None:
+        """Move the resident tail to `path` as compressed segments of at most segment_rows samples."""
+        if self._seg_path is None:
+            self._seg_path = path
+        t, v, s, i = self._t, self._v, self._s, self._i
+        if not len(t):
+            return
+        with open(self._seg_path, "ab") as fh:
+            offset = fh.tell()
+            for lo in range(0, len(t), segment_rows):
+                hi = min(lo + segment_rows, len(t))
+                times = t[lo:hi]
+                blob = _encode_segment(times, v[lo:hi], s[lo:hi] if s is not None else None, i[lo:hi] if i is not None else None)
+                fh.write(blob)
+                self._seg_bases.append(self._spilled)
+                self._segments.append(_Segment(offset, len(blob), hi - lo, min(times), max(times), s is not None, i is not None))
+                self._spilled += hi - lo
+                offset += len(blob)
+        self._t = array("q")
+        self._v = array("d")
+        self._s = None
+        self._i = None
+
+    def export_segments(self, segment_rows: int) -> Iterator[Tuple[int, int, int, bool, bool, bytes]]:
+        """
+        Yield (count, t_lo, t_hi, has_str, has_idx, blob) for the whole column as
+        compressed segments: spilled segments are passed through as stored, the
+        resident tail is encoded in pieces of at most segment_rows samples.
+        """
+        if self._segments:
+            with open(self._seg_path, "rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for seg in self._segments:
+                    yield seg.count, seg.t_lo, seg.t_hi, seg.has_str, seg.has_idx, mm[seg.offset:seg.offset + seg.nbytes]
+        t, v, s, i = self._t, self._v, self._s, self._i
+        for lo in range(0, len(t), segment_rows):
+            hi = min(lo + segment_rows, len(t))
+            times = t[lo:hi]
+            blob = _encode_segment(times, v[lo:hi], s[lo:hi] if s is not None else None, i[lo:hi] if i is not None else None)
+            yield hi - lo, min(times), max(times), s is not None, i is not None, blob
+
+    def _add_segment(self, path: str, count: int, t_lo: int, t_hi: int, has_str: bool, has_idx: bool, blob: bytes) -> None:
+        if self._seg_path is None:
+            self._seg_path = path
+        with open(self._seg_path, "ab") as fh:
+            offset = fh.tell()
+            fh.write(blob)
+        self._seg_bases.append(self._spilled)
+        self._segments.append(_Segment(offset, len(blob), count, t_lo, t_hi, has_str, has_idx))
+        self._spilled += count
+        self.time_sorted = None
+
+    def _read_segment(self, k: int) -> ColumnChunk:
+        cached = self._seg_cache
+        if cached is not None and cached[0] == k:
+            return cached[1]
+        seg = self._segments[k]
+        with open(self._seg_path, "rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            blob = mm[seg.offset:seg.offset + seg.nbytes]
+        chunk = _decode_segment(seg, blob, self._seg_bases[k])
+        self._seg_cache = (k, chunk)
+        return chunk
+
+    def chunks(self, t_lo: Optional[int] = None, t_hi: Optional[int] = None) -> Iterator[ColumnChunk]:
+        """
+        Yield the column as ColumnChunks in sample order. With t_lo/t_hi, segments
+        whose time range lies entirely outside [t_lo, t_hi] are not read (callers
+        still filter individual samples).
+        """
+        for k, seg in enumerate(self._segments):
+            if t_lo is not None and seg.t_hi < t_lo:
+                continue
+            if t_hi is not None and seg.t_lo > t_hi:
+                continue
+            yield self._read_segment(k)
+        if len(self._t):
+            yield ColumnChunk(self._spilled, self._t, self._v, self._s, self._i)
+
+    def window(self, t_lo: int, t_hi: int) -> Iterator[Tuple[ColumnChunk, int, int]]:
+        """
+        Samples with t_lo <= time <= t_hi as (chunk, j_lo, j_hi) slices, in sample order.
+        A time-sorted column bisects the segment index (segments are in time order) and
+        each overlapping chunk's times; an unsorted one falls back to filtering chunks().
+        """
+        if t_hi < t_lo:
+            return
+        if not self.is_time_sorted():
+            for chunk in self.chunks(t_lo, t_hi):
+                times = chunk.times
+                for j in range(len(times)):
+                    if t_lo <= times[j] <= t_hi:
+                        yield chunk, j, j + 1
+            return
+        segments = self._segments
+        k = bisect.bisect_left(segments, t_lo, key=attrgetter("t_hi"))
+        while k < len(segments) and segments[k].t_lo <= t_hi:
+            yield from self._window_slice(self._read_segment(k), t_lo, t_hi)
+            k += 1
+        if len(self._t):
+            yield from self._window_slice(ColumnChunk(self._spilled, self._t, self._v, self._s, self._i), t_lo, t_hi)
+
+    @staticmethod
+    def _window_slice(chunk: ColumnChunk, t_lo: int, t_hi: int) -> Iterator[Tuple[ColumnChunk, int, int]]:
+        j_lo = bisect.bisect_left(chunk.times, t_lo)
+        j_hi = bisect.bisect_right(chunk.times, t_hi, lo=j_lo)
+        if j_lo < j_hi:
+            yield chunk, j_lo, j_hi
+
+    def _locate(self, i: int) -> Tuple[ColumnChunk, int]:
+        if i < 0:
+            i += len(self)
+        if i >= self._spilled:
+            return ColumnChunk(self._spilled, self._t, self._v, self._s, self._i), i - self._spilled
+        lo, hi = 0, len(self._seg_bases) - 1
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if self._seg_bases[mid] <= i:
+                lo = mid
+            else:
+                hi = mid - 1
+        chunk = self._read_segment(lo)
+        return chunk, i - chunk.base
+
+    def _concat(self, attr: str, typecode: str, fill: int) -> Optional[array]:
+        out = array(typecode)
+        seen = False
+        for ch in self.chunks():
+            part = getattr(ch, attr)
+            if part is None:
+                out.extend(array(typecode, [fill]) * len(ch))
+            else:
+                seen = True
+                out.extend(part)
+        return out if seen else None
+
+    # Full-column arrays. Without segments these are the live resident arrays;
+    # for spilled columns they are materialized copies, so prefer chunks().
+    @property
+    def times(self) -> array:
+        if not self._segments:
+            return self._t
+        return array("q", itertools.chain.from_iterable(ch.times for ch in self.chunks()))
+
+    @property
+    def values(self) -> array:
+        if not self._segments:
+            return self._v
+        return array("d", itertools.chain.from_iterable(ch.values for ch in self.chunks()))
+
+    @property
+    def str_codes(self) -> Optional[array]:
+        if not self._segments:
+            return self._s
+        return self._concat("str_codes", "i", -1)
+
+    @property
+    def idx(self) -> Optional[array]:
+        if not self._segments:
+            return self._i
+        return self._concat("idx", "h", -1)
+
+    # -- per-sample access ------------------------------------------------
+
+    def value_num(self, i: int) -> Optional[float]:
+        if self._spilled <= i:
+            v = self._v[i - self._spilled]
+        else:
+            chunk, j = self._locate(i)
+            v = chunk.values[j]
+        return None if v != v else v
+
+    def str_code(self, i: int) -> int:
+        chunk, j = self._locate(i)
+        codes = chunk.str_codes
+        return codes[j] if codes is not None else -1
+
+    def sample_index(self, i: int) -> Optional[int]:
+        chunk, j = self._locate(i)
+        if chunk.idx is None:
+            return None
+        v = chunk.idx[j]
+        return None if v < 0 else int(v)
+
+    def set_extra(self, i: int, patch: Dict[str, Any]) -> None:
+        if not patch:
+            return
+        if self.extras is None:
+            self.extras = {}
+        self.extras.setdefault(i, {}).update(patch)
+
+    def extra(self, i: int) -> Optional[Dict[str, Any]]:
+        if self.extras is None:
+            return None
+        return self.extras.get(i)
+
+    def is_time_sorted(self) -> bool:
+        if self.time_sorted is None:
+            self.time_sorted = self._check_time_sorted()
+        return self.time_sorted
+
+    def _check_time_sorted(self) -> bool:
+        prev = None
+        for ch in self.chunks():
+            times = ch.times
+            if not len(times):
+                continue
+            if prev is not None and times[0] < prev:
+                return False
+            if any(times[i] > times[i + 1] for i in range(len(times) - 1)):
+                return False
+            prev = times[-1]
+        return True
+
+    def time_bounds(self) -> Tuple[Optional[int], Optional[int]]:
+        lo: Optional[int] = None
+        hi: Optional[int] = None
+        for seg in self._segments:
+            lo = seg.t_lo if lo is None else min(lo, seg.t_lo)
+            hi = seg.t_hi if hi is None else max(hi, seg.t_hi)
+        if len(self._t):
+            t_lo = min(self._t)
+            t_hi = max(self._t)
+            lo = t_lo if lo is None else min(lo, t_lo)
+            hi = t_hi if hi is None else max(hi, t_hi)
+        return lo, hi
+
+    def _reset(self) -> None:
+        self.time_sorted = True
+        self._t = array("q")
+        self._v = array("d")
+        self._s = None
+        self._i = None
+        self._segments = []
+        self._seg_bases = []
+        self._spilled = 0
+        self._seg_path = None
+        self._seg_cache = None
+
+    def nbytes(self) -> int:
+        """Resident bytes (the tail arrays; spilled segments are counted by disk_nbytes)."""
+        return (
+            _array_nbytes(self._t)
+            + _array_nbytes(self._v)
+            + _array_nbytes(self._s)
+            + _array_nbytes(self._i)
+        )
+
+    def disk_nbytes(self) -> int:
+        return sum(seg.nbytes for seg in self._segments)
+
+
+class SampleStore:
+    """Run-wide collection of MetricColumns plus the interned string table."""
+
+    def __init__(self, spill_dir: Optional[str] = None, segment_rows: Optional[int] = None, dir_name: Optional[str] = None) -> None:
+        self.columns: Dict[str, MetricColumns] = {}
+        self.strings: List[str] = []
+        self._string_codes: Dict[str, int] = {}
+        self._count = 0
+        self.spill_dir = spill_dir
+        self.segment_rows = int(segment_rows or SEGMENT_ROWS)
+        self._dir: Optional[str] = None
+        # Fixed folder name under spill_dir (instead of a fresh temp folder); its old contents are discarded.
+        self._dir_name = dir_name
+        self._seg_files = 0
+        # Optional str -> slot index derivation, evaluated once per distinct string.
+        self._slot_fn: Optional[Callable[[str], Optional[int]]] = None
+        self._slots = array("h")
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, name: object) -> bool:
+        return name in self.columns
+
+    def names(self) -> List[str]:
+        return list(self.columns.keys())
+
+    def get(self, name: str) -> Optional[MetricColumns]:
+        return self.columns.get(name)
+
+    def items(self) -> Iterator[Tuple[str, MetricColumns]]:
+        return iter(self.columns.items())
+
+    def column(
+        self,
+        name: str,
+        metric_id: Optional[int] = None,
+        dtype: Optional[str] = None,
+        lookup: Optional[str] = None,
+        unit: str = "",
+    ) -> MetricColumns:
+        col = self.columns.get(name)
+        if col is None:
+            col = MetricColumns(name, metric_id=metric_id, dtype=dtype, lookup=lookup, unit=unit)
+            if self.spill_dir:
+                col._spill_rows = self.segment_rows
+            self.columns[col.name] = col
+        return col
+
+    def intern_string(self, value: Optional[str]) -> int:
+        if value is None:
+            return -1
+        code = self._string_codes.get(value)
+        if code is None:
+            code = len(self.strings)
+            self.strings.append(value)
+            self._string_codes[value] = code
+        return code
+
+    def string(self, code: int) -> Optional[str]:
+        if code < 0:
+            return None
+        return self.strings[code]
+
+    def append(
+        self,
+        name: str,
+        t_ms: int,
+        value_num: Optional[float] = None,
+        value_str: Optional[str] = None,
+        metric_id: Optional[int] = None,
+        dtype: Optional[str] = None,
+        lookup: Optional[str] = None,
+        idx: Optional[int] = None,
+        unit: str = "",
+    ) -> None:
+        col = self.columns.get(name)
+        if col is None:
+            col = self.column(name, metric_id=metric_id, dtype=dtype, lookup=lookup, unit=unit)
+        col.append(t_ms, value_num, self.intern_string(value_str), idx)
+        self._count += 1
+        if col._spill_rows and len(col._t) >= col._spill_rows:
+            self._spill(col)
+
+    def _append_chunk(self, col: MetricColumns, times: array, values: array, str_codes: Optional[array], idx: Optional[array]) -> None:
+        col.append_chunk(times, values, str_codes, idx)
+        self._count += len(times)
+        if col._spill_rows and len(col._t) >= col._spill_rows:
+            self._spill(col)
+
+    # -- spilling ---------------------------------------------------------
+
+    def _segment_path(self, col: MetricColumns) -> str:
+        if self._dir is None and self._dir_name:
+            path = os.path.join(self.spill_dir, self._dir_name)
+            shutil.rmtree(path, ignore_errors=True)
+            os.makedirs(path)
+            self._dir = path
+        elif self._dir is None:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            self._dir = tempfile.mkdtemp(prefix="samples_", dir=self.spill_dir)
+        path = col._seg_path
+        if path is None:
+            path = os.path.join(self._dir, f"{self._seg_files}.seg")
+            self._seg_files += 1
+        return path
+
+    def _spill(self, col: MetricColumns) -> None:
+        col.flush_segments(self._segment_path(col), self.segment_rows)
+
+    def restore_segment(
+        self,
+        col: MetricColumns,
+        count: int,
+        t_lo: int,
+        t_hi: int,
+        has_str: bool,
+        has_idx: bool,
+        blob: bytes,
+    ) -> None:
+        """
+        Append one compressed segment produced by MetricColumns.export_segments.
+        With a spill_dir the blob is written to the column's segment file as is;
+        otherwise (or once the column has a resident tail) it is decoded and appended.
+        """
+        if self.spill_dir and not len(col._t):
+            col._add_segment(self._segment_path(col), count, t_lo, t_hi, has_str, has_idx, bytes(blob))
+            self._count += count
+            return
+        seg = _Segment(0, len(blob), count, t_lo, t_hi, has_str, has_idx)
+        chunk = _decode_segment(seg, blob, len(col))
+        self._append_chunk(col, chunk.times, chunk.values, chunk.str_codes, chunk.idx)
+
+    def close(self) -> None:
+        """Delete this store's segment files (the store must not be read afterwards)."""
+        if self._dir is not None:
+            shutil.rmtree(self._dir, ignore_errors=True)
+            self._dir = None
+
+    @staticmethod
+    def _drop_segment_file(col: MetricColumns) -> None:
+        if col._seg_path is not None and os.path.exists(col._seg_path):
+            os.remove(col._seg_path)
+
+    def sort_column(self, col: MetricColumns) -> None:
+        """Stable sort of one column by time (ties keep their current order); no-op when already sorted."""
+        if col.is_time_sorted():
+            return
+        if col._segments:
+            self._sort_spilled_column(col)
+            return
+        times, values, str_codes, idx = col.times, col.values, col.str_codes, col.idx
+        order = sorted(range(len(times)), key=times.__getitem__)
+        extras = col.extras
+        col._reset()
+        self._count -= len(order)
+        self._append_chunk(
+            col,
+            array("q", (times[i] for i in order)),
+            array("d", (values[i] for i in order)),
+            array("i", (str_codes[i] for i in order)) if str_codes is not None else None,
+            array("h", (idx[i] for i in order)) if idx is not None else None,
+        )
+        col.time_sorted = True
+        if extras:
+            new_pos = {old: new for new, old in enumerate(order)}
+            col.extras = {new_pos[i]: patch for i, patch in extras.items()}
+
+    def _sort_spilled_column(self, col: MetricColumns) -> None:
+        """
+        sort_column for a column with segments, one chunk in memory at a time: every chunk
+        is sorted into its own spilled run, then the runs are k-way merged back into the
+        column (ties keep chunk order, so the sort stays stable). Old segment files are deleted.
+        """
+        extras = col.extras or {}
+        runs: List[MetricColumns] = []
+        for ch in col.chunks():
+            order = sorted(range(len(ch.times)), key=ch.times.__getitem__)
+            run = MetricColumns(col.name)
+            run.append_chunk(
+                array("q", (ch.times[j] for j in order)),
+                array("d", (ch.values[j] for j in order)),
+                array("i", (ch.str_codes[j] for j in order)) if ch.str_codes is not None else None,
+                array("h", (ch.idx[j] for j in order)) if ch.idx is not None else None,
+            )
+            if extras:
+                run.extras = {k: extras[ch.base + j] for k, j in enumerate(order) if ch.base + j in extras} or None
+            run.flush_segments(self._segment_path(run), self.segment_rows)
+            runs.append(run)
+
+        self._count -= len(col)
+        self._drop_segment_file(col)
+        col._reset()
+        col.extras = None
+        identity = array("i", range(len(self.strings)))
+        self._heap_merge_column(col, [(identity, run) for run in runs])
+        col.time_sorted = True
+        for run in runs:
+            self._drop_segment_file(run)
+
+    # -- merging ----------------------------------------------------------
+
+    def extend(self, other: "SampleStore") -> None:
+        """Append every column of another store (string codes are remapped into this store's table)."""
+        remap = array("i", (self.intern_string(x) for x in other.strings))
+        for name, src in other.items():
+            dst = self.column(name, metric_id=src.metric_id, dtype=src.dtype, lookup=src.lookup, unit=src.unit)
+            self._extend_column(dst, src, remap)
+
+    def _extend_column(self, dst: MetricColumns, src: MetricColumns, remap: array) -> None:
+        base = len(dst)
+        for ch in src.chunks():
+            codes = None
+            if ch.str_codes is not None:
+                codes = array("i", (remap[c] if c >= 0 else -1 for c in ch.str_codes))
+            self._append_chunk(dst, ch.times, ch.values, codes, ch.idx)
+        if src.extras:
+            for i, patch in src.extras.items():
+                dst.set_extra(base + i, patch)
+
+    @classmethod
+    def merge(
+        cls,
+        stores: List["SampleStore"],
+        spill_dir: Optional[str] = None,
+        segment_rows: Optional[int] = None,
+    ) -> "SampleStore":
+        """
+        Merge partial stores (e.g. one per provider stream) into one, with every
+        metric stably sorted by time: equal timestamps keep the order of `stores`.
+
+        Each input column is sorted on its own and the inputs are then either
+        concatenated (time ranges in order, the usual case for consecutive record
+        ranges) or k-way merged, so spilled columns are streamed segment by
+        segment. Input stores are closed once merged.
+        """
+        if len(stores) == 1:
+            out = stores[0]
+            for col in out.columns.values():
+                out.sort_column(col)
+            return out
+
+        out = cls(spill_dir=spill_dir, segment_rows=segment_rows)
+        remaps = [array("i", (out.intern_string(x) for x in st.strings)) for st in stores]
+        names: Dict[str, None] = {}
+        for st in stores:
+            for name in st.columns:
+                names.setdefault(name)
+
+        for name in names:
+            srcs = [(k, st, st.columns[name]) for k, st in enumerate(stores) if name in st.columns]
+            first = srcs[0][2]
+            dst = out.column(name, metric_id=first.metric_id, dtype=first.dtype, lookup=first.lookup, unit=first.unit)
+            bounds = []
+            for _, st, col in srcs:
+                st.sort_column(col)
+                bounds.append(col.time_bounds())
+            in_order = all(
+                bounds[j][1] is None or bounds[j + 1][0] is None or bounds[j][1] <= bounds[j + 1][0]
+                for j in range(len(bounds) - 1)
+            )
+            if in_order:
+                for k, _, col in srcs:
+                    out._extend_column(dst, col, remaps[k])
+            else:
+                out._heap_merge_column(dst, [(remaps[k], col) for k, _, col in srcs])
+            dst.time_sorted = True
+
+        for st in stores:
+            st.close()
+        return out
+
+    def _heap_merge_column(self, dst: MetricColumns, sources: List[Tuple[array, MetricColumns]]) -> None:
+        def _rows(k: int, col: MetricColumns) -> Iterator[Tuple[int, int, int, float, int, int]]:
+            for ch in col.chunks():
+                codes = ch.str_codes
+                idx = ch.idx
+                for j in range(len(ch.times)):
+                    yield (
+                        ch.times[j], k, ch.base + j, ch.values[j],
+                        codes[j] if codes is not None else -1,
+                        idx[j] if idx is not None else -1,
+                    )
+
+        streams = [_rows(k, col) for k, (_, col) in enumerate(sources)]
+        for t, k, i, v, code, slot in heapq.merge(*streams, key=lambda r: r[0]):
+            remap, src = sources[k]
+            dst.append(t, v, remap[code] if code >= 0 else -1, slot if slot >= 0 else None)
+            self._count += 1
+            if src.extras and i in src.extras:
+                dst.set_extra(len(dst) - 1, src.extras[i])
+            if dst._spill_rows and len(dst._t) >= dst._spill_rows:
+                self._spill(dst)
+
+    # -- reading ----------------------------------------------------------
+
+    def value_str(self, col: MetricColumns, i: int) -> Optional[str]:
+        return self.string(col.str_code(i))
+
+    def set_string_slot_fn(self, fn: Optional[Callable[[str], Optional[int]]]) -> None:
+        """
+        Derive per-sample slot indexes from text values: fn(string) -> slot or None,
+        evaluated lazily once per distinct string (see sample_index).
+        """
+        self._slot_fn = fn
+        self._slots = array("h")
+
+    def string_slot(self, code: int) -> Optional[int]:
+        if code < 0 or self._slot_fn is None:
+            return None
+        slots = self._slots
+        while len(slots) <= code:
+            v = self._slot_fn(self.strings[len(slots)])
+            slots.append(-1 if v is None else int(v))
+        v = slots[code]
+        return None if v < 0 else int(v)
+
+    def sample_index(self, col: MetricColumns, i: int) -> Optional[int]:
+        """Explicit per-sample slot index, else the one derived from the sample's text value."""
+        v = col.sample_index(i)
+        if v is None:
+            v = self.string_slot(col.str_code(i))
+        return v
+
+    def chunk_sample_index(self, chunk: ColumnChunk, j: int) -> Optional[int]:
+        """sample_index of the j-th sample of a chunk."""
+        v = chunk.idx[j] if chunk.idx is not None else -1
+        if v >= 0:
+            return int(v)
+        return self.string_slot(chunk.str_codes[j]) if chunk.str_codes is not None else None
+
+    def chunk_sample_indexes(self, chunk: ColumnChunk) -> Iterator[Optional[int]]:
+        """sample_index for every sample of a chunk."""
+        idx = chunk.idx
+        codes = chunk.str_codes
+        for j in range(len(chunk)):
+            v = idx[j] if idx is not None else -1
+            if v >= 0:
+                yield int(v)
+            elif codes is not None:
+                yield self.string_slot(codes[j])
+            else:
+                yield None
+
+    def time_bounds(self) -> Tuple[Optional[int], Optional[int]]:
+        lo: Optional[int] = None
+        hi: Optional[int] = None
+        for col in self.columns.values():
+            c_lo, c_hi = col.time_bounds()
+            if c_lo is None:
+                continue
+            lo = c_lo if lo is None else min(lo, c_lo)
+            hi = c_hi if hi is None else max(hi, c_hi)
+        return lo, hi
+
+    def nbytes(self) -> int:
+        total = sum(col.nbytes() for col in self.columns.values())
+        total += sum(sys.getsizeof(s) for s in self.strings)
+        total += sys.getsizeof(self.strings) + sys.getsizeof(self._string_codes)
+        return total
+
+    def disk_nbytes(self) -> int:
+        return sum(col.disk_nbytes() for col in self.columns.values())
+
+    def memory_report(self) -> Dict[str, Any]:
+        total = self.nbytes()
+        return {
+            "samples": self._count,
+            "metrics": len(self.columns),
+            "strings": len(self.strings),
+            "bytes": total,
+            "bytes_per_sample": round(total / self._count, 2) if self._count else 0.0,
+            "segments": sum(col.segment_count for col in self.columns.values()),
+            "disk_bytes": self.disk_nbytes(),
+        }
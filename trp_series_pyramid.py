@@ -0,0 +1,214 @@
+"""
+Multi-resolution min/max pyramids for numeric TRP signals.
+
+For each long numeric metric column, import aggregates the samples into fixed time
+buckets (1 s, 10 s, 1 min, 10 min; PYRAMID_LEVELS_MS). Every non-empty bucket keeps its
+sample count and sum (so its average is sums[k] / counts[k]) and its minimum and maximum
+together with the times they occur at, in parallel typed arrays:
+
+    * starts   array('q')  bucket start, epoch ms
+    * counts   array('i')  numeric samples in the bucket
+    * sums     array('d')  sum of their values
+    * mins     array('d')  smallest value   t_mins  array('q')  its time
+    * maxs     array('d')  largest value    t_maxs  array('q')  its time
+
+A level is only kept when it has at most a quarter as many buckets as the level (or
+raw samples) below it, so 1 Hz signals get no 1 s level and short or sparse signals
+get no pyramid at all. Coarser levels are aggregated from the finest one.
+
+An overview request picks the coarsest level that still has as many buckets in the
+requested range as the chart has pixels and draws each bucket's min and max sample:
+the work depends on the chart width, not on how many samples the range holds.
+Columns with text values or slot indexes are not summarised (their series differ per
+slot); pyramids are derived state and are rebuilt rather than persisted.
+"""
+
+from __future__ import annotations
+
+import bisect
+from array import array
+from itertools import compress
+from typing import Any, Dict, List, Optional, Tuple
+
+# Bucket widths, finest first.
+PYRAMID_LEVELS_MS = (1000, 10000, 60000, 600000)
+
+# Columns shorter than this are served from the samples directly.
+PYRAMID_MIN_SAMPLES = 4096
+
+# A level must shrink the level below it at least this many times to be kept.
+_MIN_REDUCTION = 4
+
+
+class PyramidLevel:
+    """Non-empty buckets of one width, in time order."""
+
+    __slots__ = ("bucket_ms", "starts", "counts", "sums", "mins", "maxs", "t_mins", "t_maxs")
+
+    def __init__(self, bucket_ms: int) -> None:
+        self.bucket_ms = int(bucket_ms)
+        self.starts = array("q")
+        self.counts = array("i")
+        self.sums = array("d")
+        self.mins = array("d")
+        self.maxs = array("d")
+        self.t_mins = array("q")
+        self.t_maxs = array("q")
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def _add(self, start: int, count: int, total: float, vmin: float, t_min: int, vmax: float, t_max: int) -> None:
+        self.starts.append(start)
+        self.counts.append(count)
+        self.sums.append(total)
+        self.mins.append(vmin)
+        self.t_mins.append(t_min)
+        self.maxs.append(vmax)
+        self.t_maxs.append(t_max)
+
+    def avg(self, k: int) -> float:
+        """Mean value of bucket k."""
+        return self.sums[k] / self.counts[k]
+
+    def span(self, t_lo: Optional[int], t_hi: Optional[int]) -> Tuple[int, int]:
+        """[i0, i1) of the buckets overlapping [t_lo, t_hi] (open ends when None)."""
+        i0 = 0 if t_lo is None else bisect.bisect_right(self.starts, t_lo - self.bucket_ms)
+        i1 = len(self.starts) if t_hi is None else bisect.bisect_right(self.starts, t_hi)
+        return i0, max(i0, i1)
+
+    def nbytes(self) -> int:
+        return sum(a.buffer_info()[1] * a.itemsize for a in (self.starts, self.counts, self.sums, self.mins, self.maxs, self.t_mins, self.t_maxs))
+
+
+def _level_from_samples(times: array, values: array, bucket_ms: int) -> PyramidLevel:
+    level = PyramidLevel(bucket_ms)
+    n = len(times)
+    a = 0
+    while a < n:
+        start = times[a] // bucket_ms * bucket_ms
+        b = bisect.bisect_left(times, start + bucket_ms, a)
+        part = values[a:b]
+        vmin = min(part)
+        vmax = max(part)
+        level._add(start, b - a, sum(part), vmin, times[a + part.index(vmin)], vmax, times[a + part.index(vmax)])
+        a = b
+    return level
+
+
+def _level_from_level(src: PyramidLevel, bucket_ms: int) -> PyramidLevel:
+    level = PyramidLevel(bucket_ms)
+    starts = src.starts
+    n = len(starts)
+    a = 0
+    while a < n:
+        start = starts[a] // bucket_ms * bucket_ms
+        b = bisect.bisect_left(starts, start + bucket_ms, a)
+        mins = src.mins[a:b]
+        maxs = src.maxs[a:b]
+        vmin = min(mins)
+        vmax = max(maxs)
+        level._add(
+            start, sum(src.counts[a:b]), sum(src.sums[a:b]),
+            vmin, src.t_mins[a + mins.index(vmin)],
+            vmax, src.t_maxs[a + maxs.index(vmax)],
+        )
+        a = b
+    return level
+
+
+class SeriesPyramid:
+    """The kept levels of one metric column, finest first."""
+
+    __slots__ = ("levels", "samples")
+
+    def __init__(self, levels: List[PyramidLevel], samples: int) -> None:
+        self.levels = levels
+        self.samples = samples
+
+    def source_points(self, t_lo: Optional[int], t_hi: Optional[int]) -> int:
+        """Numeric samples in [t_lo, t_hi], from the finest level (whole edge buckets included)."""
+        finest = self.levels[0]
+        i0, i1 = finest.span(t_lo, t_hi)
+        return sum(finest.counts[i0:i1])
+
+    def choose(self, t_lo: Optional[int], t_hi: Optional[int], buckets: int) -> Optional[Tuple[PyramidLevel, int, int]]:
+        """Coarsest level with at least `buckets` buckets in the range, as (level, i0, i1); None if none has."""
+        for level in reversed(self.levels):
+            i0, i1 = level.span(t_lo, t_hi)
+            if i1 - i0 >= buckets:
+                return level, i0, i1
+        return None
+
+    def points(self, level: PyramidLevel, i0: int, i1: int, t_lo: Optional[int], t_hi: Optional[int]) -> Tuple[array, array]:
+        """Each bucket's min and max sample in time order, as (times, values); samples outside the range are dropped."""
+        times = array("q")
+        values = array("d")
+        lo = -(1 << 62) if t_lo is None else t_lo
+        hi = (1 << 62) if t_hi is None else t_hi
+        t_mins, t_maxs, mins, maxs = level.t_mins, level.t_maxs, level.mins, level.maxs
+        for k in range(i0, i1):
+            a, b = t_mins[k], t_maxs[k]
+            if a > b:
+                pairs = ((b, maxs[k]), (a, mins[k]))
+            elif a < b:
+                pairs = ((a, mins[k]), (b, maxs[k]))
+            else:
+                pairs = ((a, mins[k]),)
+            for t, v in pairs:
+                if lo <= t <= hi:
+                    times.append(t)
+                    values.append(v)
+        return times, values
+
+    def nbytes(self) -> int:
+        return sum(level.nbytes() for level in self.levels)
+
+
+def build_series_pyramid(col: Any) -> Optional[SeriesPyramid]:
+    """Pyramid for a trp_sample_store.MetricColumns, or None when the column does not get one."""
+    if len(col) < PYRAMID_MIN_SAMPLES or col.dtype == "str" or not col.is_time_sorted():
+        return None
+    times = array("q")
+    values = array("d")
+    for chunk in col.chunks():
+        if chunk.str_codes is not None or chunk.idx is not None:
+            return None
+        times.extend(chunk.times)
+        values.extend(chunk.values)
+    total = sum(values)
+    if total != total:
+        # Missing values (NaN) are not part of the numeric series.
+        mask = [v == v for v in values]
+        times = array("q", compress(times, mask))
+        values = array("d", compress(values, mask))
+    if len(times) < PYRAMID_MIN_SAMPLES:
+        return None
+
+    duration = times[-1] - times[0]
+    levels: List[PyramidLevel] = []
+    below = len(times)
+    for bucket_ms in PYRAMID_LEVELS_MS:
+        # Upper bound on the bucket count: skip levels that cannot shrink the one below enough.
+        if min(below, duration // bucket_ms + 2) * _MIN_REDUCTION > below:
+            continue
+        if levels:
+            level = _level_from_level(levels[-1], bucket_ms)
+        else:
+            level = _level_from_samples(times, values, bucket_ms)
+        if len(level) * _MIN_REDUCTION > below:
+            continue
+        levels.append(level)
+        below = len(level)
+    if not levels:
+        return None
+    return SeriesPyramid(levels, len(times))
+
+
+def pyramid_memory_report(pyramids: Dict[str, Optional[SeriesPyramid]]) -> Dict[str, Any]:
+    built = [p for p in pyramids.values() if p is not None]
+    return {
+        "signals": len(built),
+        "buckets": sum(len(level) for p in built for level in p.levels),
+        "bytes": sum(p.nbytes() for p in built),
+    }